@@ -2,7 +2,7 @@ import argparse
 import json
 import yaml
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 def get_version():
     """Read version from docs/app_description.md"""
@@ -43,6 +43,33 @@ def parse_app_description():
         default='yaml',
         help='Output format (default: yaml)'
     )
+    parser.add_argument(
+        '--project',
+        action='append',
+        default=[],
+        help=('Project directory to run in; repeat to run several projects concurrently. '
+              'Files in a project\'s rules/ directory override the shared rules')
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        help='Number of projects to run at once (default: projects.max_workers)'
+    )
+    parser.add_argument(
+        '--archive-format',
+        choices=['zip', 'tar.gz', 'tar.zst'],
+        help='Format of the packaged project (default: packaging.format)'
+    )
+    parser.add_argument(
+        '--archive-output',
+        type=str,
+        help='Where to write the packaged project, - for stdout (default: output/project.<ext>)'
+    )
+    parser.add_argument(
+        '--reproducible',
+        action='store_true',
+        help='Package with fixed timestamps, owners and permissions'
+    )
     parser.add_argument(
         '-v', '--version',
         action='version',
@@ -64,5 +91,121 @@ def parse_app_description():
         
     return {
         'description_path': desc_path,
+        'output_format': args.format,
+        'projects': [Path(project) for project in args.project],
+        'jobs': args.jobs,
+        'archive_format': args.archive_format,
+        'archive_output': args.archive_output,
+        'reproducible': args.reproducible
+    }
+
+def parse_worker_args(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Parse CLI arguments of the ``worker`` command."""
+    parser = argparse.ArgumentParser(
+        prog='pyfactory worker',
+        description='PyFactory - implement work items leased from a shared queue'
+    )
+    parser.add_argument(
+        '--queue',
+        type=str,
+        help='Path of the shared queue (default: work_queue.path)'
+    )
+    parser.add_argument(
+        '--project',
+        type=str,
+        help='Directory for this worker\'s logs (default: current directory)'
+    )
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        help='Name recorded on leases (default: host and process id)'
+    )
+    parser.add_argument(
+        '--max-jobs',
+        type=int,
+        help='Stop after this many work items'
+    )
+    parser.add_argument(
+        '--idle-timeout',
+        type=float,
+        help='Stop after the queue has been empty this many seconds'
+    )
+    
+    args = parser.parse_args(argv)
+    return {
+        'queue': args.queue,
+        'project': Path(args.project) if args.project else None,
+        'worker_id': args.worker_id,
+        'max_jobs': args.max_jobs,
+        'idle_timeout': args.idle_timeout
+    }
+
+
+def parse_logs_args(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Parse CLI arguments of the ``logs`` command."""
+    parser = argparse.ArgumentParser(
+        prog='pyfactory logs',
+        description='PyFactory - query structured logs through their sidecar index'
+    )
+    parser.add_argument(
+        '--file',
+        type=str,
+        default='logs/app.log',
+        help='Log file to query (default: logs/app.log)'
+    )
+    parser.add_argument('--since', type=str, help='Earliest ISO timestamp')
+    parser.add_argument('--until', type=str, help='Latest ISO timestamp')
+    parser.add_argument(
+        '--level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        help='Least severe level to show'
+    )
+    parser.add_argument('--agent', type=str, help='Only entries of this agent')
+    parser.add_argument('--item', type=str, help='Only entries of this work item')
+    parser.add_argument(
+        '--context',
+        action='append',
+        default=[],
+        metavar='KEY=VALUE',
+        help='Only entries with this context value; repeatable'
+    )
+    parser.add_argument(
+        '--errors',
+        action='store_true',
+        help='Only entries carrying an error in their context'
+    )
+    parser.add_argument('--grep', type=str, help='Substring the message must contain')
+    parser.add_argument('--limit', type=int, help='Show at most this many entries')
+    parser.add_argument(
+        '--format',
+        choices=['json', 'text'],
+        default='json',
+        help='Output format (default: json)'
+    )
+    
+    args = parser.parse_args(argv)
+    context = {}
+    for pair in args.context:
+        key, separator, value = pair.partition('=')
+        if not separator:
+            parser.error(f"--context expects KEY=VALUE, got {pair}")
+        context[key] = value
+    if args.agent:
+        context['agent'] = args.agent
+    if args.item:
+        context['item'] = args.item
+    
+    log_file = Path(args.file)
+    if not log_file.exists():
+        raise FileNotFoundError(f"Log file not found: {log_file}")
+    return {
+        'log_file': log_file,
+        'since': args.since,
+        'until': args.until,
+        'level': args.level,
+        'context': context,
+        'has': ['error'] if args.errors else [],
+        'text': args.grep,
+        'limit': args.limit,
         'output_format': args.format
-    }
\ No newline at end of file
+    }
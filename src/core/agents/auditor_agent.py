@@ -1,26 +1,32 @@
-from pathlib import Path
+import hashlib
 import re
-from typing import List, Dict, Any
-from ..models import AuditResult
+import json
+from typing import List, Dict, Any, Optional
+from ..models import AuditResult, WorkItemStatus
+from ..prompt_budget import estimate_tokens
+from ..signal_bus import get_signal_bus
+from ..work_store import get_work_store
 from .base_agent import BaseAgent
-from ..llm_client import LLMClient, LLMConfig
 
 class AuditorAgent(BaseAgent):
     """Concrete agent implementation for auditing tasks."""
     
+    slug = "auditor"
+    
     def execute(self) -> None:
         """Execute the auditor's workflow.
         
         Consumes IMPLEMENTATION_COMPLETE.md, verifies implementation,
-        and produces PROJECT_AUDIT_PASSED.md if audit passes.
+        and produces PROJECT_AUDIT_PASSED.md if audit passes, otherwise
+        PROJECT_AUDIT_FAILED.md and a work item for the planner.
         """
         # Parse implementation results
-        impl_path = Path("signals/IMPLEMENTATION_COMPLETE.md")
+        impl_path = self.workspace.signal("IMPLEMENTATION_COMPLETE.md")
         if not impl_path.exists():
             raise FileNotFoundError("Implementation file not found")
             
         impl_content = impl_path.read_text()
-        work_items = self._parse_work_items(impl_content)
+        work_items = self._load_work_items(impl_content)
         verification = self._parse_verification(impl_content)
         
         # Perform audit
@@ -31,6 +37,18 @@ class AuditorAgent(BaseAgent):
         # Generate audit result
         self._create_audit_result(audit_result)
 
+    def _load_work_items(self, content: str) -> List[Dict[str, str]]:
+        """Return work items from the store, or parsed from the implementation file."""
+        store = get_work_store()
+        items = store.get_items() if store is not None else []
+        if not items:
+            return self._parse_work_items(content)
+        return [
+            {"item_id": item.item_id, "description": item.description,
+             "status": WorkItemStatus(item.status).value}
+            for item in items
+        ]
+
     def _parse_work_items(self, content: str) -> List[Dict[str, str]]:
         """Extract work items from implementation file."""
         items = []
@@ -60,41 +78,70 @@ class AuditorAgent(BaseAgent):
         if verification.get("tests") != "passed":
             return False
             
-        # Semantic checks for each work item
-        for item in work_items:
-            if not self._verify_work_item_implementation(item):
-                return False
-                
-        return True
+        # Semantic checks, several work items per request when batching is
+        # enabled; every item is checked so that only rejected ones are rebuilt.
+        # Verdicts checkpointed by an earlier attempt are not asked for again.
+        verdicts = [self._checkpointed_verdict(item) for item in work_items]
+        unchecked = [index for index, verdict in enumerate(verdicts) if verdict is None]
+        unchecked_items = [work_items[index] for index in unchecked]
+        if self.settings.get("batch_token_budget"):
+            new_verdicts = self._verify_work_items_batched(unchecked_items)
+        else:
+            new_verdicts = [self._verify_work_item_implementation(item) for item in unchecked_items]
+        for index, verdict in zip(unchecked, new_verdicts):
+            verdicts[index] = verdict
+        self._invalidate_rejected(work_items, verdicts)
+        return all(verdicts)
+
+    def _verdict_key(self, item: Dict[str, str]) -> str:
+        """Key a verdict by everything it depends on: requirement, code and rules."""
+        return hashlib.sha256(json.dumps(
+            [item["description"], self._read_item_code(item), self.agent_rules]
+        ).encode("utf-8")).hexdigest()
+
+    def _checkpointed_verdict(self, item: Dict[str, str]) -> Optional[bool]:
+        store = get_work_store()
+        return store.get_verdict(self._verdict_key(item)) if store is not None else None
+
+    def _checkpoint_verdict(self, item: Dict[str, str], verdict: bool) -> None:
+        store = get_work_store()
+        if store is not None:
+            store.record_verdict(self._verdict_key(item), verdict)
+
+    def _invalidate_rejected(self, work_items: List[Dict[str, str]], verdicts: List[bool]) -> None:
+        """Drop the recorded builds of rejected items so the developer redoes only those.
+        
+        The developer asks the LLM afresh for rejected items instead of
+        replaying its cached response, and their NO verdicts are dropped
+        so the rebuilt code is audited again.
+        """
+        store = get_work_store()
+        rejected = [item for item, ok in zip(work_items, verdicts) if not ok]
+        if store is not None and rejected:
+            store.invalidate_builds(item["description"] for item in rejected)
+            store.forget_verdicts(self._verdict_key(item) for item in rejected)
 
     def _verify_work_item_implementation(self, item: Dict[str, str]) -> bool:
         """Verify work item implementation using semantic AI validation."""
-        # Initialize LLM client with auditor configuration
-        llm_config = LLMConfig(
-            provider="openrouter",
-            model="deepseek/deepseek-chat-v3-0324:free"
-        )
-        llm_client = LLMClient(llm_config)
+        # Client routed by config/models.yaml, reused across calls
+        llm_client = self.get_llm_client()
         
         # Get relevant file content for verification
-        file_content = ""
-        if " in " in item["description"]:
-            path = self._extract_file_path(item["description"])
-            if path and Path(path).exists():
-                with open(path) as f:
-                    file_content = f.read()
+        file_content = self._read_item_code(item)
         
         # Prepare verification prompt
-        system_message = """
+        system_message = f"""
         You are an AI auditor agent. Your task is to verify if the implementation
         matches the requirement. Respond with ONLY 'YES' or 'NO' based on:
         - Does the code correctly implement the requirement?
         - Does it follow all specified rules?
+        
+        Rules:
+        {self.agent_rules}
         """
         
         user_prompt = f"""
         Requirement: {item["description"]}
-        Rules: {self.rules}
         Code:\n{file_content}
         
         Does this implementation fully satisfy the requirement?
@@ -104,13 +151,114 @@ class AuditorAgent(BaseAgent):
         try:
             response = llm_client.prompt(
                 system_message=system_message,
-                user_prompt=user_prompt
+                user_prompt=user_prompt,
+                validate=lambda text: text.strip().upper() in ("YES", "NO")
             )
-            return response.strip().upper() == "YES"
+            verdict = response.strip().upper() == "YES"
+            self._checkpoint_verdict(item, verdict)
+            return verdict
         except Exception as e:
             self.error_handler.log_error(f"Verification failed for {item['description']}: {str(e)}")
             return False
 
+    def _verify_work_items_batched(self, work_items: List[Dict[str, str]]) -> List[bool]:
+        """Verify work items several at a time using structured per-item verdicts.
+        
+        Requirement and code pairs are packed into prompts up to the
+        ``batch_token_budget`` setting. Items the response does not give a
+        verdict for are verified individually.
+        
+        Returns:
+            One verdict per work item, in order
+        """
+        llm_client = self.get_llm_client()
+        system_message = f"""
+        You are an AI auditor agent. For every numbered item in the user message,
+        verify if the implementation matches the requirement based on:
+        - Does the code correctly implement the requirement?
+        - Does it follow all specified rules?
+        
+        Rules:
+        {self.agent_rules}
+        
+        Respond with ONLY JSON of this structure, one verdict per item:
+        {{
+            "verdicts": [
+                {{"id": 1, "verdict": "YES"}}
+            ]
+        }}
+        """
+        
+        verdicts: Dict[int, bool] = {}
+        for batch in self._pack_verification_batches(work_items, system_message):
+            user_prompt = "\n\n".join(
+                f"## Item {index + 1}\n"
+                f"Requirement: {work_items[index]['description']}\n"
+                f"Code:\n{self._read_item_code(work_items[index])}"
+                for index in batch
+            )
+            try:
+                response = llm_client.prompt(
+                    system_message=system_message,
+                    user_prompt=user_prompt,
+                    validate=lambda text: bool(self._parse_verdicts(text))
+                )
+                parsed = self._parse_verdicts(response)
+            except Exception as e:
+                self.error_handler.log_error(f"Batched verification failed: {str(e)}")
+                parsed = {}
+            
+            for index in batch:
+                if index + 1 in parsed:
+                    verdicts[index] = parsed[index + 1]
+                    self._checkpoint_verdict(work_items[index], verdicts[index])
+        
+        # Fall back to one request per item the batches did not cover
+        return [
+            verdicts[index] if index in verdicts
+            else self._verify_work_item_implementation(item)
+            for index, item in enumerate(work_items)
+        ]
+
+    def _pack_verification_batches(self, work_items: List[Dict[str, str]],
+                                   system_message: str) -> List[List[int]]:
+        """Group work item indexes into batches that fit the token budget."""
+        budget = self.settings["batch_token_budget"] - estimate_tokens(system_message)
+        batches: List[List[int]] = []
+        current: List[int] = []
+        used = 0
+        for index, item in enumerate(work_items):
+            cost = estimate_tokens(item["description"]) + estimate_tokens(self._read_item_code(item))
+            if current and used + cost > budget:
+                batches.append(current)
+                current, used = [], 0
+            current.append(index)
+            used += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _parse_verdicts(self, response: str) -> Dict[int, bool]:
+        """Extract per-item YES/NO verdicts from a batched verification response."""
+        start, end = response.find("{"), response.rfind("}")
+        if start == -1 or end == -1:
+            return {}
+        verdicts = {}
+        for entry in json.loads(response[start:end + 1]).get("verdicts", []):
+            verdict = str(entry.get("verdict", "")).strip().upper()
+            if verdict in ("YES", "NO"):
+                verdicts[int(entry["id"])] = verdict == "YES"
+        return verdicts
+
+    def _read_item_code(self, item: Dict[str, str]) -> str:
+        """Return the content of the file a work item refers to, if any."""
+        if " in " in item["description"]:
+            path = self._extract_file_path(item["description"])
+            if path and self.workspace.path(path).exists():
+                with open(self.workspace.path(path)) as f:
+                    return f.read()
+        return ""
+
     def _extract_file_path(self, description: str) -> str:
         """Extract file path from work item description."""
         if " in " in description:
@@ -119,20 +267,20 @@ class AuditorAgent(BaseAgent):
 
     def _verify_config_system(self) -> bool:
         """Verify configuration system implementation."""
-        config_path = "config/system_config.yaml"
-        if not Path(config_path).exists():
+        config_path = self.workspace.path("config/system_config.yaml")
+        if not config_path.exists():
             return False
             
-        content = Path(config_path).read_text()
+        content = config_path.read_text()
         return "agents:" in content and "max_retries:" in content
 
     def _verify_output_system(self) -> bool:
         """Verify output system implementation."""
-        output_path = "src/core/output_generator.py"
-        if not Path(output_path).exists():
+        output_path = self.workspace.path("src/core/output_generator.py")
+        if not output_path.exists():
             return False
             
-        content = Path(output_path).read_text()
+        content = output_path.read_text()
         return "def package_project" in content and "zipfile.ZipFile" in content
 
     def _find_discrepancies(self, work_items: List[Dict[str, str]],
@@ -158,35 +306,35 @@ class AuditorAgent(BaseAgent):
         return discrepancies
 
     def _create_audit_result(self, result: AuditResult) -> None:
-        """Generate the audit result file."""
-        signal_path = Path("signals/PROJECT_AUDIT_PASSED.md")
-        signal_path.parent.mkdir(exist_ok=True)
+        """Publish the audit result file, and a work item if the audit failed."""
+        lines = [
+            "# Project Audit Result\n\n",
+            f"Status: {'PASSED' if result.passed else 'FAILED'}\n\n"
+        ]
+        bus = get_signal_bus()
+        store = get_work_store()
+        if store is not None:
+            store.save_audit(result)
         
-        with open(signal_path, "w") as f:
-            f.write("# Project Audit Result\n\n")
-            f.write(f"Status: {'PASSED' if result.passed else 'FAILED'}\n\n")
+        if result.passed:
+            lines.append("All quality standards met.\n")
+            lines.append(f"Using configuration: {self.config}\n")
+            lines.append(f"Following rules: {self.rules}\n")
+        else:
+            lines.append("## Discrepancies Found:\n")
+            lines.extend(f"- {key}: {value}\n" for key, value in result.discrepancies.items())
+            lines.append("\nRecommendations:\n")
+            lines.append("- Complete all pending work items\n")
+            lines.append("- Improve test coverage to at least 90%\n")
+            lines.append("- Fix failing tests\n")
+            
+            # Create a work item for the failed audit, named after it
+            item_lines = ["# Audit Failure Work Item\n\n", "## Discrepancies:\n"]
+            item_lines.extend(f"- {key}: {value}\n" for key, value in result.discrepancies.items())
+            item_lines.append("\n## Required Actions:\n")
+            item_lines.append("- Review and fix all discrepancies\n")
+            item_lines.append("- Rerun implementation and verification\n")
+            bus.publish(self.workspace.work_item(f"audit-{result.audit_id}.md"), "".join(item_lines))
             
-            if result.passed:
-                f.write("All quality standards met.\n")
-                f.write(f"Using configuration: {self.config}\n")
-                f.write(f"Following rules: {self.rules}\n")
-            else:
-                f.write("## Discrepancies Found:\n")
-                for key, value in result.discrepancies.items():
-                    f.write(f"- {key}: {value}\n")
-                f.write("\nRecommendations:\n")
-                f.write("- Complete all pending work items\n")
-                f.write("- Improve test coverage to at least 90%\n")
-                f.write("- Fix failing tests\n")
-                
-                # Create work item for failed audit
-                work_item_path = Path("work_items/item-001-audit-failure.md")
-                work_item_path.parent.mkdir(exist_ok=True)
-                with open(work_item_path, "w") as wi:
-                    wi.write("# Audit Failure Work Item\n\n")
-                    wi.write("## Discrepancies:\n")
-                    for key, value in result.discrepancies.items():
-                        wi.write(f"- {key}: {value}\n")
-                    wi.write("\n## Required Actions:\n")
-                    wi.write("- Review and fix all discrepancies\n")
-                    wi.write("- Rerun implementation and verification\n")
\ No newline at end of file
+        signal = "PROJECT_AUDIT_PASSED.md" if result.passed else "PROJECT_AUDIT_FAILED.md"
+        bus.publish(self.workspace.signal(signal), "".join(lines))
@@ -1,19 +1,68 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict
-from ..repo import BaseModel
+from typing import Any, Dict, Optional
+from ..error_handler import ErrorHandler
+from ..llm_cache import get_cache
+from ..model_router import ModelRouter, RoutedClient
+from ..prompt_budget import get_accountant
+from ..workspace import Workspace
 
 class BaseAgent(ABC):
     """Abstract base class for all agents in the system."""
     
-    def __init__(self, config: Dict[str, Any], rules: Dict[str, Any]):
+    # Key of this agent's entry in the ``agents`` config section
+    slug: str = ""
+    
+    def __init__(self, config: Dict[str, Any], rules: Dict[str, Any],
+                 workspace: Optional[Workspace] = None):
         """Initialize agent with configuration and rules.
         
         Args:
             config: Agent-specific configuration
             rules: System-wide rules the agent must follow
+            workspace: Project the agent works on, defaults to the current directory
         """
         self.config = config
         self.rules = rules
+        self.workspace = workspace or Workspace()
+        self.error_handler = ErrorHandler(str(self.workspace.error_log))
+        self._llm_client: Optional[RoutedClient] = None
+
+    def get_llm_client(self) -> RoutedClient:
+        """Return the agent's LLM client, creating it on first use.
+
+        The client follows the agent's routes from the ``agents`` section of
+        config/models.yaml, is reused for every call the agent makes, sends
+        its requests over the process-wide pooled transport and consults
+        the shared response cache according to the agent's ``cache``
+        setting.
+        """
+        if self._llm_client is None:
+            router = ModelRouter((self.config or {}).get("agents"))
+            self._llm_client = router.client_for(
+                self.slug,
+                cache=get_cache(),
+                cache_mode=self.settings.get("cache", "use"),
+                accountant=get_accountant(),
+                error_log=str(self.workspace.error_log)
+            )
+        return self._llm_client
+
+    @property
+    def agent_rules(self) -> str:
+        """The rules written for this agent only.
+        
+        Prompts embed these in a system message that does not vary between
+        calls, so rules meant for other agents are never sent and the
+        provider can reuse its cached prompt prefix.
+        """
+        if isinstance(self.rules, dict):
+            return str(self.rules.get(self.slug, ""))
+        return str(self.rules or "")
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """This agent's entry from the ``agents`` section of the configuration."""
+        return (self.config or {}).get("agents", {}).get(self.slug) or {}
     
     @abstractmethod
     def execute(self) -> None:
@@ -1,31 +1,90 @@
 from pathlib import Path
+import hashlib
 import re
-from typing import List, Optional
+import asyncio
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import json
+from ..error_handler import SecurityError
 from ..models import WorkItem
+from ..model_router import RoutedClient
+from ..stream_parser import FileStreamParser
+from ..signal_bus import get_signal_bus
+from ..scheduler import WorkItemScheduler
+from ..work_store import get_work_store
+from ..work_queue import get_work_queue
+from ..logger import logger
+from ..tracing import bind_context, get_tracer
+from ..workspace import Workspace
 from .base_agent import BaseAgent
-from ..llm_client import LLMClient, LLMConfig
+
+def _file_hash(path: Path) -> Optional[str]:
+    """Return the SHA-256 of a file's content, or None if it does not exist."""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except FileNotFoundError:
+        return None
 
 class DeveloperAgent(BaseAgent):
     """Concrete agent implementation for development tasks."""
     
+    slug = "developer"
+    
+    def __init__(self, config: Dict[str, Any], rules: Dict[str, Any],
+                 workspace: Optional[Workspace] = None):
+        super().__init__(config, rules, workspace)
+        # Serializes file writes from concurrently streamed work items
+        self._write_lock = threading.Lock()
+        # Fingerprint of each work item, computed before implementing it
+        self._fingerprints: Dict[str, str] = {}
+        if self.settings.get("streaming", False) and self.settings.get("cascade"):
+            logger.warning("Streamed implementations are not validated; the cascade "
+                           "will only fall back on provider errors")
+    
     def execute(self) -> None:
         """Execute the developer's workflow.
         
         Consumes PLANNING_COMPLETE.md, implements work items,
         and produces IMPLEMENTATION_COMPLETE.md when done.
         """
-        # Parse work items from planning document
-        plan_path = Path("signals/PLANNING_COMPLETE.md")
+        plan_path = self.workspace.signal("PLANNING_COMPLETE.md")
         if not plan_path.exists():
             raise FileNotFoundError("Planning file not found")
-            
-        work_items = self._parse_work_items(plan_path.read_text())
         
-        # Implement pending work items
-        for item in work_items:
-            if item.status == "pending":
-                self._implement_work_item(item)
+        # Load work items from the store, falling back to the planning document
+        store = get_work_store()
+        work_items = []
+        if store is not None:
+            store.reset_failed()
+            work_items = store.get_items()
+        if not work_items:
+            work_items = self._parse_work_items(plan_path.read_text())
+            if store is not None:
+                store.replace_plan(work_items)
+        
+        # Implement pending work items in dependency order, optionally
+        # several at a time; with a work queue they are leased to workers
+        queue_settings = self.config.get("work_queue") or {}
+        distributed = get_work_queue() is not None
+        max_concurrency = (queue_settings.get("max_in_flight", 32) if distributed
+                           else self.settings.get("max_concurrency", 1))
+        scheduler = WorkItemScheduler(
+            work_items,
+            max_concurrency=max_concurrency,
+            fail_fast=self.settings.get("fail_fast", True)
+        )
+        # Checkpoint every item as soon as it finishes, so a retry of this
+        # phase resumes with the items that are not completed yet
+        checkpoint = store.save_item if store is not None else None
+        if distributed:
+            asyncio.run(scheduler.run(self._implement_remotely, checkpoint))
+        elif max_concurrency > 1:
+            asyncio.run(self._implement_concurrently(scheduler, checkpoint))
+        else:
+            asyncio.run(scheduler.run(self._run_work_item, checkpoint))
                 
         # Verify all items are completed
         if all(item.status == "completed" for item in work_items):
@@ -34,26 +93,167 @@ class DeveloperAgent(BaseAgent):
             raise Exception("Not all work items were completed")
 
     def _parse_work_items(self, plan_content: str) -> List[WorkItem]:
-        """Extract work items from planning document."""
+        """Extract work items and their dependency edges from planning document.
+        
+        Items may carry an ``<!-- id: ...; depends_on: ... -->`` annotation;
+        items without one are numbered by position and have no dependencies.
+        """
         items = []
         for line in plan_content.splitlines():
-            if match := re.match(r"- \[(\w+)\] (.+)", line):
-                status, description = match.groups()
+            if match := re.match(r"- \[(\w+)\] (.+?)(?:\s*<!--(.*)-->)?\s*$", line):
+                status, description, annotation = match.groups()
                 item = WorkItem()
+                item.item_id = f"item-{len(items) + 1:03d}"
                 item.description = description
                 item.status = status
+                for field in (annotation or "").split(";"):
+                    key, _, value = field.partition(":")
+                    if key.strip() == "id" and value.strip():
+                        item.item_id = value.strip()
+                    elif key.strip() == "depends_on":
+                        item.depends_on = [d.strip() for d in value.split(",") if d.strip()]
                 items.append(item)
         return items
 
+    async def _run_work_item(self, item: WorkItem) -> None:
+        """Scheduler worker implementing one item on the calling thread."""
+        self._implement_work_item(item)
+
     def _implement_work_item(self, item: WorkItem) -> None:
         """Implement a work item using AI code generation with security sandboxing."""
-        # Initialize LLM client with developer configuration
-        llm_config = LLMConfig(
-            provider="openrouter",
-            model="deepseek/deepseek-chat-v3-0324:free"
-        )
-        llm_client = LLMClient(llm_config)
+        if self._is_up_to_date(item):
+            return
+        # Client routed by config/models.yaml, reused across calls
+        llm_client = self.get_llm_client()
+        system_message, user_prompt = self._build_implementation_prompt(item)
+        if self._was_rejected(item):
+            llm_client.invalidate(system_message, user_prompt)
         
+        try:
+            if self.settings.get("streaming", False):
+                self._stream_implementation(llm_client, item, system_message, user_prompt)
+            else:
+                # Get AI-generated implementation
+                response = llm_client.prompt(
+                    system_message=system_message,
+                    user_prompt=user_prompt,
+                    validate=self._is_valid_implementation
+                )
+                self._apply_implementation(item, response)
+            
+        except Exception as e:
+            self._fail_work_item(llm_client, item, system_message, user_prompt, e)
+
+    async def _aimplement_work_item(self, item: WorkItem) -> None:
+        """Asynchronous variant of :meth:`_implement_work_item`."""
+        if self._is_up_to_date(item):
+            return
+        llm_client = self.get_llm_client()
+        system_message, user_prompt = self._build_implementation_prompt(item)
+        if self._was_rejected(item):
+            llm_client.invalidate(system_message, user_prompt)
+        
+        try:
+            if self.settings.get("streaming", False):
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(
+                    None, bind_context(self._stream_implementation),
+                    llm_client, item, system_message, user_prompt
+                )
+            else:
+                response = await llm_client.aprompt(
+                    system_message=system_message,
+                    user_prompt=user_prompt,
+                    validate=self._is_valid_implementation
+                )
+                self._apply_implementation(item, response)
+            
+        except Exception as e:
+            self._fail_work_item(llm_client, item, system_message, user_prompt, e)
+
+    def _was_rejected(self, item: WorkItem) -> bool:
+        """Whether the auditor rejected the item's last build.
+        
+        Its cached response produced the rejected code, so it is dropped
+        before the item is implemented again.
+        """
+        store = get_work_store()
+        return store is not None and store.is_rejected(item.description)
+
+    def _fail_work_item(self, llm_client: Optional[RoutedClient], item: WorkItem,
+                        system_message: str, user_prompt: str, error: Exception) -> None:
+        """Mark a work item failed, log the error and raise it as a RuntimeError."""
+        # Unparseable responses must not be replayed from the cache on retry
+        if llm_client is not None and isinstance(error, ValueError):
+            llm_client.invalidate(system_message, user_prompt)
+        item.status = "failed"
+        item.retry_count += 1
+        item.error_log = str(error)
+        self.error_handler.log_error(f"Implementation failed for {item.description}: {str(error)}")
+        raise RuntimeError(f"Failed to implement work item: {item.description}") from error
+
+    async def _implement_concurrently(self, scheduler: WorkItemScheduler,
+                                      checkpoint: Optional[Callable[[WorkItem], None]] = None) -> None:
+        """Implement work items with at most ``max_concurrency`` in flight.
+        
+        The scheduler starts each item once its dependencies are complete,
+        longest critical path first. Once an item fails no further items
+        are started unless ``fail_fast`` is disabled, in which case only
+        the items depending on it are skipped; items already in flight are
+        allowed to finish so their files and status stay consistent, then
+        the first failure is raised.
+        
+        Args:
+            scheduler: Scheduler holding the plan's work items
+            checkpoint: Called with each item as soon as it has finished
+        """
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=scheduler.max_concurrency))
+        await scheduler.run(self._aimplement_work_item, checkpoint)
+
+    async def _implement_remotely(self, item: WorkItem) -> None:
+        """Enqueue a work item for a queue worker and apply its response.
+        
+        The prompt is built here so workers need only the queue; the
+        response is validated by the worker and written here. A job that
+        has no result within ``work_queue.result_timeout`` seconds, e.g.
+        because no worker is running, fails the item.
+        
+        Raises:
+            RuntimeError: If the job failed on every delivery, timed out or
+                returned a response that cannot be applied
+        """
+        if self._is_up_to_date(item):
+            return
+        queue = get_work_queue()
+        settings = self.config.get("work_queue") or {}
+        poll_interval = settings.get("poll_interval", 0.5)
+        deadline = time.monotonic() + settings.get("result_timeout", 900)
+        system_message, user_prompt = self._build_implementation_prompt(item)
+        job_id = f"{item.item_id}-{uuid.uuid4().hex[:8]}"
+        queue.enqueue(job_id, {
+            "item_id": item.item_id,
+            "system_message": system_message,
+            "user_prompt": user_prompt,
+            "refresh": self._was_rejected(item)
+        })
+        
+        try:
+            while (outcome := queue.result(job_id)) is None:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"No worker reported a result for job {job_id}")
+                await asyncio.sleep(poll_interval)
+            if outcome["status"] != "done":
+                raise RuntimeError(outcome["error"])
+            logger.info("Work item implemented by worker", item=item.item_id,
+                        worker=outcome["result"]["worker_id"])
+            self._apply_implementation(item, outcome["result"]["response"])
+        except Exception as e:
+            # Workers keep their own response cache; there is nothing to invalidate here
+            self._fail_work_item(None, item, system_message, user_prompt, e)
+
+    def _build_implementation_prompt(self, item: WorkItem) -> Tuple[str, str]:
+        """Build the system message and user prompt for a work item."""
         # Get relevant context files
         context_files = self._get_relevant_context(item.description)
         context_content = "\n".join(
@@ -61,13 +261,14 @@ class DeveloperAgent(BaseAgent):
             for path, content in context_files.items()
         )
         
-        # Prepare system message with rules and guidelines
+        # Prepare system message with rules and guidelines; it is identical
+        # for every work item so only the user prompt varies between calls
         system_message = f"""
-        You are an AI developer agent. Your task is to implement the following work item:
-        {item.description}
+        You are an AI developer agent. Your task is to implement the work item
+        given in the user message.
         
         Follow these rules:
-        {self.rules}
+        {self.agent_rules}
         
         Important Security Constraints:
         1. All file writes must be within the './generated_project/' directory
@@ -84,51 +285,121 @@ class DeveloperAgent(BaseAgent):
             ]
         }}
         """
+        user_prompt = f"Work item:\n{item.description}\n\nContext files:\n{context_content}"
+        return system_message, user_prompt
+
+    def _is_valid_implementation(self, response: str) -> bool:
+        """Check that a response is the JSON files payload the prompt asks for."""
+        implementation = json.loads(response)
+        return isinstance(implementation, dict) and isinstance(implementation.get("files"), list)
+
+    def _apply_implementation(self, item: WorkItem, response: str) -> None:
+        """Parse an LLM implementation response and write its files."""
+        # Parse and implement the changes with security checks
+        implementation = json.loads(response)
+        outputs = [self._write_file(file_change) for file_change in implementation["files"]]
         
-        try:
-            # Get AI-generated implementation
-            response = llm_client.prompt(
-                system_message=system_message,
-                user_prompt=f"Context files:\n{context_content}"
+        item.status = "completed"
+        self._record_build(item, outputs)
+
+    def _stream_implementation(self, llm_client: RoutedClient, item: WorkItem,
+                               system_message: str, user_prompt: str) -> None:
+        """Stream an implementation and write each file as soon as it is complete.
+        
+        Raises:
+            ValueError: If the stream ends before the files array is closed
+        """
+        parser = FileStreamParser()
+        outputs = []
+        for delta in llm_client.stream(system_message, user_prompt):
+            for file_change in parser.feed(delta):
+                outputs.append(self._write_file(file_change))
+            if parser.complete:
+                break
+        
+        if not parser.complete:
+            raise ValueError(
+                f"Streamed response ended after {parser.files_emitted} files "
+                "without closing the files array"
             )
-            
-            # Parse and implement the changes with security checks
-            implementation = json.loads(response)
-            for file_change in implementation["files"]:
-                path = Path(file_change["path"])
-                
-                # Security validation
-                if not self._is_safe_path(path):
-                    raise SecurityError(f"Attempted to write to restricted path: {path}")
-                
-                # Ensure path is within sandbox
-                safe_path = Path("./generated_project") / path
+        item.status = "completed"
+        self._record_build(item, outputs)
+
+    def _fingerprint(self, item: WorkItem) -> str:
+        """Hash everything an item's implementation depends on.
+        
+        Covers the description, this agent's rules, the content of the
+        context files sent with the prompt and the configured model routes.
+        """
+        context_hashes = {
+            path: hashlib.sha256(content.encode("utf-8")).hexdigest()
+            for path, content in sorted(self._get_relevant_context(item.description).items())
+        }
+        routes = {key: self.settings.get(key) for key in ("provider", "model", "cascade")}
+        return hashlib.sha256(json.dumps(
+            [item.description, self.agent_rules, context_hashes, routes], sort_keys=True
+        ).encode("utf-8")).hexdigest()
+
+    def _is_up_to_date(self, item: WorkItem) -> bool:
+        """Mark an item completed if its last build is still current, make-style.
+        
+        A build is current when the item's fingerprint is unchanged and every
+        file it produced still has the recorded content.
+        """
+        store = get_work_store()
+        if store is None:
+            return False
+        fingerprint = self._fingerprints[item.item_id] = self._fingerprint(item)
+        build = store.get_build(item.description)
+        if build is None or build["fingerprint"] != fingerprint:
+            return False
+        if any(_file_hash(Path(path)) != digest for path, digest in build["outputs"].items()):
+            return False
+        
+        item.status = "completed"
+        logger.info("Work item is up to date, skipping", item=item.item_id)
+        return True
+
+    def _record_build(self, item: WorkItem, outputs: List[Path]) -> None:
+        """Record an item's fingerprint and the hashes of the files it wrote."""
+        store = get_work_store()
+        if store is None:
+            return
+        fingerprint = self._fingerprints.get(item.item_id) or self._fingerprint(item)
+        store.record_build(
+            item.description, fingerprint, {str(path): _file_hash(path) for path in outputs}
+        )
+
+    def _write_file(self, file_change: Dict[str, str]) -> Path:
+        """Write one generated file inside the sandbox directory and return its path."""
+        path = Path(file_change["path"])
+        
+        # Security validation
+        if not self._is_safe_path(path):
+            raise SecurityError(f"Attempted to write to restricted path: {path}")
+        
+        safe_path = self.workspace.output_dir / path
+        with get_tracer().span("file_write", "io", path=str(path),
+                               bytes=len(file_change["content"].encode("utf-8"))):
+            with self._write_lock:
                 safe_path.parent.mkdir(parents=True, exist_ok=True)
-                
                 with open(safe_path, "w") as f:
                     f.write(file_change["content"])
-            
-            item.status = "completed"
-            
-        except Exception as e:
-            self.error_handler.log_error(f"Implementation failed for {item.description}: {str(e)}")
-            raise RuntimeError(f"Failed to implement work item: {item.description}") from e
+        return safe_path
 
     def _is_safe_path(self, path: Path) -> bool:
-        """Validate that the path is within the allowed sandbox."""
-        # Convert to absolute path for validation
-        try:
-            abs_path = path.resolve()
-        except RuntimeError:
+        """Validate that the path stays inside the generated project directory."""
+        # Reject absolute, home-relative and parent-traversing paths outright
+        if path.is_absolute() or str(path).startswith("~") or ".." in path.parts:
             return False
-            
-        # Check for parent directory traversal
-        if ".." in str(path):
+        
+        # Resolve symlinks so a link inside the project cannot point outside it
+        root = self.workspace.output_dir.resolve()
+        try:
+            abs_path = (root / path).resolve()
+        except (OSError, RuntimeError):
             return False
-            
-        # Check against system directories
-        forbidden_prefixes = ["/", "~", "/etc", "/bin", "/usr", "/var", "/tmp"]
-        if any(str(abs_path).startswith(prefix) for prefix in forbidden_prefixes):
+        if abs_path != root and root not in abs_path.parents:
             return False
             
         # Check file extension if needed
@@ -143,14 +414,14 @@ class DeveloperAgent(BaseAgent):
         if "file" in item.description.lower():
             path = self._extract_path_from_description(item.description)
             if path:
-                Path(path).parent.mkdir(parents=True, exist_ok=True)
-                Path(path).touch()
+                self.workspace.path(path).parent.mkdir(parents=True, exist_ok=True)
+                self.workspace.path(path).touch()
                 return
                 
         # Default create behavior
         if "directory" in item.description.lower():
             dir_name = item.description.split()[-1]
-            Path(dir_name).mkdir(exist_ok=True)
+            self.workspace.path(dir_name).mkdir(exist_ok=True)
 
     def _handle_implementation(self, item: WorkItem) -> None:
         """Handle implementation of features."""
@@ -163,8 +434,8 @@ class DeveloperAgent(BaseAgent):
     def _handle_update_operation(self, item: WorkItem) -> None:
         """Handle updates to existing files."""
         path = self._extract_path_from_description(item.description)
-        if path and Path(path).exists():
-            with open(path, "a") as f:
+        if path and self.workspace.path(path).exists():
+            with open(self.workspace.path(path), "a") as f:
                 f.write(f"\n# Added by work item: {item.description}\n")
 
     def _get_relevant_context(self, description: str) -> dict:
@@ -173,29 +444,29 @@ class DeveloperAgent(BaseAgent):
         
         # Always include the main project files
         for path in ["src/main.py", "src/core/models.py"]:
-            if Path(path).exists():
-                with open(path) as f:
+            if self.workspace.path(path).exists():
+                with open(self.workspace.path(path)) as f:
                     context_files[path] = f.read()
         
         # Include specific files based on description
         if "model" in description.lower():
             model_path = "src/core/models.py"
-            if Path(model_path).exists():
-                with open(model_path) as f:
+            if self.workspace.path(model_path).exists():
+                with open(self.workspace.path(model_path)) as f:
                     context_files[model_path] = f.read()
                     
         if "api" in description.lower():
             api_path = "src/core/api.py"
-            if Path(api_path).exists():
-                with open(api_path) as f:
+            if self.workspace.path(api_path).exists():
+                with open(self.workspace.path(api_path)) as f:
                     context_files[api_path] = f.read()
                     
         return context_files
 
     def _implement_config_system(self) -> None:
         """Implement configuration system components."""
-        config_path = "config/system_config.yaml"
-        Path(config_path).parent.mkdir(exist_ok=True)
+        config_path = self.workspace.path("config/system_config.yaml")
+        config_path.parent.mkdir(exist_ok=True)
         
         with open(config_path, "w") as f:
             f.write("# System Configuration\n\n")
@@ -207,8 +478,8 @@ class DeveloperAgent(BaseAgent):
 
     def _implement_output_system(self) -> None:
         """Implement output generation components."""
-        output_path = "src/core/output_generator.py"
-        Path(output_path).parent.mkdir(exist_ok=True)
+        output_path = self.workspace.path("src/core/output_generator.py")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
         
         with open(output_path, "w") as f:
             f.write("from pathlib import Path\n")
@@ -223,14 +494,12 @@ class DeveloperAgent(BaseAgent):
             f.write("    return zip_path\n")
 
     def _create_implementation_complete_signal(self, work_items: List[WorkItem]) -> None:
-        """Generate the implementation complete signal file."""
-        signal_path = Path("signals/IMPLEMENTATION_COMPLETE.md")
-        signal_path.parent.mkdir(exist_ok=True)
-        
-        with open(signal_path, "w") as f:
-            f.write("# Implementation Complete\n\n")
-            f.write("All work items have been successfully implemented:\n\n")
-            for item in work_items:
-                f.write(f"- [x] {item.description}\n")
-            f.write(f"\nConfiguration: {self.config}\n")
-            f.write(f"Rules: {self.rules}\n")
\ No newline at end of file
+        """Publish the implementation complete signal file."""
+        lines = [
+            "# Implementation Complete\n\n",
+            "All work items have been successfully implemented:\n\n"
+        ]
+        lines.extend(f"- [x] {item.description}\n" for item in work_items)
+        lines.append(f"\nConfiguration: {self.config}\n")
+        lines.append(f"Rules: {self.rules}\n")
+        get_signal_bus().publish(self.workspace.signal("IMPLEMENTATION_COMPLETE.md"), "".join(lines))
\ No newline at end of file
@@ -1,13 +1,17 @@
-from pathlib import Path
 from typing import List
 import json
+from ..error_handler import ValidationError
 from ..models import Project, WorkItem
+from ..scheduler import WorkItemScheduler
+from ..signal_bus import get_signal_bus
+from ..work_store import get_work_store, render_work_items
 from .base_agent import BaseAgent
-from ..llm_client import LLMClient, LLMConfig
 
 class PlannerAgent(BaseAgent):
     """Concrete agent implementation for planning tasks."""
     
+    slug = "planner"
+    
     def execute(self) -> None:
         """Execute the planner's workflow.
         
@@ -15,7 +19,7 @@ class PlannerAgent(BaseAgent):
         with detailed task breakdown.
         """
         # Read specification
-        spec_path = Path("signals/SPECIFICATION_COMPLETE.md")
+        spec_path = self.workspace.signal("SPECIFICATION_COMPLETE.md")
         if not spec_path.exists():
             raise FileNotFoundError("Specification file not found")
             
@@ -29,63 +33,96 @@ class PlannerAgent(BaseAgent):
         # Generate work items from specification
         work_items = self._parse_spec_to_work_items(spec_content)
         
-        # Write planning complete signal
-        plan_path = Path("signals/PLANNING_COMPLETE.md")
-        plan_path.parent.mkdir(exist_ok=True)
-        
-        with open(plan_path, "w") as f:
-            f.write("# Planning Complete\n\n")
-            f.write(f"Project: {project.name}\n")
-            f.write(f"Status: {project.status}\n\n")
-            f.write("## Work Items:\n")
-            for item in work_items:
-                f.write(f"- [{item.status}] {item.description}\n")
-            f.write(f"\nConfiguration: {self.config}\n")
-            f.write(f"Rules: {self.rules}\n")
+        # Store the plan and publish the planning complete signal as a view of it
+        store = get_work_store()
+        if store is not None:
+            store.replace_plan(work_items)
+        lines = [
+            "# Planning Complete\n\n",
+            f"Project: {project.name}\n",
+            f"Status: {project.status}\n\n",
+            "## Work Items:\n"
+        ]
+        lines.append(render_work_items(work_items))
+        lines.append(f"\nConfiguration: {self.config}\n")
+        lines.append(f"Rules: {self.rules}\n")
+        get_signal_bus().publish(self.workspace.signal("PLANNING_COMPLETE.md"), "".join(lines))
     
     def _parse_spec_to_work_items(self, spec_content: str) -> List[WorkItem]:
         """Convert specification content into actionable work items using LLM."""
-        # Initialize LLM client with planner configuration
-        llm_config = LLMConfig(
-            provider="openrouter",
-            model="deepseek/deepseek-r1-0528:free"
-        )
-        llm_client = LLMClient(llm_config)
+        # Client routed by config/models.yaml, reused across calls
+        llm_client = self.get_llm_client()
         
         # Prepare system message with rules and guidelines
         system_message = f"""
         You are an AI planning agent. Your task is to analyze a project specification
         and generate a structured work breakdown. Follow these rules:
         
-        {self.rules}
+        {self.agent_rules}
         
         Output format must be JSON with this structure:
         {{
             "work_items": [
                 {{
+                    "id": "item-001",
                     "description": "task description",
-                    "status": "pending"
+                    "status": "pending",
+                    "depends_on": ["ids of items that must be implemented first"]
                 }}
             ]
         }}
+        
+        Every id must be unique and depends_on may only name ids of this
+        plan. Only list real dependencies so that independent items can be
+        implemented in parallel.
         """
         
-        # Generate work items using LLM
+        # Generate work items using LLM; plans with repeated ids, unknown
+        # dependencies or cycles are rejected like unparseable ones
+        user_prompt = f"Specification content:\n{spec_content}"
         try:
             response = llm_client.prompt(
                 system_message=system_message,
-                user_prompt=f"Specification content:\n{spec_content}"
+                user_prompt=user_prompt,
+                validate=lambda text: self._parse_plan(text) is not None
             )
             
-            # Parse LLM response
-            plan = json.loads(response)
-            return [
-                WorkItem(
-                    description=item["description"],
-                    status=item.get("status", "pending")
-                ) for item in plan["work_items"]
-            ]
+            # Parse LLM response; the last route's response is returned even
+            # if it failed validation
+            return self._parse_plan(response)
             
         except Exception as e:
+            if isinstance(e, (ValueError, ValidationError)):
+                # Never replay the rejected plan from the cache on retry
+                llm_client.invalidate(system_message, user_prompt)
             self.error_handler.log_error(f"Planning failed: {str(e)}")
-            raise RuntimeError("AI planning failed") from e
\ No newline at end of file
+            raise RuntimeError("AI planning failed") from e
+
+    def _parse_plan(self, response: str) -> List[WorkItem]:
+        """Build work items from the LLM's JSON plan.
+        
+        Raises:
+            ValueError: If the response is not a JSON plan
+            ValidationError: If item ids repeat, an item depends on an
+                unknown item or the dependencies form a cycle
+        """
+        plan = json.loads(response)
+        if not isinstance(plan.get("work_items"), list):
+            raise ValueError("Plan has no work_items list")
+        items = [
+            WorkItem.from_dict({
+                "item_id": item.get("id") or f"item-{index:03d}",
+                "description": item["description"],
+                "status": item.get("status", "pending"),
+                "depends_on": list(item.get("depends_on") or [])
+            }) for index, item in enumerate(plan["work_items"], 1)
+        ]
+        
+        seen = set()
+        duplicates = sorted({item.item_id for item in items
+                             if item.item_id in seen or seen.add(item.item_id)})
+        if duplicates:
+            raise ValidationError(f"Duplicate work item ids: {', '.join(duplicates)}", field="id")
+        # Raises for unknown dependencies and cycles, as the developer would
+        WorkItemScheduler(items)
+        return items
@@ -0,0 +1,164 @@
+import gzip
+import os
+import tarfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .error_handler import ConfigurationError
+from .zip_writer import ZipAssembler, compress_file, make_reproducible, reproducible_epoch
+
+Member = Tuple[Path, str]
+
+def ordered_map(function: Callable[..., Any], items: Iterable[Tuple[Any, ...]],
+                max_workers: int) -> Iterator[Any]:
+    """Apply ``function`` to argument tuples in a thread pool, yielding results in order.
+
+    At most twice ``max_workers`` results are held waiting to be consumed.
+    """
+    if max_workers <= 1:
+        for args in items:
+            yield function(*args)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="archive") as pool:
+        window = []
+        for args in items:
+            window.append(pool.submit(function, *args))
+            if len(window) >= 2 * max_workers:
+                yield window.pop(0).result()
+        for future in window:
+            yield future.result()
+
+class ArchiveBackend(ABC):
+    """Writes the generated project as one archive format.
+
+    Backends write sequentially to any binary stream, including pipes
+    such as stdout, without staging the archive on disk or in memory.
+    """
+
+    name = ""
+    extension = ""
+
+    def __init__(self, compression_level: int = 6, max_workers: Optional[int] = None,
+                 reproducible: bool = False):
+        """Initialize the backend.
+
+        Args:
+            compression_level: Backend-specific level, higher is smaller
+            max_workers: Compression threads where the format allows it
+            reproducible: Fixed timestamps, owners and permissions, so the
+                same files always give the same bytes
+        """
+        self.compression_level = compression_level
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.reproducible = reproducible
+
+    @classmethod
+    def available(cls) -> bool:
+        """Whether the backend's optional dependencies are installed."""
+        return True
+
+    @abstractmethod
+    def write(self, members: List[Member], stream: BinaryIO) -> None:
+        """Write ``members`` (file path, archive name) to ``stream`` in order."""
+
+class ZipBackend(ArchiveBackend):
+    """ZIP archive whose members are deflated in parallel."""
+
+    name = "zip"
+    extension = ".zip"
+
+    def write(self, members: List[Member], stream: BinaryIO) -> None:
+        archive = ZipAssembler(stream)
+        entries = ordered_map(
+            compress_file,
+            ((path, arcname, self.compression_level) for path, arcname in members),
+            self.max_workers
+        )
+        for entry in entries:
+            archive.add(make_reproducible(entry) if self.reproducible else entry)
+        archive.close()
+
+class TarBackend(ArchiveBackend):
+    """Streaming tar archive; subclasses supply the compression layer."""
+
+    def write(self, members: List[Member], stream: BinaryIO) -> None:
+        compressed = self._open_compressor(stream)
+        try:
+            with tarfile.open(fileobj=compressed, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for path, arcname in members:
+                    info = tar.gettarinfo(str(path), arcname)
+                    if self.reproducible:
+                        self._normalize(info)
+                    with open(path, "rb") as f:
+                        tar.addfile(info, f)
+        finally:
+            compressed.close()
+        stream.flush()
+
+    def _normalize(self, info: tarfile.TarInfo) -> None:
+        info.mtime = reproducible_epoch()
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        info.mode = 0o755 if info.mode & 0o111 else 0o644
+
+    @abstractmethod
+    def _open_compressor(self, stream: BinaryIO) -> BinaryIO:
+        """Wrap ``stream`` in a writable compressing stream that leaves it open."""
+
+class TarGzBackend(TarBackend):
+    """gzip-compressed tar archive."""
+
+    name = "tar.gz"
+    extension = ".tar.gz"
+
+    def _open_compressor(self, stream: BinaryIO) -> BinaryIO:
+        # A zero header mtime keeps reproducible archives byte-identical
+        return gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=self.compression_level,
+                             mtime=0 if self.reproducible else None, filename="")
+
+class TarZstBackend(TarBackend):
+    """Zstandard-compressed tar archive; requires the ``zstandard`` package."""
+
+    name = "tar.zst"
+    extension = ".tar.zst"
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _open_compressor(self, stream: BinaryIO) -> BinaryIO:
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=self.compression_level,
+                                              threads=self.max_workers)
+        return compressor.stream_writer(stream, closefd=False)
+
+ARCHIVE_BACKENDS: Dict[str, type] = {
+    backend.name: backend for backend in (ZipBackend, TarGzBackend, TarZstBackend)
+}
+
+def get_archive_backend(name: str, compression_level: int = 6,
+                        max_workers: Optional[int] = None,
+                        reproducible: bool = False) -> ArchiveBackend:
+    """Create the archive backend registered under ``name``.
+
+    Raises:
+        ConfigurationError: If the format is unknown or its optional
+            dependency is not installed
+    """
+    backend = ARCHIVE_BACKENDS.get(name)
+    if backend is None:
+        raise ConfigurationError(
+            f"Unknown archive format: {name} (choose from {', '.join(ARCHIVE_BACKENDS)})",
+            "packaging.format"
+        )
+    if not backend.available():
+        raise ConfigurationError(
+            f"Archive format {name} needs an optional dependency that is not installed",
+            "packaging.format"
+        )
+    return backend(compression_level, max_workers, reproducible)
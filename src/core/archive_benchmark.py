@@ -0,0 +1,111 @@
+import argparse
+import io
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .archive_backends import ARCHIVE_BACKENDS, get_archive_backend
+from .output_generator import _archive_members
+
+# Levels compared for each backend: fast, default and small
+LEVELS: Dict[str, Tuple[int, ...]] = {
+    "zip": (1, 6, 9),
+    "tar.gz": (1, 6, 9),
+    "tar.zst": (1, 3, 19)
+}
+
+_WORDS = ("def", "return", "self", "value", "items", "config", "path", "if", "for",
+          "in", "None", "result", "logger", "import", "class", "data", "=", "(", ")")
+
+def generate_tree(root: Path, files: int = 400, seed: int = 0) -> None:
+    """Write a sample generated project: source, JSON and a few binary assets.
+
+    Args:
+        root: Directory to create the tree in
+        files: Number of files
+        seed: Seed of the content, for comparable runs
+    """
+    rng = random.Random(seed)
+    for i in range(files):
+        directory = root / f"pkg{i % 8}" / f"module{i % 5}"
+        directory.mkdir(parents=True, exist_ok=True)
+        kind = i % 10
+        if kind == 9:
+            # Incompressible asset, e.g. an image
+            (directory / f"asset{i}.png").write_bytes(rng.randbytes(rng.randint(4096, 65536)))
+        elif kind == 8:
+            records = [{"id": n, "name": f"item{n}", "score": rng.random()}
+                       for n in range(rng.randint(50, 500))]
+            (directory / f"data{i}.json").write_text(json.dumps(records, indent=2))
+        else:
+            lines = (" ".join(rng.choices(_WORDS, k=rng.randint(3, 12)))
+                     for _ in range(rng.randint(50, 600)))
+            (directory / f"file{i}.py").write_text("\n".join(lines) + "\n")
+
+def run_benchmark(source_dir: Path, max_workers: Optional[int] = None,
+                  repeat: int = 3) -> List[Dict[str, object]]:
+    """Time every available backend and level on a directory.
+
+    Archives are written to memory so disk speed does not skew the
+    results. The best of ``repeat`` runs is reported.
+
+    Returns:
+        One row per backend and level with its size, ratio and time
+    """
+    members = _archive_members(source_dir)
+    source_bytes = sum(path.stat().st_size for path, _ in members)
+    rows = []
+    for name, backend_class in ARCHIVE_BACKENDS.items():
+        if not backend_class.available():
+            continue
+        for level in LEVELS[name]:
+            backend = get_archive_backend(name, level, max_workers)
+            best = float("inf")
+            for _ in range(repeat):
+                stream = io.BytesIO()
+                start = time.perf_counter()
+                backend.write(members, stream)
+                best = min(best, time.perf_counter() - start)
+            size = len(stream.getvalue())
+            rows.append({
+                "format": name,
+                "level": level,
+                "bytes": size,
+                "ratio": size / source_bytes if source_bytes else 0.0,
+                "seconds": best,
+                "mb_per_second": source_bytes / best / 1e6 if best else 0.0
+            })
+    return rows
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    """Render benchmark rows as a fixed-width table."""
+    lines = [f"{'format':<8} {'level':>5} {'bytes':>12} {'ratio':>7} {'seconds':>9} {'MB/s':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['format']:<8} {row['level']:>5} {row['bytes']:>12} "
+            f"{row['ratio']:>7.3f} {row['seconds']:>9.3f} {row['mb_per_second']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+def main() -> None:
+    """Compare archive size against time for each backend from the command line."""
+    parser = argparse.ArgumentParser(description="Compare archive backends on a project tree")
+    parser.add_argument("--source", help="Directory to package (default: a generated sample tree)")
+    parser.add_argument("--files", type=int, default=400, help="Files in the generated tree")
+    parser.add_argument("--workers", type=int, help="Compression threads")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend, best is kept")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = Path(args.source) if args.source else Path(temp_dir)
+        if not args.source:
+            generate_tree(source, args.files)
+        print(format_table(run_benchmark(source, args.workers, args.repeat)))
+    missing = [name for name, backend in ARCHIVE_BACKENDS.items() if not backend.available()]
+    if missing:
+        print(f"Skipped (optional dependency not installed): {', '.join(missing)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .error_handler import CassetteError
+
+CASSETTE_MODES = ("record", "replay")
+LATENCY_MODES = (None, "recorded", "sampled")
+
+def request_key(path: str, payload: Dict[str, Any]) -> str:
+    """Return the key identifying a request in a cassette.
+
+    Only the API path and JSON payload are hashed; headers, and with them
+    credentials, are never recorded.
+    """
+    body = json.dumps({"path": path.lstrip("/"), "payload": payload}, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+class CassetteTransport:
+    """Transport that records LLM exchanges to a cassette file or replays them.
+
+    A cassette is a JSON-lines file with one recorded exchange per line.
+    In record mode requests go through the wrapped live transport and every
+    response is appended along with its timing. In replay mode responses
+    come from the cassette, optionally delayed to simulate the recorded
+    latency, so full pipeline runs are deterministic and need no network.
+    Identical requests are replayed in recording order.
+    """
+
+    def __init__(self, path: str, mode: str = "replay",
+                 inner: Optional[Any] = None,
+                 simulate_latency: Optional[str] = None,
+                 latency_scale: float = 1.0):
+        """Open a cassette.
+
+        Args:
+            path: Location of the cassette file
+            mode: 'record' to capture live exchanges, 'replay' to serve them
+            inner: Live HTTPTransport used when recording
+            simulate_latency: None to replay instantly, 'recorded' to wait
+                as long as each exchange originally took, or 'sampled' to
+                draw waits from all recorded timings of the same model
+            latency_scale: Multiplier applied to simulated waits
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        if simulate_latency not in LATENCY_MODES:
+            raise ValueError(f"Unsupported latency simulation: {simulate_latency}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.inner = inner
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+        self.requires_api_key = mode == "record"
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        self._replayed: Dict[str, int] = defaultdict(int)
+
+        if mode == "record":
+            if inner is None:
+                raise ValueError("Recording requires a live transport")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            self._load()
+
+    def _load(self) -> None:
+        """Index the cassette's recorded exchanges by request key."""
+        if not self.path.exists():
+            raise CassetteError("Cassette file not found", cassette_path=str(self.path))
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries[entry["key"]].append(entry)
+                self._latencies[entry["model"]].append(entry["latency"])
+
+    def _record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _next_entry(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the next recorded exchange for a request."""
+        key = request_key(path, payload)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteError(
+                    f"No recorded response for {payload.get('model')} request {key[:12]}",
+                    cassette_path=str(self.path)
+                )
+            # Serve repeats in recording order, then keep serving the last one
+            index = min(self._replayed[key], len(entries) - 1)
+            self._replayed[key] += 1
+            return entries[index]
+
+    def _delay_for(self, entry: Dict[str, Any]) -> float:
+        if self.simulate_latency == "recorded":
+            return entry["latency"] * self.latency_scale
+        if self.simulate_latency == "sampled":
+            return random.choice(self._latencies[entry["model"]]) * self.latency_scale
+        return 0.0
+
+    def url(self, path: str) -> str:
+        """Build an absolute provider URL for an API path."""
+        return self.inner.url(path) if self.inner else f"cassette://{path.lstrip('/')}"
+
+    def preconnect(self, timeout: float = 5.0) -> bool:
+        """Pre-connect the live transport when recording."""
+        return self.inner.preconnect(timeout) if self.mode == "record" else True
+
+    def post_json(self, path: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: float = 30) -> Dict[str, Any]:
+        """Record or replay a JSON request.
+
+        Raises:
+            CassetteError: If replaying a request that was never recorded
+        """
+        if self.mode == "replay":
+            entry = self._next_entry(path, payload)
+            delay = self._delay_for(entry)
+            if delay:
+                time.sleep(delay)
+            return entry["response"]
+
+        start = time.perf_counter()
+        response = self.inner.post_json(path, payload, headers=headers, timeout=timeout)
+        self._record({
+            "key": request_key(path, payload),
+            "model": payload.get("model", ""),
+            "path": path,
+            "request": payload,
+            "response": response,
+            "latency": time.perf_counter() - start
+        })
+        return response
+
+    def post_stream(self, path: str, payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: float = 30) -> Iterator[str]:
+        """Record or replay a streamed request line by line.
+
+        When simulating latency, the first line is delayed by the recorded
+        time to first byte and the remaining lines are spread over the rest
+        of the recorded duration.
+        """
+        if self.mode == "replay":
+            entry = self._next_entry(path, payload)
+            lines = entry["lines"]
+            scale = self._delay_for(entry) / entry["latency"] if entry["latency"] else 0.0
+            if scale:
+                time.sleep(entry["first_line_latency"] * scale)
+            gap = (entry["latency"] - entry["first_line_latency"]) * scale / max(len(lines) - 1, 1)
+            for index, line in enumerate(lines):
+                if index and gap:
+                    time.sleep(gap)
+                yield line
+            return
+
+        start = time.perf_counter()
+        first_line_latency = None
+        lines = []
+        finished = False
+        try:
+            for line in self.inner.post_stream(path, payload, headers=headers, timeout=timeout):
+                if first_line_latency is None:
+                    first_line_latency = time.perf_counter() - start
+                lines.append(line)
+                yield line
+            finished = True
+        finally:
+            # Consumers usually stop reading at the [DONE] event
+            if finished or (lines and lines[-1].strip() == "data: [DONE]"):
+                self._record({
+                    "key": request_key(path, payload),
+                    "model": payload.get("model", ""),
+                    "path": path,
+                    "request": payload,
+                    "lines": lines,
+                    "first_line_latency": first_line_latency or 0.0,
+                    "latency": time.perf_counter() - start
+                })
+
+    def close(self) -> None:
+        """Close the live transport, if any."""
+        if self.inner is not None:
+            self.inner.close()
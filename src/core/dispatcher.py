@@ -1,44 +1,136 @@
-from pathlib import Path
-from typing import Optional
+import time
+from typing import Any, Dict, List, Optional
+from .logger import logger
+from .metrics import get_metrics
+from .signal_bus import Signal, SignalBus, get_signal_bus
+
+# NFR 1.1: agent handoff latency must be at most 500ms between phases
+HANDOFF_TARGET_SECONDS = 0.5
+
+HANDOFF_SECONDS = get_metrics().histogram(
+    "pyfactory_handoff_latency_seconds", "Time from publishing a signal to its agent claiming it",
+    ("agent",)
+)
 
 class Dispatcher:
-    """Handles agent routing based on signal files and work items."""
-    
+    """Handles agent routing based on signals and work items from the signal bus."""
+
+    # Returned by get_next_agent() once the project passed its audit
+    COMPLETE = "complete"
+
     SIGNAL_PRECEDENCE = [
         "PROJECT_AUDIT_PASSED.md",
+        "PROJECT_AUDIT_FAILED.md",
         "IMPLEMENTATION_COMPLETE.md",
         "PLANNING_COMPLETE.md"
     ]
-    
+
     AGENT_MAPPING = {
-        "PROJECT_AUDIT_PASSED.md": "planner",
-        "IMPLEMENTATION_COMPLETE.md": "dispatcher",
+        "PROJECT_AUDIT_PASSED.md": COMPLETE,
+        "PROJECT_AUDIT_FAILED.md": "planner",
+        "IMPLEMENTATION_COMPLETE.md": "auditor",
         "PLANNING_COMPLETE.md": "developer"
     }
-    
+
+    def __init__(self, bus: Optional[SignalBus] = None):
+        """Initialize the dispatcher.
+
+        Args:
+            bus: Signal bus to consume from, defaults to the process-wide bus
+        """
+        self.bus = bus or get_signal_bus()
+        self.handoffs: List[Dict[str, Any]] = []
+        self._claimed: List[Signal] = []
+
     def has_work_items(self) -> bool:
         """Check if there are any work items needing processing.
-        
+
         Returns:
-            True if work_items directory exists and contains files
+            True if unclaimed work items are waiting on the bus
         """
-        work_dir = Path("work_items")
-        return work_dir.exists() and any(work_dir.iterdir())
-    
-    def get_next_agent(self) -> Optional[str]:
+        return bool(self.bus.pending_in(self.bus.work_dir))
+
+    def _has_signal(self) -> bool:
+        return self.has_work_items() or any(
+            self.bus.is_pending(self.bus.signals_dir / signal)
+            for signal in self.SIGNAL_PRECEDENCE
+        )
+
+    def get_next_agent(self, timeout: float = 0.0) -> Optional[str]:
         """Determine which agent should run next based on signals and work items.
-        
+
+        The signals that select the agent are claimed, so each is handed out
+        once; call complete() after the agent has run.
+
+        Args:
+            timeout: Seconds to block waiting for a signal to be published
+
         Returns:
-            The slug of the next agent to run, or None if no signals found
+            The slug of the next agent to run, COMPLETE once the audit
+            passed, or None if no signals found
         """
-        # Prioritize work items from failed audits
+        if not self.bus.wait(self._has_signal, timeout):
+            return None
+
+        # A passed audit ends the pipeline
+        if self._claim(self.bus.signals_dir / "PROJECT_AUDIT_PASSED.md", self.COMPLETE):
+            return self.COMPLETE
+
+        # Prioritize work items from failed audits; the planner gets the
+        # audit report with them
         if self.has_work_items():
-            return "planner"
-            
-        signals_dir = Path("signals")
-        
+            for signal in self.bus.pending_in(self.bus.work_dir):
+                self._claim(signal.path, "planner")
+            if self._claimed:
+                self._claim(self.bus.signals_dir / "PROJECT_AUDIT_FAILED.md", "planner")
+                return "planner"
+
         for signal in self.SIGNAL_PRECEDENCE:
-            if (signals_dir / signal).exists():
-                return self.AGENT_MAPPING[signal]
-                
-        return None
\ No newline at end of file
+            agent = self.AGENT_MAPPING[signal]
+            if self._claim(self.bus.signals_dir / signal, agent):
+                return agent
+
+        return None
+
+    def _claim(self, path, agent: str) -> Optional[Signal]:
+        """Claim one signal and record how long it waited for its consumer."""
+        signal = self.bus.claim(path)
+        if signal is None:
+            return None
+        self._claimed.append(signal)
+
+        if signal.published_at is not None:
+            latency = time.monotonic() - signal.published_at
+            self.handoffs.append({"signal": signal.name, "agent": agent, "seconds": latency})
+            HANDOFF_SECONDS.observe(latency, agent=agent)
+            if latency > HANDOFF_TARGET_SECONDS:
+                logger.warning("Agent handoff exceeded latency target",
+                               signal=signal.name, agent=agent, latency_ms=round(latency * 1000, 1))
+        return signal
+
+    def complete(self, succeeded: bool = True) -> None:
+        """Finish the signals claimed by the last get_next_agent() call.
+
+        Args:
+            succeeded: Delete the signal files if the agent succeeded,
+                otherwise return the signals to the bus
+        """
+        for signal in self._claimed:
+            if succeeded:
+                self.bus.ack(signal)
+            else:
+                self.bus.release(signal)
+        self._claimed = []
+
+    def handoff_summary(self) -> Dict[str, Any]:
+        """Summarize measured handoff latencies against the NFR 1.1 target."""
+        latencies = sorted(h["seconds"] for h in self.handoffs)
+        if not latencies:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+            "max_ms": round(latencies[-1] * 1000, 3),
+            "target_ms": HANDOFF_TARGET_SECONDS * 1000,
+            "over_target": sum(1 for latency in latencies if latency > HANDOFF_TARGET_SECONDS)
+        }
@@ -1,6 +1,9 @@
 from pathlib import Path
 from functools import wraps
-from typing import Callable, TypeVar, Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, TypeVar, Any, Optional
+import random
 import time
 
 T = TypeVar('T')
@@ -16,6 +19,10 @@ class BaseError(Exception):
         error_map = {
             "VALIDATION_ERROR": "Check input data format and required fields",
             "CONFIG_ERROR": "Verify configuration file syntax and paths",
+            "PROMPT_BUDGET_ERROR": "Reduce context size or raise prompt_budget.max_tokens",
+            "RATE_LIMIT_ERROR": "Lower rate_limits for the provider or retry later",
+            "CASSETTE_ERROR": "Re-record the cassette with http.mode set to record",
+            "SECURITY_ERROR": "Keep generated file paths relative to the project directory",
             "UNKNOWN_ERROR": "Review logs and contact support"
         }
         
@@ -45,8 +52,93 @@ class ConfigurationError(BaseError):
         code = f"CONFIG_ERROR.{config_path}" if config_path else "CONFIG_ERROR"
         super().__init__(message, code)
 
-def retry(max_attempts: int = 3, delay: float = 1.0):
-    """Decorator to retry a function on failure."""
+class PromptBudgetError(BaseError):
+    """Raised when a prompt exceeds its configured token ceiling."""
+    def __init__(self, message: str, agent: str = None):
+        code = f"PROMPT_BUDGET_ERROR.{agent}" if agent else "PROMPT_BUDGET_ERROR"
+        super().__init__(message, code)
+
+class RateLimitError(BaseError):
+    """Raised when a provider keeps throttling requests with HTTP 429."""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        super().__init__(message, "RATE_LIMIT_ERROR")
+
+class CassetteError(BaseError):
+    """Raised when a replayed request has no recording in the cassette."""
+    def __init__(self, message: str, cassette_path: str = None):
+        code = f"CASSETTE_ERROR.{cassette_path}" if cassette_path else "CASSETTE_ERROR"
+        super().__init__(message, code)
+
+class SecurityError(BaseError):
+    """Raised when generated output would be written outside the project directory."""
+    def __init__(self, message: str):
+        super().__init__(message, "SECURITY_ERROR")
+
+class ErrorHandler:
+    """Records runtime errors to a dedicated error log."""
+
+    def __init__(self, log_file: str = "logs/errors.log"):
+        self.log_file = Path(log_file)
+
+    def log_error(self, message: str) -> None:
+        """Append a timestamped error message to the error log."""
+        try:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a") as f:
+                f.write(f"{datetime.utcnow().isoformat()} {message}\n")
+        except OSError as e:
+            print(f"Failed to write error log: {str(e)}")
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse an HTTP Retry-After header into seconds.
+    
+    Accepts both delta-seconds and HTTP-date forms.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 60.0,
+                  retry_after: Optional[float] = None) -> float:
+    """Compute the wait before the next attempt.
+    
+    Uses exponential backoff with full jitter. When the server supplied a
+    Retry-After value the wait is at least that long, plus a little jitter
+    so that throttled callers do not all retry at the same instant.
+    
+    Args:
+        attempt: Number of the attempt that just failed, starting at 1
+        base_delay: Delay scale for the first retry
+        max_delay: Upper bound of the exponential component
+        retry_after: Seconds the server asked clients to wait
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, base_delay)
+    return delay
+
+def retry_after_of(error: BaseException) -> Optional[float]:
+    """Return the Retry-After hint carried by an error or any of its causes."""
+    while error is not None:
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            return retry_after
+        error = error.__cause__
+    return None
+
+def retry(max_attempts: int = 3, delay: float = 1.0, max_delay: float = 60.0):
+    """Decorator to retry a function on failure with exponential backoff."""
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
@@ -57,7 +149,9 @@ def retry(max_attempts: int = 3, delay: float = 1.0):
                 except Exception as e:
                     last_error = e
                     if attempt < max_attempts:
-                        time.sleep(delay)
+                        time.sleep(backoff_delay(
+                            attempt, delay, max_delay, retry_after_of(e)
+                        ))
             raise last_error
         return wrapper
     return decorator
@@ -75,9 +169,9 @@ def error_handler(default: Any = None):
         return wrapper
     return decorator
 
-def create_emergency_signal(error_details: str):
+def create_emergency_signal(error_details: str, signals_dir: Path = Path("signals")):
     """Create NEEDS_ASSISTANCE.md signal file with error details"""
-    signal_path = Path("signals/NEEDS_ASSISTANCE.md")
+    signal_path = Path(signals_dir) / "NEEDS_ASSISTANCE.md"
     signal_path.parent.mkdir(exist_ok=True)
     
     content = f"# Assistance Required\n\n## Error Details\n{error_details}"
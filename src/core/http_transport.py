@@ -0,0 +1,180 @@
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from .cassette import CassetteTransport
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Semaphore shared by every process of a multi-project run, capping the
+# number of LLM requests in flight across all of them
+_connection_budget: Optional[Any] = None
+
+def set_connection_budget(semaphore: Optional[Any]) -> None:
+    """Share an in-flight request limit with other processes.
+
+    Args:
+        semaphore: A multiprocessing semaphore, or None for no limit
+    """
+    global _connection_budget
+    _connection_budget = semaphore
+
+def _connection_slot():
+    return _connection_budget if _connection_budget is not None else nullcontext()
+
+class HTTPTransport:
+    """Connection-pooled HTTP transport shared by all LLM clients.
+
+    Wraps a single ``requests.Session`` so that every request reuses
+    warm keep-alive connections instead of opening a new TCP+TLS
+    connection per call.
+    """
+
+    # Live providers need credentials; replayed cassettes do not
+    requires_api_key = True
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, pool_size: int = 10,
+                 gzip: bool = True):
+        """Initialize the pooled session.
+
+        Args:
+            base_url: Root URL of the OpenAI-compatible provider API
+            pool_size: Maximum number of pooled connections per host
+            gzip: Whether to request gzip-compressed responses
+        """
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Connection": "keep-alive",
+            "Accept-Encoding": "gzip, deflate" if gzip else "identity"
+        })
+
+    def url(self, path: str) -> str:
+        """Build an absolute provider URL for an API path."""
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def preconnect(self, timeout: float = 5.0) -> bool:
+        """Open a pooled connection to the provider ahead of the first request.
+
+        Returns:
+            True if the provider could be reached, False otherwise
+        """
+        try:
+            self.session.head(self.base_url, timeout=timeout)
+            return True
+        except requests.RequestException:
+            return False
+
+    def post_json(self, path: str, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None,
+                  timeout: float = 30) -> Dict[str, Any]:
+        """POST a JSON payload and return the decoded JSON response.
+
+        Raises:
+            requests.RequestException: If the request fails or returns an error status
+        """
+        with _connection_slot():
+            response = self.session.post(
+                self.url(path),
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            )
+            response.raise_for_status()
+            return response.json()
+
+    def post_stream(self, path: str, payload: Dict[str, Any],
+                    headers: Optional[Dict[str, str]] = None,
+                    timeout: float = 30) -> Iterator[str]:
+        """POST a JSON payload and yield the response body line by line.
+
+        Used for server-sent event streams; the connection is returned to
+        the pool once the stream is exhausted or the iterator is closed.
+
+        Raises:
+            requests.RequestException: If the request fails or returns an error status
+        """
+        with _connection_slot():
+            response = self.session.post(
+                self.url(path),
+                headers=headers,
+                json=payload,
+                timeout=timeout,
+                stream=True
+            )
+            try:
+                response.raise_for_status()
+                for line in response.iter_lines(decode_unicode=True):
+                    yield line
+            finally:
+                response.close()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+_transport: Optional[Any] = None
+_transport_lock = threading.Lock()
+
+def configure_transport(settings: Optional[Dict[str, Any]] = None) -> Any:
+    """Create the process-wide transport from the ``http`` config section.
+
+    With ``mode`` set to 'record' or 'replay' the live transport is wrapped
+    in a CassetteTransport reading or writing the ``cassette`` file, so
+    pipeline runs can be captured once and replayed offline.
+
+    Args:
+        settings: Optional mapping with base_url, pool_size, gzip, preconnect,
+            mode, cassette, simulate_latency and latency_scale
+
+    Returns:
+        The newly configured shared transport
+    """
+    global _transport
+    settings = settings or {}
+    mode = settings.get("mode", "live")
+
+    transport = None
+    if mode != "replay":
+        transport = HTTPTransport(
+            base_url=settings.get("base_url", DEFAULT_BASE_URL),
+            pool_size=settings.get("pool_size", 10),
+            gzip=settings.get("gzip", True)
+        )
+    if mode != "live":
+        transport = CassetteTransport(
+            settings.get("cassette", "cassettes/pipeline.jsonl"),
+            mode=mode,
+            inner=transport,
+            simulate_latency=settings.get("simulate_latency"),
+            latency_scale=settings.get("latency_scale", 1.0)
+        )
+
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    if previous is not None:
+        previous.close()
+
+    if settings.get("preconnect", False):
+        transport.preconnect()
+    return transport
+
+def get_transport() -> Any:
+    """Return the shared transport, creating a default one on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+        return _transport
@@ -0,0 +1,215 @@
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+def _geometric_bounds(start: float, stop: float, factor: float) -> List[float]:
+    bounds = []
+    bound = start
+    while bound < stop:
+        bounds.append(round(bound, 6))
+        bound *= factor
+    bounds.append(stop)
+    return bounds
+
+# 50ms to 10 minutes in 20% steps keeps percentile error within ~20%
+DEFAULT_BOUNDS = _geometric_bounds(0.05, 600.0, 1.2)
+
+class LatencyHistogram:
+    """Bucketed latency histogram with percentile estimates."""
+
+    def __init__(self, bounds: Optional[List[float]] = None):
+        """Initialize empty buckets.
+
+        Args:
+            bounds: Ascending bucket upper bounds in seconds
+        """
+        self.bounds = bounds or DEFAULT_BOUNDS
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Record one latency sample."""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """Estimate a latency percentile.
+
+        Args:
+            quantile: Fraction between 0 and 1, e.g. 0.99
+
+        Returns:
+            Upper bound of the bucket holding the percentile, or None
+            without samples
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = quantile * self.count
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+            return self.bounds[-1]
+
+class LatencyTracker:
+    """Per-model latency histograms and the timeouts derived from them."""
+
+    def __init__(self, adaptive_timeouts: bool = False, timeout_multiplier: float = 3.0,
+                 min_samples: int = 20, min_timeout: float = 5.0,
+                 max_timeout: float = 300.0):
+        """Initialize the tracker.
+
+        Args:
+            adaptive_timeouts: Derive timeouts from observed latencies
+            timeout_multiplier: Timeout is the model's p99 times this factor
+            min_samples: Samples needed before latencies are trusted
+            min_timeout: Lower bound of adaptive timeouts in seconds
+            max_timeout: Upper bound of adaptive timeouts in seconds
+        """
+        self.adaptive_timeouts = adaptive_timeouts
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, model: str) -> LatencyHistogram:
+        """Return the histogram for a model, creating it on first use."""
+        with self._lock:
+            if model not in self._histograms:
+                self._histograms[model] = LatencyHistogram()
+            return self._histograms[model]
+
+    def record(self, model: str, seconds: float) -> None:
+        """Record the latency of a successful request."""
+        self.histogram(model).observe(seconds)
+
+    def percentile(self, model: str, quantile: float) -> Optional[float]:
+        """Return a model's latency percentile once enough samples exist."""
+        histogram = self.histogram(model)
+        if histogram.count < self.min_samples:
+            return None
+        return histogram.percentile(quantile)
+
+    def timeout_for(self, model: str, default: float) -> float:
+        """Return the request timeout to use for a model.
+
+        With adaptive timeouts this is p99 times the multiplier, clamped to
+        the configured bounds; otherwise, or until enough samples exist, the
+        route's configured timeout.
+        """
+        if not self.adaptive_timeouts:
+            return default
+        p99 = self.percentile(model, 0.99)
+        if p99 is None:
+            return default
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Return sample counts and p50/p95/p99 per model."""
+        with self._lock:
+            models = list(self._histograms)
+        return {
+            model: {
+                "count": self.histogram(model).count,
+                "p50": self.histogram(model).percentile(0.5),
+                "p95": self.histogram(model).percentile(0.95),
+                "p99": self.histogram(model).percentile(0.99)
+            }
+            for model in models
+        }
+
+class HedgeBudget:
+    """Caps hedged requests to a fraction of all requests."""
+
+    def __init__(self, ratio: float = 0.05, burst: int = 2):
+        """Initialize the budget.
+
+        Args:
+            ratio: Hedges allowed per primary request
+            burst: Hedges allowed before any requests have been counted
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Count a primary request."""
+        with self._lock:
+            self.requests += 1
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget if any is left."""
+        with self._lock:
+            if self.hedges < self.requests * self.ratio + self.burst:
+                self.hedges += 1
+                return True
+            return False
+
+class HedgePolicy:
+    """When and where to send a duplicate of a slow LLM request."""
+
+    def __init__(self, target: str = "same", quantile: float = 0.95,
+                 budget: Optional[HedgeBudget] = None):
+        """Initialize the policy.
+
+        Args:
+            target: 'same' to duplicate on the same route, 'fallback' to
+                send the duplicate to the next route of the cascade
+            quantile: Latency percentile after which a request is hedged
+            budget: Cap on the number of hedged requests
+        """
+        if target not in ("same", "fallback"):
+            raise ValueError(f"Unsupported hedge target: {target}")
+        self.target = target
+        self.quantile = quantile
+        self.budget = budget or HedgeBudget()
+
+_tracker = LatencyTracker()
+_hedge_policy: Optional[HedgePolicy] = None
+
+def configure_latency(settings: Optional[Dict[str, Any]] = None) -> LatencyTracker:
+    """Create the process-wide latency tracker and hedging policy.
+
+    Args:
+        settings: The ``latency`` config section, with an optional
+            ``hedging`` subsection
+
+    Returns:
+        The shared latency tracker
+    """
+    global _tracker, _hedge_policy
+    settings = settings or {}
+    hedging = settings.get("hedging") or {}
+    _hedge_policy = None
+    if hedging.get("enabled", False):
+        _hedge_policy = HedgePolicy(
+            target=hedging.get("target", "same"),
+            quantile=hedging.get("quantile", 0.95),
+            budget=HedgeBudget(hedging.get("budget_ratio", 0.05), hedging.get("burst", 2))
+        )
+    _tracker = LatencyTracker(
+        adaptive_timeouts=settings.get("adaptive_timeouts", False),
+        timeout_multiplier=settings.get("timeout_multiplier", 3.0),
+        min_samples=settings.get("min_samples", 20),
+        min_timeout=settings.get("min_timeout", 5.0),
+        max_timeout=settings.get("max_timeout", 300.0)
+    )
+    return _tracker
+
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide latency tracker."""
+    return _tracker
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """Return the process-wide hedging policy, or None if hedging is disabled."""
+    return _hedge_policy
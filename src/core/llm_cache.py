@@ -0,0 +1,205 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CACHE_MODES = ("use", "refresh", "bypass")
+
+class LLMCache:
+    """Persistent content-addressed cache of LLM responses.
+
+    Entries are keyed by provider, model and a hash of the prompt messages
+    and stored in SQLite. The cache is capped by total response size with
+    least-recently-used eviction, and entries older than the TTL are
+    treated as misses.
+    """
+
+    def __init__(self, path: str = ".cache/llm_responses.sqlite",
+                 max_bytes: int = 256 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = None):
+        """Open (or create) the cache database.
+
+        Args:
+            path: Location of the SQLite database file
+            max_bytes: Maximum total size of cached responses
+            ttl_seconds: Age after which entries expire, or None to keep forever
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL DEFAULT 0,
+                tokens INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    @staticmethod
+    def make_key(provider: str, model: str, system_message: str, user_prompt: str) -> str:
+        """Build the content-addressed key for a prompt."""
+        return hashlib.sha256(
+            json.dumps([provider, model, system_message, user_prompt]).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, size, latency, tokens, created_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row and self.ttl_seconds is not None and now - row[4] > self.ttl_seconds:
+                self._delete(key, row[1])
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            self.saved_seconds += row[2]
+            self.saved_tokens += row[3]
+            return row[0]
+
+    def put(self, key: str, response: str, provider: str = "", model: str = "",
+            latency: float = 0.0, tokens: int = 0) -> None:
+        """Store a response and evict least-recently-used entries over the size cap.
+
+        Args:
+            key: Key from :meth:`make_key`
+            response: Response text to cache
+            provider: Provider that produced the response
+            model: Model that produced the response
+            latency: Seconds the original request took
+            tokens: Tokens the original request consumed
+        """
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, provider, model, response, size, latency, tokens, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, provider, model, response, size, latency, tokens, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, key: str) -> None:
+        """Drop a single entry, e.g. after its response failed validation."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self._delete(key, row[0])
+                self._conn.commit()
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits its cap."""
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._delete(key, size)
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def _delete(self, key: str, size: int) -> None:
+        self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+        self._total_bytes -= size
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the estimated savings."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "saved_tokens": self.saved_tokens
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[LLMCache] = None
+
+def configure_cache(settings: Optional[Dict[str, Any]] = None) -> Optional[LLMCache]:
+    """Create the process-wide response cache from the ``cache`` config section.
+
+    Args:
+        settings: Optional mapping with enabled, path, max_bytes and ttl_seconds
+
+    Returns:
+        The shared cache, or None if caching is disabled
+    """
+    global _cache
+    settings = settings or {}
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+    if settings.get("enabled", False):
+        _cache = LLMCache(
+            path=settings.get("path", ".cache/llm_responses.sqlite"),
+            max_bytes=settings.get("max_bytes", 256 * 1024 * 1024),
+            ttl_seconds=settings.get("ttl_seconds")
+        )
+    return _cache
+
+def get_cache() -> Optional[LLMCache]:
+    """Return the shared response cache, or None if caching is disabled."""
+    return _cache
@@ -1,25 +1,84 @@
 import os
-import requests
-from typing import Optional
+import json
+import time
+import asyncio
+import itertools
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 from dataclasses import dataclass
-from .error_handler import ErrorHandler
+from .error_handler import ErrorHandler, RateLimitError, backoff_delay, parse_retry_after
+from .http_transport import HTTPTransport, get_transport
+from .llm_cache import LLMCache, CACHE_MODES
+from .prompt_budget import PromptAccountant, estimate_tokens
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .latency import get_latency_tracker
+from .tracing import NULL_SPAN, bind_context, get_tracer
+from .metrics import get_metrics
+
+T = TypeVar('T')
+
+# Provider responses worth retrying after a backoff
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+LLM_REQUEST_SECONDS = get_metrics().histogram(
+    "pyfactory_llm_request_duration_seconds", "LLM request latency", ("model",)
+)
+LLM_RETRIES = get_metrics().counter(
+    "pyfactory_llm_retries_total", "LLM requests retried after a retryable status", ("model", "status")
+)
+LLM_THROTTLED = get_metrics().counter(
+    "pyfactory_llm_throttled_total", "LLM requests throttled with HTTP 429", ("model",)
+)
+LLM_CACHE_LOOKUPS = get_metrics().counter(
+    "pyfactory_llm_cache_lookups_total", "LLM response cache lookups", ("model", "result")
+)
 
 @dataclass
 class LLMConfig:
     provider: str
     model: str
     api_key: Optional[str] = None
+    timeout: float = 30
 
 class LLMClient:
     """Centralized client for interacting with LLM providers."""
     
-    def __init__(self, config: LLMConfig):
+    def __init__(self, config: LLMConfig, transport: Optional[HTTPTransport] = None,
+                 cache: Optional[LLMCache] = None, cache_mode: str = "use",
+                 accountant: Optional[PromptAccountant] = None, agent: str = "",
+                 rate_limiter: Optional[RateLimiter] = None, max_attempts: int = 5,
+                 error_log: str = "logs/errors.log"):
+        """Initialize the client.
+        
+        Args:
+            config: Provider, model and credentials to use
+            transport: HTTP transport, defaults to the shared pooled transport
+            cache: Optional response cache consulted before each request
+            cache_mode: 'use' to read and write the cache, 'refresh' to skip
+                reads but store fresh responses, 'bypass' to ignore it
+            accountant: Optional prompt-size accountant checked before sending
+            agent: Slug of the agent using this client, for accounting
+            rate_limiter: Limiter to pace requests, defaults to the one
+                configured for the provider and model
+            max_attempts: Attempts per request when the provider throttles
+                (HTTP 429) or is temporarily unavailable
+            error_log: File failed requests are logged to, e.g. the
+                workspace's error log
+        """
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unsupported cache mode: {cache_mode}")
         self.config = config
-        self.error_handler = ErrorHandler()
+        self.transport = transport or get_transport()
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.accountant = accountant
+        self.agent = agent
+        self.rate_limiter = rate_limiter or get_rate_limiter(config.provider, config.model)
+        self.max_attempts = max_attempts
+        self.error_handler = ErrorHandler(error_log)
         
         if not self.config.api_key:
             self.config.api_key = os.getenv('OPENROUTER_API_KEY')
-            if not self.config.api_key:
+            if not self.config.api_key and getattr(self.transport, "requires_api_key", True):
                 raise ValueError("No API key provided or found in environment variables")
 
     def prompt(self, system_message: str, user_prompt: str) -> str:
@@ -34,7 +93,181 @@ class LLMClient:
             
         Raises:
             RuntimeError: If the API request fails
+            PromptBudgetError: If the prompt exceeds the agent's token ceiling
+        """
+        with get_tracer().span("llm_call", "llm", **self._span_attributes(
+                system_message, user_prompt)) as span:
+            content = self._prompt(system_message, user_prompt, span)
+            span.set(response_bytes=len(content.encode("utf-8")))
+            return content
+
+    def _prompt(self, system_message: str, user_prompt: str, span: Any) -> str:
+        """Body of :meth:`prompt`, recording cache use, retries and tokens on ``span``."""
+        cache_key, cached = self._lookup_cache(system_message, user_prompt)
+        span.set(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+        
+        prompt_tokens = self._check_budget(system_message, user_prompt)
+        headers, payload = self._build_request(system_message, user_prompt)
+        
+        tracker = get_latency_tracker()
+        
+        def request() -> Dict[str, Any]:
+            sent = time.perf_counter()
+            response = self.transport.post_json(
+                "chat/completions",
+                payload,
+                headers=headers,
+                timeout=tracker.timeout_for(self.config.model, self.config.timeout)
+            )
+            elapsed = time.perf_counter() - sent
+            tracker.record(self.config.model, elapsed)
+            LLM_REQUEST_SECONDS.observe(elapsed, model=self.config.model)
+            return response
+        
+        try:
+            start = time.perf_counter()
+            data = self._send(request, prompt_tokens, span)
+            content = data["choices"][0]["message"]["content"]
+        except Exception as e:
+            self.error_handler.log_error(f"LLM API call failed: {str(e)}")
+            raise RuntimeError(f"LLM API request failed: {str(e)}") from e
+        
+        used_tokens = (data.get("usage") or {}).get("total_tokens", 0)
+        span.set(tokens=used_tokens)
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_usage(used_tokens - prompt_tokens)
+        
+        if cache_key is not None:
+            self.cache.put(
+                cache_key,
+                content,
+                provider=self.config.provider,
+                model=self.config.model,
+                latency=time.perf_counter() - start,
+                tokens=used_tokens
+            )
+        return content
+
+    def stream(self, system_message: str, user_prompt: str) -> Iterator[str]:
+        """Stream the LLM's response as it is generated.
+        
+        Uses the chat-completions ``stream`` option and yields content
+        deltas parsed from the server-sent events. A cached response is
+        yielded as a single chunk, and a completed stream is stored in the
+        cache like a regular response.
+        
+        Args:
+            system_message: The system/context message for the LLM
+            user_prompt: The user's input prompt
+            
+        Yields:
+            Successive pieces of the response text
+            
+        Raises:
+            RuntimeError: If the API request fails
+            PromptBudgetError: If the prompt exceeds the agent's token ceiling
         """
+        # The consumer runs between deltas, so the span is not its parent
+        with get_tracer().span("llm_stream", "llm", activate=False, **self._span_attributes(
+                system_message, user_prompt)) as span:
+            response_bytes = 0
+            for delta in self._stream(system_message, user_prompt, span):
+                response_bytes += len(delta.encode("utf-8"))
+                yield delta
+            span.set(response_bytes=response_bytes)
+
+    def _stream(self, system_message: str, user_prompt: str, span: Any) -> Iterator[str]:
+        """Body of :meth:`stream`, recording cache use and retries on ``span``."""
+        cache_key, cached = self._lookup_cache(system_message, user_prompt)
+        span.set(cache_hit=cached is not None)
+        if cached is not None:
+            yield cached
+            return
+        
+        prompt_tokens = self._check_budget(system_message, user_prompt)
+        headers, payload = self._build_request(system_message, user_prompt)
+        payload["stream"] = True
+        # Ask for a final chunk with the token usage, like a response's body
+        payload["stream_options"] = {"include_usage": True}
+        
+        tracker = get_latency_tracker()
+        sent = 0.0
+        
+        def request() -> Iterator[str]:
+            nonlocal sent
+            sent = time.perf_counter()
+            return self._open_stream(
+                payload, headers, tracker.timeout_for(self.config.model, self.config.timeout)
+            )
+        
+        chunks = []
+        used_tokens = None
+        try:
+            start = time.perf_counter()
+            lines = self._send(request, prompt_tokens, span)
+            for line in lines:
+                # Skip keep-alive blank lines and SSE comments
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    used_tokens = event["usage"].get("total_tokens")
+                choices = event.get("choices") or [{}]
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    chunks.append(delta)
+                    yield delta
+        except GeneratorExit:
+            # The caller stopped reading; the tokens were spent all the same
+            self._record_stream_usage(prompt_tokens, used_tokens, chunks, span)
+            raise
+        except Exception as e:
+            self.error_handler.log_error(f"LLM API stream failed: {str(e)}")
+            raise RuntimeError(f"LLM API request failed: {str(e)}") from e
+        
+        # A stream's latency is the time until its last line, like a response's
+        elapsed = time.perf_counter() - sent
+        tracker.record(self.config.model, elapsed)
+        LLM_REQUEST_SECONDS.observe(elapsed, model=self.config.model)
+        used_tokens = self._record_stream_usage(prompt_tokens, used_tokens, chunks, span)
+        
+        if cache_key is not None:
+            self.cache.put(
+                cache_key,
+                "".join(chunks),
+                provider=self.config.provider,
+                model=self.config.model,
+                latency=time.perf_counter() - start,
+                tokens=used_tokens
+            )
+
+    def _record_stream_usage(self, prompt_tokens: int, used_tokens: Optional[int],
+                             chunks: List[str], span: Any) -> int:
+        """Charge a stream's tokens to the rate limiter.
+        
+        Args:
+            prompt_tokens: Tokens already reserved for the prompt
+            used_tokens: Total from the provider's usage chunk, if one arrived
+            chunks: Content streamed so far
+            span: Span of the request
+            
+        Returns:
+            The tokens charged in total
+        """
+        if used_tokens is None:
+            used_tokens = prompt_tokens + estimate_tokens("".join(chunks))
+        span.set(tokens=used_tokens)
+        if self.rate_limiter is not None:
+            self.rate_limiter.record_usage(used_tokens - prompt_tokens)
+        return used_tokens
+
+    def _build_request(self, system_message: str, user_prompt: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Build the headers and chat-completions payload for a prompt."""
         headers = {
             "Authorization": f"Bearer {self.config.api_key}",
             "Content-Type": "application/json"
@@ -47,16 +280,124 @@ class LLMClient:
                 {"role": "user", "content": user_prompt}
             ]
         }
+        return headers, payload
+
+    def _span_attributes(self, system_message: str, user_prompt: str) -> Dict[str, Any]:
+        """Attributes describing a request, for its trace span."""
+        return {
+            "agent": self.agent,
+            "provider": self.config.provider,
+            "model": self.config.model,
+            "prompt_bytes": len(system_message.encode("utf-8")) + len(user_prompt.encode("utf-8"))
+        }
+
+    def _check_budget(self, system_message: str, user_prompt: str) -> int:
+        """Account for a prompt about to be sent and enforce its size ceiling.
         
-        try:
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
-        except Exception as e:
-            self.error_handler.log_error(f"LLM API call failed: {str(e)}")
-            raise RuntimeError(f"LLM API request failed: {str(e)}") from e
\ No newline at end of file
+        Returns:
+            The estimated number of prompt tokens
+        """
+        if self.accountant is not None:
+            return self.accountant.check(self.agent, self.config.model, system_message, user_prompt)
+        return estimate_tokens(system_message) + estimate_tokens(user_prompt)
+
+    def _send(self, request: Callable[[], T], prompt_tokens: int, span: Any = NULL_SPAN) -> T:
+        """Send a request through the rate limiter, backing off when throttled.
+        
+        Throttled (HTTP 429) and temporarily unavailable responses are retried
+        with exponential backoff and jitter, waiting at least as long as the
+        provider's Retry-After header asks. A 429 also pauses the shared rate
+        limiter so every other client of the route backs off too.
+        
+        The number of retries is recorded on ``span``.
+        
+        Raises:
+            RateLimitError: If the provider still throttles after the last attempt
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            span.set(retries=attempt - 1)
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(prompt_tokens)
+            try:
+                return request()
+            except Exception as e:
+                response = getattr(e, "response", None)
+                status = getattr(response, "status_code", None)
+                if status not in RETRYABLE_STATUS:
+                    raise
+                if status == 429:
+                    LLM_THROTTLED.inc(model=self.config.model)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if attempt == self.max_attempts:
+                    if status == 429:
+                        raise RateLimitError(
+                            f"Provider throttled {self.config.model} after {attempt} attempts",
+                            retry_after=retry_after
+                        ) from e
+                    raise
+                
+                LLM_RETRIES.inc(model=self.config.model, status=status)
+                delay = backoff_delay(attempt, retry_after=retry_after)
+                if status == 429 and self.rate_limiter is not None:
+                    # The next acquire() waits out the pause for every caller
+                    self.rate_limiter.penalize(delay)
+                else:
+                    time.sleep(delay)
+
+    def _open_stream(self, payload: Dict[str, Any], headers: Dict[str, str],
+                     timeout: float) -> Iterator[str]:
+        """Start a streamed request and wait for its first line.
+        
+        Pulling the first line makes the HTTP status available here, so a
+        throttled stream can be retried before any content is yielded.
+        """
+        lines = self.transport.post_stream(
+            "chat/completions",
+            payload,
+            headers=headers,
+            timeout=timeout
+        )
+        first = next(lines, None)
+        if first is None:
+            return iter(())
+        return itertools.chain([first], lines)
+
+    def _lookup_cache(self, system_message: str, user_prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return the cache key for a prompt and the cached response, if any."""
+        if self.cache is None or self.cache_mode == "bypass":
+            return None, None
+        cache_key = LLMCache.make_key(
+            self.config.provider, self.config.model, system_message, user_prompt
+        )
+        if self.cache_mode == "refresh":
+            return cache_key, None
+        cached = self.cache.get(cache_key)
+        LLM_CACHE_LOOKUPS.inc(model=self.config.model, result="miss" if cached is None else "hit")
+        return cache_key, cached
+
+    def invalidate(self, system_message: str, user_prompt: str) -> None:
+        """Drop the cached response for a prompt whose output was rejected."""
+        if self.cache is not None:
+            self.cache.invalidate(LLMCache.make_key(
+                self.config.provider, self.config.model, system_message, user_prompt
+            ))
+
+    async def aprompt(self, system_message: str, user_prompt: str) -> str:
+        """Asynchronous variant of :meth:`prompt`.
+        
+        The blocking request runs on the event loop's default executor, so
+        many prompts can be in flight at once while sharing the pooled
+        transport's connections.
+        
+        Args:
+            system_message: The system/context message for the LLM
+            user_prompt: The user's input prompt
+            
+        Returns:
+            The LLM's response as a string
+            
+        Raises:
+            RuntimeError: If the API request fails
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, bind_context(self.prompt), system_message, user_prompt)
\ No newline at end of file
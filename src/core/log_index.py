@@ -0,0 +1,247 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+# Context keys whose values are indexed; any key's presence is indexed too
+INDEXED_KEYS = ("agent", "item", "job", "worker", "project", "model", "signal")
+
+# Entry metadata the index needs: timestamp, level and context postings
+EntryMeta = Tuple[str, str, List[Tuple[str, str]]]
+
+def entry_meta(entry: Dict[str, Any]) -> EntryMeta:
+    """Extract what the index records about one log entry."""
+    context = entry.get("context") or {}
+    postings = [("has", key) for key in context]
+    postings.extend((key, str(context[key])) for key in INDEXED_KEYS if key in context)
+    return entry.get("timestamp", ""), entry.get("level", "INFO"), postings
+
+def index_path(log_file: Path) -> Path:
+    """Sidecar index of a log file, e.g. ``app.log.idx``."""
+    log_file = Path(log_file)
+    return log_file.with_name(log_file.name + ".idx")
+
+class LogIndex:
+    """Sidecar index mapping structured log entries to byte ranges of the log.
+
+    The log is divided into blocks of consecutive lines. For each block
+    the index stores its byte offset and length, the range of its
+    timestamps, the levels it contains, and the context keys and indexed
+    context values of its entries. A query selects the candidate blocks
+    from the index, seeks to each and filters only their lines, so it
+    reads the parts of a multi-gigabyte log that can match rather than
+    the whole file.
+
+    The log writer indexes every batch it writes; :meth:`update` indexes
+    whatever the index does not cover yet, e.g. logs written without it.
+    """
+
+    def __init__(self, log_file: Path, block_bytes: int = 65536):
+        """Open (or create) the index of a log file.
+
+        Args:
+            log_file: Structured JSON lines log
+            block_bytes: Target size of blocks built by :meth:`update`
+        """
+        self.log_file = Path(log_file)
+        self.block_bytes = block_bytes
+        self._conn = sqlite3.connect(str(index_path(self.log_file)), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+               CREATE TABLE IF NOT EXISTS blocks (
+                   block_id INTEGER PRIMARY KEY,
+                   offset INTEGER NOT NULL,
+                   length INTEGER NOT NULL,
+                   first_ts TEXT NOT NULL,
+                   last_ts TEXT NOT NULL,
+                   levels INTEGER NOT NULL
+               );
+               CREATE TABLE IF NOT EXISTS postings (
+                   field TEXT NOT NULL,
+                   value TEXT NOT NULL,
+                   block_id INTEGER NOT NULL,
+                   PRIMARY KEY (field, value, block_id)
+               ) WITHOUT ROWID;
+               CREATE INDEX IF NOT EXISTS idx_blocks_ts ON blocks(last_ts, first_ts);"""
+        )
+
+    @property
+    def indexed_bytes(self) -> int:
+        """Length of the log prefix covered by the index."""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'indexed_bytes'").fetchone()
+        return row[0] if row else 0
+
+    def add_block(self, offset: int, length: int, entries: Iterable[EntryMeta]) -> None:
+        """Record a block of lines just appended at ``offset``.
+
+        Args:
+            offset: Byte offset of the block's first line
+            length: Byte length of the block
+            entries: Metadata of the block's entries, see :func:`entry_meta`
+        """
+        entries = list(entries)
+        if not entries:
+            return
+        indexed = self.indexed_bytes
+        if offset + length <= indexed:
+            # A query's update() already indexed this block from the file
+            return
+        if offset < indexed:
+            # ... or part of it; index the rest from the file too
+            self.update(until=offset + length)
+            return
+        if offset > indexed:
+            # Another writer appended in between; index its lines first
+            self.update(until=offset)
+        timestamps = [timestamp for timestamp, _, _ in entries]
+        levels = 0
+        postings = set()
+        for _, level, entry_postings in entries:
+            levels |= 1 << LEVELS.index(level)
+            postings.update(entry_postings)
+        with self._conn:
+            block_id = self._conn.execute(
+                """INSERT INTO blocks (offset, length, first_ts, last_ts, levels)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (offset, length, min(timestamps), max(timestamps), levels)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO postings (field, value, block_id) VALUES (?, ?, ?)",
+                [(field, value, block_id) for field, value in postings]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('indexed_bytes', ?)",
+                (offset + length,)
+            )
+
+    def update(self, until: Optional[int] = None) -> int:
+        """Index complete lines of the log not covered by the index yet.
+
+        A log shorter than the indexed prefix was replaced, and is
+        indexed from scratch.
+
+        Args:
+            until: Stop at this byte offset instead of the end of the log
+
+        Returns:
+            Number of bytes indexed
+        """
+        if not self.log_file.exists():
+            return 0
+        size = self.log_file.stat().st_size
+        start = self.indexed_bytes
+        if size < start:
+            with self._conn:
+                self._conn.execute("DELETE FROM blocks")
+                self._conn.execute("DELETE FROM postings")
+                self._conn.execute("DELETE FROM meta")
+            start = 0
+        end = size if until is None else min(until, size)
+
+        with open(self.log_file, "rb") as f:
+            f.seek(start)
+            offset = block_start = start
+            entries: List[EntryMeta] = []
+            while offset < end:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # A line still being written
+                    break
+                offset += len(line)
+                try:
+                    entries.append(entry_meta(json.loads(line)))
+                except ValueError:
+                    pass
+                if offset - block_start >= self.block_bytes:
+                    self._add_or_skip(block_start, offset, entries)
+                    block_start, entries = offset, []
+            self._add_or_skip(block_start, offset, entries)
+        return offset - start
+
+    def _add_or_skip(self, start: int, end: int, entries: List[EntryMeta]) -> None:
+        if entries:
+            self.add_block(start, end - start, entries)
+        elif end > start:
+            # Only unparseable lines; cover them without a block
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('indexed_bytes', ?)", (end,)
+                )
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              level: Optional[str] = None, context: Optional[Dict[str, str]] = None,
+              has: Optional[List[str]] = None, text: Optional[str] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield log entries matching every given filter, in file order.
+
+        Args:
+            since: Earliest ISO timestamp, inclusive
+            until: Latest ISO timestamp, inclusive
+            level: Least severe level to return
+            context: Context values entries must have, e.g. ``{"agent": "developer"}``
+            has: Context keys entries must have, e.g. ``["error"]``
+            text: Substring the message must contain
+            limit: Stop after this many entries
+        """
+        self.update()
+        min_level = LEVELS.index(level.upper()) if level else 0
+        clauses = ["(levels & ?) != 0"]
+        params: List[Any] = [sum(1 << i for i in range(min_level, len(LEVELS)))]
+        if since:
+            clauses.append("last_ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("first_ts <= ?")
+            params.append(until)
+        postings = [(key, str(value)) for key, value in (context or {}).items()]
+        postings.extend(("has", key) for key in has or [])
+        for field, value in postings:
+            if field != "has" and field not in INDEXED_KEYS:
+                # Not indexed; presence narrows the blocks, values are checked per line
+                field, value = "has", field
+            clauses.append(
+                "block_id IN (SELECT block_id FROM postings WHERE field = ? AND value = ?)"
+            )
+            params.extend((field, value))
+        blocks = self._conn.execute(
+            f"SELECT offset, length FROM blocks WHERE {' AND '.join(clauses)} ORDER BY offset",
+            params
+        ).fetchall()
+
+        returned = 0
+        with open(self.log_file, "rb") as f:
+            for offset, length in blocks:
+                f.seek(offset)
+                for line in f.read(length).splitlines():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not self._matches(entry, since, until, min_level, context, has, text):
+                        continue
+                    yield entry
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+    @staticmethod
+    def _matches(entry: Dict[str, Any], since: Optional[str], until: Optional[str],
+                 min_level: int, context: Optional[Dict[str, str]],
+                 has: Optional[List[str]], text: Optional[str]) -> bool:
+        timestamp = entry.get("timestamp", "")
+        entry_context = entry.get("context") or {}
+        if since and timestamp < since or until and timestamp > until:
+            return False
+        if entry.get("level") not in LEVELS[min_level:]:
+            return False
+        if any(str(entry_context.get(key)) != str(value) for key, value in (context or {}).items()):
+            return False
+        if any(key not in entry_context for key in has or []):
+            return False
+        return not text or text in entry.get("message", "")
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,8 +1,15 @@
+import atexit
 import json
+import os
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from enum import Enum
+from .metrics import get_metrics
+from .log_index import LogIndex, entry_meta, index_path
 
 class LogLevel(Enum):
     DEBUG = "DEBUG"
@@ -11,42 +18,270 @@ class LogLevel(Enum):
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
+SEVERITY = {level: index for index, level in enumerate(LogLevel)}
+
+LOG_ENTRIES = get_metrics().counter(
+    "pyfactory_log_entries_total", "Structured log entries written", ("level",)
+)
+
+class _Command:
+    """Control message for the writer thread, answered by setting ``done``."""
+
+    def __init__(self, action: str, argument: Any = None):
+        self.action = action
+        self.argument = argument
+        self.done = threading.Event()
+
 class StructuredLogger:
-    """Structured JSON logger for the application."""
-    
-    def __init__(self, log_file: str = "logs/app.log"):
+    """Structured JSON logger for the application.
+
+    Entries below the configured level are dropped before they are
+    serialized. The rest are queued and appended by a background writer
+    thread, which keeps the log file open and writes in batches once
+    ``buffer_bytes`` have accumulated or ``flush_interval`` has passed.
+    Pending entries are flushed at exit and when the log file changes.
+    The file is rotated to ``app.log.1`` ... ``app.log.<backup_count>``
+    once it exceeds ``max_bytes`` or is older than ``rotate_interval``.
+    With ``index`` enabled every batch is also recorded in the sidecar
+    :class:`LogIndex` queried by ``pyfactory logs``.
+    """
+
+    def __init__(self, log_file: str = "logs/app.log", level: LogLevel = LogLevel.DEBUG,
+                 flush_interval: float = 0.2, buffer_bytes: int = 65536,
+                 max_bytes: Optional[int] = None, backup_count: int = 5,
+                 rotate_interval: Optional[float] = None, index: bool = False):
+        """Initialize the logger.
+
+        Args:
+            log_file: File entries are appended to
+            level: Least severe level that is written
+            flush_interval: Longest time in seconds an entry waits in the buffer
+            buffer_bytes: Buffered bytes that trigger a write
+            max_bytes: Rotate the file once it grows past this size
+            backup_count: Rotated files kept
+            rotate_interval: Rotate the file once it is this many seconds old
+            index: Maintain the sidecar index of the log file
+        """
         self.log_file = Path(log_file)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
-        
+        self.level = level
+        self.flush_interval = flush_interval
+        self.buffer_bytes = buffer_bytes
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_interval = rotate_interval
+        self.index = index
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+        # The writer thread does not survive fork; the child starts its own
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def configure(self, settings: Optional[Dict[str, Any]] = None) -> None:
+        """Apply the ``logging`` config section.
+
+        Args:
+            settings: Optional mapping with level, flush_interval,
+                buffer_bytes, max_bytes, backup_count, rotate_interval
+                and index
+        """
+        settings = settings or {}
+        self.flush()
+        self.level = LogLevel(settings.get("level", "DEBUG").upper())
+        self.flush_interval = settings.get("flush_interval", 0.2)
+        self.buffer_bytes = settings.get("buffer_bytes", 65536)
+        self.max_bytes = settings.get("max_bytes")
+        self.backup_count = settings.get("backup_count", 5)
+        self.rotate_interval = settings.get("rotate_interval")
+        self.index = settings.get("index", False)
+
+    def set_log_file(self, log_file: Path) -> None:
+        """Redirect subsequent entries, e.g. to the log of a workspace."""
+        log_file = Path(log_file)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Entries logged so far still go to the previous file
+        self._command("switch", log_file)
+        self.log_file = log_file
+
     def _write_log(self, level: LogLevel, message: str, extra: Dict[str, Any] = None):
-        """Write a structured log entry."""
+        """Queue a structured log entry for the writer thread."""
+        if SEVERITY[level] < SEVERITY[self.level]:
+            return
+        LOG_ENTRIES.inc(level=level.value)
         log_entry = {
             "timestamp": datetime.utcnow().isoformat(),
             "level": level.value,
             "message": message,
             "context": extra or {}
         }
-        
+
         try:
-            with open(self.log_file, "a") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            # Serialized here so later changes to the context are not logged
+            line = json.dumps(log_entry, default=str) + "\n"
+            self._ensure_writer()
+            self._queue.put((line, entry_meta(log_entry) if self.index else None))
         except Exception as e:
             print(f"Failed to write log: {str(e)}")
 
+    def flush(self) -> None:
+        """Block until every queued entry has been written."""
+        self._command("flush")
+
+    def close(self) -> None:
+        """Flush queued entries and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._command("stop")
+        self._thread = None
+
+    def _command(self, action: str, argument: Any = None) -> None:
+        # Without a writer thread nothing is queued
+        if self._thread is None or not self._thread.is_alive():
+            return
+        command = _Command(action, argument)
+        self._queue.put(command)
+        command.done.wait()
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run_writer, args=(self.log_file,),
+                                          name="log-writer", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _reset_after_fork(self) -> None:
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _run_writer(self, log_file: Path) -> None:
+        """Writer thread: batch queued entries into the open log file."""
+        writer = _LogFileWriter(log_file, self)
+        batch: List[Tuple[str, Any]] = []
+        size = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+
+            if isinstance(entry, tuple):
+                batch.append(entry)
+                size += len(entry[0])
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if size < self.buffer_bytes:
+                    continue
+
+            if batch:
+                writer.write(batch)
+                batch, size, deadline = [], 0, None
+            if isinstance(entry, _Command):
+                if entry.action == "switch":
+                    writer.close()
+                    writer = _LogFileWriter(entry.argument, self)
+                elif entry.action == "stop":
+                    writer.close()
+                    entry.done.set()
+                    return
+                entry.done.set()
+
     def debug(self, message: str, **kwargs):
         self._write_log(LogLevel.DEBUG, message, kwargs)
-        
+
     def info(self, message: str, **kwargs):
         self._write_log(LogLevel.INFO, message, kwargs)
-        
+
     def warning(self, message: str, **kwargs):
         self._write_log(LogLevel.WARNING, message, kwargs)
-        
+
     def error(self, message: str, **kwargs):
         self._write_log(LogLevel.ERROR, message, kwargs)
-        
+
     def critical(self, message: str, **kwargs):
         self._write_log(LogLevel.CRITICAL, message, kwargs)
 
+class _LogFileWriter:
+    """Open log file of the writer thread, rotated by size or age."""
+
+    def __init__(self, path: Path, settings: StructuredLogger):
+        self.path = Path(path)
+        self.settings = settings
+        self._file = None
+        self._index: Optional[LogIndex] = None
+        self._opened_at = 0.0
+
+    def write(self, batch: List[Tuple[str, Any]]) -> None:
+        try:
+            if self._file is None:
+                self._open()
+            elif self._due_for_rotation():
+                self._rotate()
+            data = "".join(line for line, _ in batch).encode("utf-8")
+            offset = self._file.tell()
+            self._file.write(data)
+            self._file.flush()
+            if self.settings.index:
+                if self._index is None:
+                    self._index = LogIndex(self.path)
+                self._index.add_block(offset, len(data), [meta for _, meta in batch if meta])
+        except Exception as e:
+            print(f"Failed to write log: {str(e)}")
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Binary, so tell() is the byte offset recorded in the index
+        self._file = open(self.path, "ab")
+        self._opened_at = time.time()
+
+    def _due_for_rotation(self) -> bool:
+        max_bytes = self.settings.max_bytes
+        interval = self.settings.rotate_interval
+        if max_bytes and self._file.tell() >= max_bytes:
+            return True
+        return bool(interval) and time.time() - self._opened_at >= interval
+
+    def _rotate(self) -> None:
+        """Shift ``app.log.N`` to ``app.log.N+1`` and start a fresh file."""
+        self.close()
+        count = self.settings.backup_count
+        for index in range(count - 1, 0, -1):
+            self._move(self.path.with_name(f"{self.path.name}.{index}"),
+                       self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if count > 0:
+            self._move(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+            index_path(self.path).unlink(missing_ok=True)
+        self._open()
+
+    @staticmethod
+    def _move(source: Path, target: Path) -> None:
+        """Rename a log file together with its sidecar index."""
+        if source.exists():
+            os.replace(source, target)
+        if index_path(source).exists():
+            os.replace(index_path(source), index_path(target))
+        elif index_path(target).exists():
+            index_path(target).unlink()
+
+    def close(self) -> None:
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def configure_logging(settings: Optional[Dict[str, Any]] = None) -> StructuredLogger:
+    """Apply the ``logging`` config section to the global logger."""
+    logger.configure(settings)
+    return logger
+
 # Global logger instance
-logger = StructuredLogger()
\ No newline at end of file
+logger = StructuredLogger()
@@ -0,0 +1,243 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from .error_handler import ConfigurationError, ErrorHandler
+from .llm_cache import LLMCache
+from .llm_client import LLMClient, LLMConfig
+from .prompt_budget import PromptAccountant
+from .latency import HedgePolicy, LatencyTracker, get_hedge_policy, get_latency_tracker
+from .logger import logger
+from .tracing import bind_context
+
+Validator = Callable[[str], bool]
+
+@dataclass
+class Route:
+    """One provider/model an agent's prompts can be sent to."""
+    provider: str
+    model: str
+    timeout: float = 30
+
+class RoutedClient:
+    """LLM client that sends prompts along an ordered cascade of routes.
+    
+    The first route is normally a fast, cheap model. A prompt moves on to
+    the next route when the provider fails or when the response does not
+    pass the caller's validation, so stronger models are only paid for
+    when the cheaper ones cannot produce usable output.
+    
+    With a hedge policy, a request still running after its model's p95
+    latency is duplicated to the same or the next route, within the
+    policy's budget, and the first valid answer wins.
+    """
+    
+    # Shared by all clients; hedged requests block a thread each
+    _hedge_executor: Optional[ThreadPoolExecutor] = None
+    _hedge_executor_lock = threading.Lock()
+    
+    def __init__(self, agent: str, routes: List[Route], clients: List[LLMClient],
+                 hedge_policy: Optional[HedgePolicy] = None,
+                 tracker: Optional[LatencyTracker] = None,
+                 error_log: str = "logs/errors.log"):
+        self.agent = agent
+        self.routes = routes
+        self.clients = clients
+        self.hedge_policy = hedge_policy
+        self.tracker = tracker or get_latency_tracker()
+        self.error_handler = ErrorHandler(error_log)
+        
+    def prompt(self, system_message: str, user_prompt: str,
+               validate: Optional[Validator] = None) -> str:
+        """Send a prompt along the cascade and return the first acceptable response.
+        
+        Args:
+            system_message: The system/context message for the LLM
+            user_prompt: The user's input prompt
+            validate: Optional check a response must pass to stop escalating
+            
+        Returns:
+            The first response that passes validation, or the last route's
+            response if none does
+            
+        Raises:
+            RuntimeError: If every route fails with a provider error
+        """
+        response = None
+        last_error = None
+        for index, (route, client) in enumerate(zip(self.routes, self.clients)):
+            try:
+                response = self._prompt_route(index, system_message, user_prompt, validate)
+            except RuntimeError as e:
+                last_error = e
+                logger.warning("LLM route failed", agent=self.agent, model=route.model, error=str(e))
+                continue
+            
+            if validate is None or self._is_valid(validate, response):
+                return response
+            # Never replay the rejected response from the cache
+            client.invalidate(system_message, user_prompt)
+            logger.info("LLM response failed validation, escalating", agent=self.agent, model=route.model)
+        
+        if response is None:
+            raise RuntimeError(f"All LLM routes failed for {self.agent}") from last_error
+        return response
+        
+    def _prompt_route(self, index: int, system_message: str, user_prompt: str,
+                      validate: Optional[Validator]) -> str:
+        """Send a prompt to one route, hedging it if it runs past the model's p95."""
+        client = self.clients[index]
+        policy = self.hedge_policy
+        delay = policy and self.tracker.percentile(self.routes[index].model, policy.quantile)
+        if not delay:
+            return client.prompt(system_message, user_prompt)
+        
+        policy.budget.record_request()
+        hedge_client = client
+        if policy.target == "fallback" and index + 1 < len(self.clients):
+            hedge_client = self.clients[index + 1]
+        
+        executor = self._executor()
+        futures = {executor.submit(bind_context(client.prompt), system_message, user_prompt)}
+        done, _ = wait(futures, timeout=delay)
+        if not done and policy.budget.try_spend():
+            logger.info("Hedging slow LLM request", agent=self.agent,
+                        model=self.routes[index].model, hedge_model=hedge_client.config.model)
+            futures.add(executor.submit(bind_context(hedge_client.prompt), system_message, user_prompt))
+        
+        # Any attempt may still win while another is in flight, whatever the
+        # other failed with; errors surface only once every attempt failed
+        response = None
+        last_error = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if validate is None or self._is_valid(validate, response):
+                    return response
+        finally:
+            # A request still running finishes in the background and is discarded
+            for future in futures:
+                future.cancel()
+        if response is None:
+            raise last_error
+        return response
+        
+    @classmethod
+    def _executor(cls) -> ThreadPoolExecutor:
+        with cls._hedge_executor_lock:
+            if cls._hedge_executor is None:
+                cls._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+            return cls._hedge_executor
+        
+    async def aprompt(self, system_message: str, user_prompt: str,
+                      validate: Optional[Validator] = None) -> str:
+        """Asynchronous variant of :meth:`prompt`."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, bind_context(lambda: self.prompt(system_message, user_prompt, validate))
+        )
+        
+    def stream(self, system_message: str, user_prompt: str) -> Iterator[str]:
+        """Stream a response, falling back to the next route on provider errors.
+        
+        A route is only abandoned if it fails before yielding any content.
+        Streamed output is never validated: callers consume it as it arrives,
+        so a cascade cannot escalate on bad output here. Agents that rely on
+        escalation should use ``prompt`` instead (``streaming: false``).
+        
+        Raises:
+            RuntimeError: If every route fails with a provider error
+        """
+        last_error = None
+        for route, client in zip(self.routes, self.clients):
+            started = False
+            try:
+                for delta in client.stream(system_message, user_prompt):
+                    started = True
+                    yield delta
+                return
+            except RuntimeError as e:
+                if started:
+                    raise
+                last_error = e
+                logger.warning("LLM route failed", agent=self.agent, model=route.model, error=str(e))
+        raise RuntimeError(f"All LLM routes failed for {self.agent}") from last_error
+        
+    def invalidate(self, system_message: str, user_prompt: str) -> None:
+        """Drop cached responses for a prompt on every route."""
+        for client in self.clients:
+            client.invalidate(system_message, user_prompt)
+            
+    @staticmethod
+    def _is_valid(validate: Validator, response: str) -> bool:
+        try:
+            return bool(validate(response))
+        except Exception:
+            return False
+
+class ModelRouter:
+    """Builds agents' LLM clients from the ``agents`` section of config/models.yaml.
+    
+    An agent entry either names a single ``provider``/``model`` (with an
+    optional ``timeout``) or lists an ordered ``cascade`` of such routes.
+    """
+    
+    def __init__(self, agents_config: Optional[Dict[str, Any]] = None):
+        self.agents_config = agents_config or {}
+        
+    def routes_for(self, agent: str) -> List[Route]:
+        """Return the ordered routes configured for an agent.
+        
+        Raises:
+            ConfigurationError: If the agent has no usable route
+        """
+        agent_config = self.agents_config.get(agent)
+        if not isinstance(agent_config, dict):
+            raise ConfigurationError(f"No model route configured for agent '{agent}'",
+                                     config_path=f"agents.{agent}")
+        
+        entries = agent_config.get("cascade") or [agent_config]
+        routes = []
+        for entry in entries:
+            if "provider" not in entry or "model" not in entry:
+                raise ConfigurationError("Route needs a provider and a model",
+                                         config_path=f"agents.{agent}")
+            routes.append(Route(
+                provider=entry["provider"],
+                model=entry["model"],
+                timeout=entry.get("timeout", agent_config.get("timeout", 30))
+            ))
+        return routes
+        
+    def client_for(self, agent: str, cache: Optional[LLMCache] = None,
+                   cache_mode: str = "use",
+                   accountant: Optional[PromptAccountant] = None,
+                   error_log: str = "logs/errors.log") -> RoutedClient:
+        """Build the routed client for an agent.
+        
+        Args:
+            agent: Slug of the agent
+            cache: Optional response cache shared by the routes
+            cache_mode: How the routes use the cache, see :class:`LLMClient`
+            accountant: Optional prompt-size accountant
+            error_log: File the clients log failed requests to
+        """
+        routes = self.routes_for(agent)
+        clients = [
+            LLMClient(
+                LLMConfig(provider=route.provider, model=route.model, timeout=route.timeout),
+                cache=cache,
+                cache_mode=cache_mode,
+                accountant=accountant,
+                agent=agent,
+                error_log=error_log
+            )
+            for route in routes
+        ]
+        return RoutedClient(agent, routes, clients, hedge_policy=get_hedge_policy(),
+                            error_log=error_log)
@@ -1,7 +1,7 @@
 from enum import Enum
 from uuid import UUID, uuid4
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from .repo import BaseModel
 
 class ProjectStatus(str, Enum):
@@ -35,13 +35,16 @@ class WorkItemStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    SKIPPED = "skipped"
 
 class WorkItem(BaseModel):
     """Represents a unit of work in the system."""
     
     def __init__(self):
         self.task_id: UUID = uuid4()
+        self.item_id: str = ""
         self.description: str = ""
+        self.depends_on: List[str] = []
         self.status: WorkItemStatus = WorkItemStatus.PENDING
         self.retry_count: int = 0
         self.error_log: str = ""
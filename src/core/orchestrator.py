@@ -1,60 +1,194 @@
-from typing import Optional, Dict, Any
+import sys
+import time
 from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO, Union
 from .dispatcher import Dispatcher
 from .agents.planner_agent import PlannerAgent
 from .agents.developer_agent import DeveloperAgent
 from .agents.auditor_agent import AuditorAgent
 from .error_handler import retry
+from .rule_manager import load_project_rules
 from .state_manager import StateManager
 from .logger import logger
-from .output_generator import create_zip_archive
+from .models import WorkItemStatus
+from .archive_backends import get_archive_backend
+from .output_generator import create_archive
+from .llm_cache import get_cache
+from .prompt_budget import get_accountant
+from .latency import get_latency_tracker
+from .signal_bus import configure_signal_bus
+from .work_store import configure_work_store, get_work_store
+from .work_queue import configure_work_queue
+from .tracing import get_tracer
+from .metrics import get_metrics
+from .workspace import Workspace
 
-def run_pipeline(config: Dict[str, Any], rules: Dict[str, Any]) -> None:
+AGENT_SECONDS = get_metrics().histogram(
+    "pyfactory_agent_duration_seconds", "Agent execution time including retries",
+    ("agent", "result")
+)
+WORK_ITEMS = get_metrics().gauge(
+    "pyfactory_work_items", "Work items per status after each agent phase", ("phase", "status")
+)
+CACHE_HIT_RATIO = get_metrics().gauge(
+    "pyfactory_llm_cache_hit_ratio", "Share of LLM cache lookups answered from the cache"
+)
+
+def run_pipeline(config: Dict[str, Any], rules: Dict[str, Any],
+                 workspace: Optional[Workspace] = None) -> None:
     """Main application loop that orchestrates agent execution.
     
     Uses the Dispatcher to determine and execute the sequence of agents.
-    Runs continuously until no next agent is determined.
+    Agents hand off through the signal bus; the signals that started an
+    agent are deleted once it succeeds. Runs continuously until no next
+    agent is determined.
 
     Args:
         config: System configuration dictionary
-        rules: System rules dictionary
+        rules: Shared rules per agent; rules files in the workspace's own
+            rules/ directory take precedence
+        workspace: Project to run, defaults to the current directory
     """
+    workspace = workspace or Workspace(output_dir_name=config.get("output_dir", "generated_project"))
+    rules = {**rules, **load_project_rules(workspace)}
+    
     # Initialize production components
-    state_manager = StateManager()
-    dispatcher = Dispatcher()
+    logger.set_log_file(workspace.log_file)
+    configure_work_store(config.get("work_store"), workspace)
+    configure_work_queue(config.get("work_queue"), workspace)
+    state_manager = StateManager(workspace=workspace)
+    dispatcher = Dispatcher(configure_signal_bus(workspace.signals_dir, workspace.work_items_dir))
     state_manager.load_state()
     logger.info("Pipeline started", config=config)
     
+    tracer = get_tracer()
+    tracer.reset()
+    try:
+        with tracer.span("pipeline", "pipeline", project=str(workspace.root)):
+            _run_agents(config, rules, workspace, state_manager, dispatcher)
+    finally:
+        _export_trace(workspace)
+        if (config.get("metrics") or {}).get("dump", True):
+            get_metrics().write(workspace.metrics_file)
+        # Pool processes exit without running atexit handlers
+        logger.flush()
+
+def _run_agents(config: Dict[str, Any], rules: Dict[str, Any], workspace: Workspace,
+                state_manager: StateManager, dispatcher: Dispatcher) -> None:
+    """Execute agents as the dispatcher hands off until the audit passes or none is left."""
+    tracer = get_tracer()
     while True:
         next_agent_name = dispatcher.get_next_agent()
-        if not next_agent_name:
+        if not next_agent_name or next_agent_name == Dispatcher.COMPLETE:
             logger.info("Pipeline completed successfully")
             # Package final output
-            output_dir = Path(config.get("output_dir", "generated_project"))
-            output_zip = Path("output/project.zip")
-            create_zip_archive(output_dir, output_zip)
-            logger.info(f"Created output package: {output_zip}")
+            packaging = config.get("packaging") or {}
+            output = _archive_output(packaging, workspace)
+            create_archive(
+                workspace.output_dir, output,
+                archive_format=packaging.get("format", "zip"),
+                compression_level=packaging.get("compression_level", 6),
+                max_workers=packaging.get("max_workers"),
+                incremental=packaging.get("incremental", True),
+                reproducible=packaging.get("reproducible", False)
+            )
+            logger.info(f"Created output package: {getattr(output, 'name', output)}")
+            _report_cache_stats(state_manager)
+            _report_prompt_sizes(state_manager)
+            state_manager.add_metadata("llm_latency", get_latency_tracker().summary())
+            _report_handoff_latency(state_manager, dispatcher)
+            # Compact the state journal into a fresh snapshot
+            with tracer.span("state_snapshot", "io"):
+                state_manager.save_state()
+            # Consume the passed audit only once the project is packaged
+            dispatcher.complete()
             break
             
         # Instantiate and execute the appropriate agent
-        agent = _get_agent_instance(next_agent_name, config, rules)
+        agent = _get_agent_instance(next_agent_name, config, rules, workspace)
         state_manager.set_current_phase(f"executing_{next_agent_name}")
         logger.info(f"Executing agent: {next_agent_name}")
         
+        start = time.perf_counter()
         try:
-            _execute_agent_with_retry(agent)
+            with tracer.span(f"agent.{next_agent_name}", "agent"):
+                _execute_agent_with_retry(agent)
+            AGENT_SECONDS.observe(time.perf_counter() - start, agent=next_agent_name, result="success")
+            _report_work_items(next_agent_name)
+            dispatcher.complete()
             state_manager.mark_task_complete(next_agent_name)
         except Exception as e:
+            AGENT_SECONDS.observe(time.perf_counter() - start, agent=next_agent_name, result="failure")
+            _report_work_items(next_agent_name)
+            dispatcher.complete(succeeded=False)
             state_manager.record_error(str(e))
             logger.error(f"Agent execution failed: {next_agent_name}", error=str(e))
+            state_manager.close()
             raise
 
+def _export_trace(workspace: Workspace) -> None:
+    """Write the run's Chrome trace and span summary table to the workspace logs."""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        return
+    tracer.export_chrome_trace(workspace.trace_file)
+    summary = tracer.format_summary()
+    workspace.trace_summary_file.write_text(summary + "\n")
+    logger.info("Trace written", trace=str(workspace.trace_file),
+                spans=len(tracer.spans), dropped=tracer.dropped)
+
+def _archive_output(packaging: Dict[str, Any], workspace: Workspace) -> Union[Path, BinaryIO]:
+    """Where to write the packaged project: ``packaging.output``, ``-`` for
+    stdout, or ``output/project`` with the format's extension."""
+    output = packaging.get("output")
+    if output == "-":
+        return sys.stdout.buffer
+    if output:
+        return workspace.path(output)
+    backend = get_archive_backend(packaging.get("format", "zip"))
+    return workspace.output_archive(backend.extension)
+
+def _report_cache_stats(state_manager: StateManager) -> None:
+    """Log and persist LLM response cache statistics for the run."""
+    cache = get_cache()
+    if cache is None:
+        return
+    stats = cache.stats()
+    CACHE_HIT_RATIO.set(stats["hit_ratio"])
+    logger.info("LLM cache statistics", **stats)
+    state_manager.add_metadata("llm_cache", stats)
+
+def _report_work_items(phase: str) -> None:
+    """Publish the work store's item counts per status after an agent phase."""
+    store = get_work_store()
+    if store is None:
+        return
+    counts = store.count_by_status()
+    for status in WorkItemStatus:
+        WORK_ITEMS.set(counts.get(status.value, 0), phase=phase, status=status.value)
+
+def _report_prompt_sizes(state_manager: StateManager) -> None:
+    """Log and persist estimated prompt token totals per agent."""
+    accountant = get_accountant()
+    if accountant is None:
+        return
+    summary = accountant.summary()
+    logger.info("LLM prompt size summary", agents=summary)
+    state_manager.add_metadata("prompt_tokens", summary)
+
+def _report_handoff_latency(state_manager: StateManager, dispatcher: Dispatcher) -> None:
+    """Log and persist agent handoff latencies against the NFR 1.1 target."""
+    summary = dispatcher.handoff_summary()
+    logger.info("Agent handoff latency", **summary)
+    state_manager.add_metadata("handoff_latency", summary)
+
 @retry(max_attempts=3, delay=1.0)
 def _execute_agent_with_retry(agent) -> None:
     """Execute agent with retry logic."""
     agent.execute()
 
-def _get_agent_instance(name: str, config: Dict[str, Any], rules: Dict[str, Any]):
+def _get_agent_instance(name: str, config: Dict[str, Any], rules: Dict[str, Any],
+                        workspace: Optional[Workspace] = None):
     """Factory method to create agent instances."""
     agent_classes = {
         "planner": PlannerAgent,
@@ -65,4 +199,4 @@ def _get_agent_instance(name: str, config: Dict[str, Any], rules: Dict[str, Any]
     if name not in agent_classes:
         raise ValueError(f"Unknown agent type: {name}")
         
-    return agent_classes[name](config, rules)
\ No newline at end of file
+    return agent_classes[name](config, rules, workspace)
\ No newline at end of file
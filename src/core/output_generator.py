@@ -1,31 +1,273 @@
-import zipfile
+import hashlib
+import json
+import os
+import time
 from pathlib import Path
-from typing import Set
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple, Union
+from .archive_backends import get_archive_backend, ordered_map
+from .tracing import get_tracer
+from .metrics import get_metrics
+from .workspace import Workspace
+from .zip_writer import ZipAssembler, ZipEntry, compress_file, make_reproducible
 
-def create_zip_archive(source_dir: Path, output_path: Path) -> None:
+ZIP_SECONDS = get_metrics().histogram(
+    "pyfactory_zip_duration_seconds", "Time to package the generated project"
+)
+ZIP_BYTES = get_metrics().gauge(
+    "pyfactory_zip_bytes", "Size of the last packaged project archive"
+)
+ZIP_ENTRIES = get_metrics().counter(
+    "pyfactory_zip_entries_total", "Archive members compressed or reused", ("action",)
+)
+
+MANIFEST_VERSION = 1
+
+# Files/directories to exclude
+EXCLUDE: Set[str] = {'__pycache__', '.DS_Store', '.git', '.gitignore'}
+
+def _archive_members(source_dir: Path) -> List[Tuple[Path, str]]:
+    """List the files to package with their archive names, in a stable order."""
+    members = []
+    for file_path in sorted(source_dir.rglob('*')):
+        relative = file_path.relative_to(source_dir)
+        # Also skips the contents of excluded directories
+        if EXCLUDE.intersection(relative.parts):
+            continue
+        if file_path.is_file():
+            members.append((file_path, relative.as_posix()))
+    return members
+
+def manifest_path(output_path: Path) -> Path:
+    """Manifest stored next to an archive, e.g. ``project.zip.manifest.json``."""
+    return output_path.with_name(output_path.name + ".manifest.json")
+
+def _load_manifest(output_path: Path, compression_level: int) -> Dict[str, Dict[str, Any]]:
+    """Return the manifest's entries if they still describe the archive on disk."""
+    try:
+        manifest = json.loads(manifest_path(output_path).read_text())
+        archive = output_path.stat()
+    except (OSError, ValueError):
+        return {}
+    if (manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("compression_level") != compression_level
+            or manifest.get("archive_size") != archive.st_size
+            or manifest.get("archive_mtime_ns") != archive.st_mtime_ns):
+        return {}
+    return manifest["entries"]
+
+def _write_manifest(output_path: Path, compression_level: int,
+                    entries: Dict[str, Dict[str, Any]]) -> None:
+    archive = output_path.stat()
+    path = manifest_path(output_path)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    temp_path.write_text(json.dumps({
+        "version": MANIFEST_VERSION,
+        "compression_level": compression_level,
+        "archive_size": archive.st_size,
+        "archive_mtime_ns": archive.st_mtime_ns,
+        "entries": entries
+    }))
+    os.replace(temp_path, path)
+
+def _prepare_member(file_path: Path, arcname: str, compression_level: int,
+                    record: Optional[Dict[str, Any]]) -> Tuple[ZipEntry, os.stat_result, Optional[int]]:
+    """Compress a file, or describe its entry in the previous archive if it is unchanged.
+    
+    A file is unchanged if its size and modification time match the
+    manifest, or failing that, its content hash does.
+    
+    Returns:
+        The entry, the file's stat result, and the offset of the entry's
+        compressed data in the previous archive when it can be reused
+    """
+    stat = file_path.stat()
+    data = None
+    if record is not None and record["size"] == stat.st_size:
+        unchanged = record["mtime_ns"] == stat.st_mtime_ns
+        if not unchanged:
+            data = file_path.read_bytes()
+            unchanged = hashlib.sha256(data).hexdigest() == record["sha256"]
+        if unchanged:
+            entry = ZipEntry(
+                arcname=arcname,
+                method=record["method"],
+                crc=record["crc"],
+                compressed_size=record["compressed_size"],
+                file_size=stat.st_size,
+                date_time=time.localtime(stat.st_mtime)[:6],
+                mode=stat.st_mode & 0xFFFF,
+                data=None,
+                sha256=record["sha256"]
+            )
+            return entry, stat, record["data_offset"]
+    return compress_file(file_path, arcname, compression_level, data, stat), stat, None
+
+def _prepare_members(members: List[Tuple[Path, str]], compression_level: int,
+                     records: Dict[str, Dict[str, Any]],
+                     max_workers: int) -> Iterator[Tuple[ZipEntry, os.stat_result, Optional[int]]]:
+    """Prepare files in a thread pool, yielding them in order.
+    
+    At most twice ``max_workers`` compressed files are held in memory
+    waiting to be written.
+    """
+    return ordered_map(
+        _prepare_member,
+        ((file_path, arcname, compression_level, records.get(arcname))
+         for file_path, arcname in members),
+        max_workers
+    )
+
+def create_zip_archive(source_dir: Path, output_path: Path,
+                       workspace: Optional[Workspace] = None,
+                       compression_level: int = 6,
+                       max_workers: Optional[int] = None,
+                       incremental: bool = False,
+                       reproducible: bool = False) -> None:
     """Package a directory into a ZIP file, excluding temporary files.
     
+    Files are deflated in parallel by a thread pool and the archive is
+    assembled from the compressed streams in path order. Already
+    compressed formats (images, archives, wheels) are stored. The archive
+    is written to a temporary file and renamed into place.
+    
+    In incremental mode a manifest of each file's size, modification
+    time, content hash and compressed entry is kept next to the archive.
+    The next run copies the compressed data of unchanged files from the
+    previous archive and only compresses changed or new files.
+    
     Args:
         source_dir: Directory to package
         output_path: Destination path for the ZIP file
+        workspace: Workspace that relative paths are resolved against
+        compression_level: zlib level from 0 (store) to 9 (smallest)
+        max_workers: Compression threads, defaults to the number of CPUs
+        incremental: Reuse unchanged entries of the previous archive
+        reproducible: Give every member the same timestamp and normalized
+            permissions, so unchanged files always give the same archive
         
     Raises:
         ValueError: If source_dir doesn't exist or isn't a directory
         OSError: If there are issues creating the ZIP file
     """
+    if workspace is not None:
+        source_dir = workspace.path(source_dir)
+        output_path = workspace.path(output_path)
+    if not source_dir.exists():
+        raise ValueError(f"Source directory does not exist: {source_dir}")
+    if not source_dir.is_dir():
+        raise ValueError(f"Source path is not a directory: {source_dir}")
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    max_workers = max_workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    with get_tracer().span("zip", "io", archive=str(output_path)) as span:
+        members = _archive_members(source_dir)
+        records = _load_manifest(output_path, compression_level) if incremental else {}
+        manifest: Dict[str, Dict[str, Any]] = {}
+        reused = 0
+        temp_path = output_path.with_name(f".{output_path.name}.tmp")
+        previous = open(output_path, "rb") if records else None
+        try:
+            with open(temp_path, "wb") as f:
+                archive = ZipAssembler(f)
+                for entry, stat, reuse_offset in _prepare_members(
+                        members, compression_level, records, max_workers):
+                    if reproducible:
+                        make_reproducible(entry)
+                    if reuse_offset is not None:
+                        previous.seek(reuse_offset)
+                        data_offset = archive.add(entry, previous)
+                        reused += 1
+                    else:
+                        data_offset = archive.add(entry)
+                    manifest[entry.arcname] = {
+                        "size": stat.st_size,
+                        "mtime_ns": stat.st_mtime_ns,
+                        "sha256": entry.sha256,
+                        "method": entry.method,
+                        "crc": entry.crc,
+                        "compressed_size": entry.compressed_size,
+                        "data_offset": data_offset
+                    }
+                archive.close()
+            if previous is not None:
+                # An open file cannot be replaced on every platform
+                previous.close()
+            os.replace(temp_path, output_path)
+        finally:
+            if previous is not None:
+                previous.close()
+            temp_path.unlink(missing_ok=True)
+        
+        if incremental:
+            _write_manifest(output_path, compression_level, manifest)
+        else:
+            manifest_path(output_path).unlink(missing_ok=True)
+        ZIP_ENTRIES.inc(reused, action="reused")
+        ZIP_ENTRIES.inc(len(members) - reused, action="compressed")
+        span.set(files=len(members), reused=reused, bytes=output_path.stat().st_size)
+    ZIP_SECONDS.observe(time.perf_counter() - start)
+    ZIP_BYTES.set(output_path.stat().st_size)
+
+def create_archive(source_dir: Path, output: Union[Path, BinaryIO],
+                   archive_format: str = "zip",
+                   workspace: Optional[Workspace] = None,
+                   compression_level: int = 6,
+                   max_workers: Optional[int] = None,
+                   incremental: bool = False,
+                   reproducible: bool = False) -> None:
+    """Package a directory with one of the archive backends.
+    
+    ZIP archives written to a path go through :func:`create_zip_archive`
+    and may be built incrementally. Every other combination streams the
+    archive: to a temporary file renamed into place, or straight to a
+    writable binary stream such as ``sys.stdout.buffer``.
+    
+    Args:
+        source_dir: Directory to package
+        output: Destination path, or a binary stream to write to
+        archive_format: Name of the backend, see ``ARCHIVE_BACKENDS``
+        workspace: Workspace that relative paths are resolved against
+        compression_level: Backend compression level
+        max_workers: Compression threads, defaults to the number of CPUs
+        incremental: Reuse unchanged entries of a previous ZIP archive
+        reproducible: Fixed timestamps, owners and permissions
+        
+    Raises:
+        ValueError: If source_dir doesn't exist or isn't a directory
+        ConfigurationError: If the format is unknown or unavailable
+    """
+    backend = get_archive_backend(archive_format, compression_level, max_workers, reproducible)
+    if isinstance(output, (str, Path)) and backend.name == "zip":
+        create_zip_archive(source_dir, Path(output), workspace, compression_level,
+                           max_workers, incremental, reproducible)
+        return
+
+    if workspace is not None:
+        source_dir = workspace.path(source_dir)
     if not source_dir.exists():
         raise ValueError(f"Source directory does not exist: {source_dir}")
     if not source_dir.is_dir():
         raise ValueError(f"Source path is not a directory: {source_dir}")
 
-    # Files/directories to exclude
-    EXCLUDE: Set[str] = {'__pycache__', '.DS_Store', '.git', '.gitignore'}
-
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in source_dir.rglob('*'):
-            if file_path.name in EXCLUDE:
-                continue
-                
-            if file_path.is_file():
-                arcname = str(file_path.relative_to(source_dir))
-                zipf.write(file_path, arcname)
\ No newline at end of file
+    start = time.perf_counter()
+    with get_tracer().span("zip", "io", format=backend.name) as span:
+        members = _archive_members(source_dir)
+        if not isinstance(output, (str, Path)):
+            backend.write(members, output)
+            span.set(files=len(members))
+        else:
+            output_path = workspace.path(output) if workspace is not None else Path(output)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = output_path.with_name(f".{output_path.name}.tmp")
+            try:
+                with open(temp_path, "wb") as f:
+                    backend.write(members, f)
+                os.replace(temp_path, output_path)
+            finally:
+                temp_path.unlink(missing_ok=True)
+            size = output_path.stat().st_size
+            span.set(files=len(members), archive=str(output_path), bytes=size)
+            ZIP_BYTES.set(size)
+        ZIP_ENTRIES.inc(len(members), action="compressed")
+    ZIP_SECONDS.observe(time.perf_counter() - start)
@@ -0,0 +1,110 @@
+import math
+import threading
+from typing import Any, Dict, Optional
+from .error_handler import PromptBudgetError
+from .logger import logger
+
+# Rough average for English text and code across common tokenizers
+BYTES_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+class PromptAccountant:
+    """Tracks estimated prompt sizes per agent and enforces token ceilings."""
+    
+    def __init__(self, max_tokens: Optional[int] = None,
+                 agent_limits: Optional[Dict[str, int]] = None):
+        """Initialize the accountant.
+        
+        Args:
+            max_tokens: Default ceiling per prompt, or None for no limit
+            agent_limits: Per-agent ceilings overriding the default
+        """
+        self.max_tokens = max_tokens
+        self.agent_limits = agent_limits or {}
+        self._totals: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        
+    def limit_for(self, agent: str) -> Optional[int]:
+        """Return the token ceiling that applies to an agent."""
+        return self.agent_limits.get(agent, self.max_tokens)
+        
+    def check(self, agent: str, model: str, system_message: str, user_prompt: str) -> int:
+        """Record the size of a prompt about to be sent and enforce its ceiling.
+        
+        Args:
+            agent: Slug of the agent sending the prompt
+            model: Model the prompt is sent to
+            system_message: The system/context message
+            user_prompt: The user's input prompt
+            
+        Returns:
+            The estimated total tokens of the prompt
+            
+        Raises:
+            PromptBudgetError: If the prompt exceeds the agent's ceiling
+        """
+        system_tokens = estimate_tokens(system_message)
+        user_tokens = estimate_tokens(user_prompt)
+        total = system_tokens + user_tokens
+        limit = self.limit_for(agent)
+        
+        with self._lock:
+            totals = self._totals.setdefault(agent or "unknown", {
+                "calls": 0, "tokens": 0, "max_tokens": 0, "rejected": 0
+            })
+            totals["calls"] += 1
+            totals["tokens"] += total
+            totals["max_tokens"] = max(totals["max_tokens"], total)
+            if limit is not None and total > limit:
+                totals["rejected"] += 1
+                
+        logger.info(
+            "LLM prompt size",
+            agent=agent,
+            model=model,
+            system_tokens=system_tokens,
+            user_tokens=user_tokens,
+            total_tokens=total
+        )
+        
+        if limit is not None and total > limit:
+            raise PromptBudgetError(
+                f"Prompt of ~{total} tokens exceeds the {limit} token ceiling",
+                agent=agent
+            )
+        return total
+        
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Return per-agent call counts and estimated token totals."""
+        with self._lock:
+            return {agent: dict(totals) for agent, totals in self._totals.items()}
+
+_accountant: Optional[PromptAccountant] = None
+
+def configure_prompt_budget(settings: Optional[Dict[str, Any]] = None,
+                            agents: Optional[Dict[str, Any]] = None) -> PromptAccountant:
+    """Create the process-wide accountant from the configuration.
+    
+    Args:
+        settings: The ``prompt_budget`` config section
+        agents: The ``agents`` config section, read for ``max_prompt_tokens``
+        
+    Returns:
+        The shared prompt accountant
+    """
+    global _accountant
+    settings = settings or {}
+    agent_limits = {
+        slug: agent_config["max_prompt_tokens"]
+        for slug, agent_config in (agents or {}).items()
+        if isinstance(agent_config, dict) and "max_prompt_tokens" in agent_config
+    }
+    _accountant = PromptAccountant(settings.get("max_tokens"), agent_limits)
+    return _accountant
+
+def get_accountant() -> Optional[PromptAccountant]:
+    """Return the shared prompt accountant, if one has been configured."""
+    return _accountant
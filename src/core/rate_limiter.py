@@ -0,0 +1,134 @@
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a constant rate."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size, defaults to one second of tokens
+        """
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take tokens from the bucket, possibly going into debt.
+
+        Reserving ahead keeps concurrent callers in FIFO order: each caller
+        learns how long to wait for its own tokens without holding the lock.
+
+        Args:
+            amount: Number of tokens to take
+
+        Returns:
+            Seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+class RateLimiter:
+    """Request-rate and token-rate limits shared by every client of one route."""
+
+    def __init__(self, requests_per_second: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 burst: Optional[float] = None):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_second: Sustained request rate, or None for unlimited
+            tokens_per_minute: Sustained token rate, or None for unlimited
+            burst: Maximum number of requests sent back to back
+        """
+        self.requests = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.tokens = (
+            TokenBucket(tokens_per_minute / 60.0, tokens_per_minute)
+            if tokens_per_minute else None
+        )
+        self.throttled = 0
+        self.waited_seconds = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request of ``tokens`` estimated tokens may be sent.
+
+        Returns:
+            Seconds spent waiting
+        """
+        with self._lock:
+            wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(min(tokens, self.tokens.capacity)))
+        if wait > 0:
+            with self._lock:
+                self.waited_seconds += wait
+            time.sleep(wait)
+        return wait
+
+    def record_usage(self, extra_tokens: int) -> None:
+        """Charge tokens reported by the provider beyond the initial estimate."""
+        if self.tokens is not None and extra_tokens > 0:
+            self.tokens.reserve(extra_tokens)
+
+    def penalize(self, seconds: float) -> None:
+        """Hold back every caller after the provider answered with HTTP 429.
+
+        Args:
+            seconds: How long the provider asked clients to wait
+        """
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limit_settings: Dict[str, Any] = {}
+_limiters_lock = threading.Lock()
+
+def configure_rate_limits(settings: Optional[Dict[str, Any]] = None) -> None:
+    """Load per-provider and per-model limits from the ``rate_limits`` config section.
+
+    Provider entries may set requests_per_second, tokens_per_minute and
+    burst, and may override them for individual models under ``models``;
+    limits an override does not name are inherited from the provider.
+    Models without an override share their provider's limiter.
+    """
+    global _limit_settings
+    with _limiters_lock:
+        _limit_settings = settings or {}
+        _limiters.clear()
+
+def get_rate_limiter(provider: str, model: str) -> Optional[RateLimiter]:
+    """Return the shared limiter for a provider and model, if one is configured."""
+    provider_settings = _limit_settings.get(provider)
+    if not provider_settings:
+        return None
+
+    model_settings = (provider_settings.get("models") or {}).get(model)
+    key = (provider, model if model_settings else "")
+    # A model override only replaces the limits it names
+    limits = {key: value for key, value in provider_settings.items() if key != "models"}
+    limits.update(model_settings or {})
+
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = RateLimiter(
+                requests_per_second=limits.get("requests_per_second"),
+                tokens_per_minute=limits.get("tokens_per_minute"),
+                burst=limits.get("burst")
+            )
+        return _limiters[key]
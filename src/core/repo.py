@@ -1,8 +1,10 @@
 import subprocess
+import time
 import yaml
 import json
 from pathlib import Path
 from typing import Dict, Any, TypeVar, Type
+from .error_handler import ValidationError, ConfigurationError, backoff_delay, retry_after_of
 
 T = TypeVar('T', bound='BaseModel')
 
@@ -92,9 +94,11 @@ def load_configuration(config_path: Path) -> Dict[str, Any]:
 class TaskRunner:
     """Core workflow engine for executing tasks with retry logic."""
     
-    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0):
+    def __init__(self, max_retries: int = 3, retry_delay: float = 1.0,
+                 max_delay: float = 60.0):
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_delay = max_delay
     
     def execute(self, task_func: callable, *args, **kwargs) -> Any:
         """
@@ -118,5 +122,10 @@ class TaskRunner:
             except Exception as e:
                 last_error = e
                 if attempt < self.max_retries:
-                    time.sleep(self.retry_delay)
+                    time.sleep(backoff_delay(
+                        attempt,
+                        self.retry_delay,
+                        self.max_delay,
+                        retry_after_of(e)
+                    ))
         raise last_error
\ No newline at end of file
@@ -1,10 +1,15 @@
-from pathlib import Path
+from typing import Dict, Optional
+from .workspace import Workspace
 
-def load_agent_rules(agent_slug: str) -> str:
+AGENT_TYPES = ("planner", "developer", "auditor", "dispatcher")
+
+def load_agent_rules(agent_slug: str, workspace: Optional[Workspace] = None) -> str:
     """Load the rules markdown content for a given agent.
     
     Args:
         agent_slug: The agent identifier (e.g. 'developer', 'planner')
+        workspace: Project whose rules/ directory to read, defaults to the
+            current directory
     
     Returns:
         The content of the rules file as a string
@@ -12,8 +17,22 @@ def load_agent_rules(agent_slug: str) -> str:
     Raises:
         FileNotFoundError: If the rules file doesn't exist
     """
-    rules_path = Path(f"rules/rules-{agent_slug}.md")
+    rules_path = (workspace or Workspace()).rules_dir / f"rules-{agent_slug}.md"
     if not rules_path.exists():
         raise FileNotFoundError(f"Rules file not found: {rules_path}")
         
-    return rules_path.read_text(encoding="utf-8")
\ No newline at end of file
+    return rules_path.read_text(encoding="utf-8")
+
+def load_project_rules(workspace: Workspace) -> Dict[str, str]:
+    """Load the agent rules a project overrides in its own rules/ directory.
+    
+    Args:
+        workspace: Project whose rules/ directory to read
+    
+    Returns:
+        Rules content per agent slug, for agents with a rules file there
+    """
+    return {
+        agent: load_agent_rules(agent, workspace) for agent in AGENT_TYPES
+        if (workspace.rules_dir / f"rules-{agent}.md").exists()
+    }
\ No newline at end of file
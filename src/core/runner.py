@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .http_transport import configure_transport, set_connection_budget
+from .latency import configure_latency
+from .llm_cache import configure_cache
+from .logger import configure_logging, logger
+from .orchestrator import run_pipeline
+from .prompt_budget import configure_prompt_budget
+from .rate_limiter import configure_rate_limits
+from .tracing import configure_tracing
+from .metrics import configure_metrics
+from .workspace import Workspace
+
+def configure_runtime(config: Dict[str, Any]) -> None:
+    """Set up process-wide logging, LLM transport, cache, budgets, limits, tracing and metrics."""
+    configure_logging(config.get("logging"))
+    configure_transport(config.get("http"))
+    configure_cache(config.get("cache"))
+    configure_prompt_budget(config.get("prompt_budget"), config.get("agents"))
+    configure_rate_limits(config.get("rate_limits"))
+    configure_latency(config.get("latency"))
+    configure_tracing(config.get("tracing"))
+    configure_metrics(config.get("metrics"))
+
+def _init_worker(config: Dict[str, Any], connection_budget: Any) -> None:
+    """Prepare a pool process: shared connection budget, then its own runtime."""
+    set_connection_budget(connection_budget)
+    # One endpoint port cannot be shared; each project dumps its metrics file
+    metrics = dict(config.get("metrics") or {}, port=None)
+    configure_runtime(dict(config, metrics=metrics))
+
+def _run_project(config: Dict[str, Any], rules: Dict[str, Any], root: str) -> None:
+    workspace = Workspace(Path(root), config.get("output_dir", "generated_project"))
+    run_pipeline(config, rules, workspace)
+
+def run_projects(config: Dict[str, Any], rules: Dict[str, Any],
+                 roots: List[Union[str, Path]],
+                 max_workers: Optional[int] = None) -> Dict[str, Optional[str]]:
+    """Run one pipeline per project directory concurrently in a process pool.
+
+    Each project runs in its own Workspace with its own signals, state,
+    logs and output. All processes share one budget of in-flight LLM
+    requests, so adding projects does not multiply the load on the
+    provider. Rate limits and the response cache are configured in every
+    process from the same settings; the SQLite cache file is shared.
+
+    Args:
+        config: System configuration dictionary
+        rules: Shared rules per agent; a project's own rules/ directory
+            overrides them
+        roots: Project directories
+        max_workers: Pipelines run at once, defaults to the ``projects``
+            config section or the number of CPUs
+
+    Returns:
+        Mapping of project directory to its error message, None on success
+    """
+    settings = config.get("projects") or {}
+    max_workers = max_workers or settings.get("max_workers") or min(len(roots), os.cpu_count() or 1)
+    max_connections = settings.get(
+        "max_connections", (config.get("http") or {}).get("pool_size", 10)
+    )
+
+    context = multiprocessing.get_context()
+    connection_budget = context.BoundedSemaphore(max_connections)
+    results: Dict[str, Optional[str]] = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(config, connection_budget)) as pool:
+        futures = {
+            pool.submit(_run_project, config, rules, str(root)): str(root)
+            for root in roots
+        }
+        for future in as_completed(futures):
+            root = futures[future]
+            try:
+                future.result()
+                results[root] = None
+                logger.info("Project pipeline completed", project=root)
+            except Exception as e:
+                results[root] = str(e)
+                logger.error("Project pipeline failed", project=root, error=str(e))
+    return results
@@ -0,0 +1,167 @@
+import asyncio
+import heapq
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from .error_handler import ValidationError
+from .logger import logger
+from .models import WorkItem
+from .tracing import get_tracer
+from .metrics import get_metrics
+
+WORK_ITEMS_FINISHED = get_metrics().counter(
+    "pyfactory_work_items_finished_total", "Work items completed, failed or skipped", ("status",)
+)
+
+class WorkItemScheduler:
+    """Runs work items in dependency order across a bounded pool of workers.
+
+    Items whose dependencies have all completed become ready and are
+    started longest critical path first, so the chains that bound the
+    total run time begin as early as possible. Items whose dependencies
+    failed or were skipped are skipped themselves.
+    """
+
+    def __init__(self, items: List[WorkItem], max_concurrency: int = 1,
+                 fail_fast: bool = True,
+                 weights: Optional[Dict[str, float]] = None):
+        """Initialize the scheduler and validate the dependency graph.
+
+        Args:
+            items: All work items of the plan, including completed ones
+            max_concurrency: Maximum number of items in flight
+            fail_fast: Start no further items once any item has failed
+            weights: Estimated cost per item id, 1 for items not listed
+
+        Raises:
+            ValidationError: If an item depends on an unknown item or the
+                dependencies form a cycle
+        """
+        self.items = {item.item_id: item for item in items}
+        self.max_concurrency = max(1, max_concurrency)
+        self.fail_fast = fail_fast
+        self.weights = weights or {}
+        self.dependents: Dict[str, List[str]] = {item_id: [] for item_id in self.items}
+
+        for item in items:
+            for dependency in item.depends_on:
+                if dependency not in self.items:
+                    raise ValidationError(
+                        f"Work item {item.item_id} depends on unknown item {dependency}",
+                        field="depends_on"
+                    )
+                self.dependents[dependency].append(item.item_id)
+        self.ranks = self._critical_path_ranks()
+        self._on_finished: Optional[Callable[[WorkItem], None]] = None
+
+    def _critical_path_ranks(self) -> Dict[str, float]:
+        """Return each item's cost plus the costliest chain of items depending on it."""
+        ranks: Dict[str, float] = {}
+        # Reverse topological order via Kahn's algorithm on the dependents graph
+        remaining = {item_id: len(self.dependents[item_id]) for item_id in self.items}
+        queue = [item_id for item_id, count in remaining.items() if count == 0]
+        while queue:
+            item_id = queue.pop()
+            ranks[item_id] = self.weights.get(item_id, 1.0) + max(
+                (ranks[dependent] for dependent in self.dependents[item_id]), default=0.0
+            )
+            for dependency in self.items[item_id].depends_on:
+                remaining[dependency] -= 1
+                if remaining[dependency] == 0:
+                    queue.append(dependency)
+
+        if len(ranks) != len(self.items):
+            cycle = sorted(set(self.items) - set(ranks))
+            raise ValidationError(
+                f"Work item dependencies form a cycle: {', '.join(cycle)}", field="depends_on"
+            )
+        return ranks
+
+    def critical_path_length(self) -> float:
+        """Estimated cost of the longest dependency chain of the plan."""
+        return max(self.ranks.values(), default=0.0)
+
+    async def run(self, worker: Callable[[WorkItem], Awaitable[None]],
+                  on_finished: Optional[Callable[[WorkItem], None]] = None) -> None:
+        """Run every pending item once its dependencies have completed.
+
+        ``worker`` implements one item and must set its status to
+        'completed' or raise. Items already in flight when another item
+        fails are allowed to finish, then the first failure is raised.
+
+        Args:
+            worker: Coroutine function implementing a single work item
+            on_finished: Called with each item as soon as it has completed,
+                failed or been skipped, e.g. to checkpoint it
+
+        Raises:
+            Exception: The first error raised by ``worker``
+        """
+        self._on_finished = on_finished
+        waiting: Dict[str, Set[str]] = {}
+        ready: List = []
+        for item_id, item in self.items.items():
+            if item.status != "pending":
+                continue
+            unmet = {d for d in item.depends_on if self.items[d].status != "completed"}
+            waiting[item_id] = unmet
+        # Dependencies that already failed in an earlier run
+        for item_id, item in self.items.items():
+            if item.status in ("failed", "skipped"):
+                self._skip_dependents(item_id, waiting)
+        for item_id, unmet in list(waiting.items()):
+            if not unmet:
+                self._push_ready(ready, item_id, waiting)
+
+        errors: List[Exception] = []
+        running: Dict[asyncio.Task, str] = {}
+        while ready or running:
+            while ready and len(running) < self.max_concurrency and not (self.fail_fast and errors):
+                _, item_id = heapq.heappop(ready)
+                running[asyncio.ensure_future(self._run_item(worker, self.items[item_id]))] = item_id
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                item_id = running.pop(task)
+                error = task.exception()
+                if error is not None or self.items[item_id].status != "completed":
+                    errors.append(error or RuntimeError(f"Work item {item_id} did not complete"))
+                    self.items[item_id].status = "failed"
+                    self._finished(self.items[item_id])
+                    self._skip_dependents(item_id, waiting)
+                    continue
+                self._finished(self.items[item_id])
+                for dependent in self.dependents[item_id]:
+                    if dependent in waiting:
+                        waiting[dependent].discard(item_id)
+                        if not waiting[dependent]:
+                            self._push_ready(ready, dependent, waiting)
+
+        if errors:
+            raise errors[0]
+
+    async def _run_item(self, worker: Callable[[WorkItem], Awaitable[None]], item: WorkItem) -> None:
+        with get_tracer().span("work_item", "work_item", item=item.item_id):
+            await worker(item)
+
+    def _finished(self, item: WorkItem) -> None:
+        WORK_ITEMS_FINISHED.inc(status=item.status)
+        if self._on_finished is not None:
+            self._on_finished(item)
+
+    def _push_ready(self, ready: List, item_id: str, waiting: Dict[str, Set[str]]) -> None:
+        del waiting[item_id]
+        heapq.heappush(ready, (-self.ranks[item_id], item_id))
+
+    def _skip_dependents(self, item_id: str, waiting: Dict[str, Set[str]]) -> None:
+        """Mark every pending item that transitively depends on ``item_id`` skipped."""
+        stack = list(self.dependents[item_id])
+        while stack:
+            dependent = stack.pop()
+            if waiting.pop(dependent, None) is None:
+                continue
+            self.items[dependent].status = "skipped"
+            self._finished(self.items[dependent])
+            logger.warning("Skipping work item with failed dependency",
+                           item=dependent, dependency=item_id)
+            stack.extend(self.dependents[dependent])
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+@dataclass
+class Signal:
+    """A signal or work item file waiting to be processed."""
+    path: Path
+    # time.monotonic() when published in this process, None when recovered from disk
+    published_at: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+class SignalBus:
+    """In-process signal bus backed by the signal files on disk.
+
+    Publishing writes the signal file atomically and wakes up any waiting
+    consumer, so handoffs no longer depend on probing the filesystem.
+    Signal files stay on disk until their consumer acknowledges them, which
+    deletes the file (NFR 3.3). A claimed signal is never handed to a second
+    consumer; if the process dies before the acknowledgement, the file is
+    recovered and delivered again on the next start.
+    """
+
+    def __init__(self, signals_dir: Union[str, Path] = "signals",
+                 work_dir: Union[str, Path] = "work_items"):
+        """Initialize the bus and recover signals left on disk.
+
+        Args:
+            signals_dir: Directory holding phase signal files
+            work_dir: Directory holding work item files
+        """
+        self.signals_dir = Path(signals_dir)
+        self.work_dir = Path(work_dir)
+        self._pending: Dict[Path, Signal] = {}
+        self._claimed: Dict[Path, Signal] = {}
+        self._condition = threading.Condition()
+        self.recover()
+
+    def recover(self) -> None:
+        """Index signal and work item files already present on disk."""
+        with self._condition:
+            for directory in (self.signals_dir, self.work_dir):
+                if not directory.exists():
+                    continue
+                for path in sorted(directory.iterdir()):
+                    if path.is_file() and not path.name.startswith(".") \
+                            and path not in self._claimed:
+                        self._pending.setdefault(path, Signal(path))
+            self._condition.notify_all()
+
+    def publish(self, path: Union[str, Path], content: str) -> Signal:
+        """Durably write a signal file and wake up waiting consumers.
+
+        Args:
+            path: Signal or work item file to write
+            content: File contents
+
+        Returns:
+            The published signal
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        signal = Signal(path, time.monotonic())
+        with self._condition:
+            self._pending[path] = signal
+            self._condition.notify_all()
+        return signal
+
+    def is_pending(self, path: Union[str, Path]) -> bool:
+        """Return True if a signal is waiting to be claimed."""
+        with self._condition:
+            return Path(path) in self._pending
+
+    def pending_in(self, directory: Union[str, Path]) -> List[Signal]:
+        """Return the unclaimed signals of one directory in name order."""
+        directory = Path(directory)
+        with self._condition:
+            return sorted(
+                (s for s in self._pending.values() if s.path.parent == directory),
+                key=lambda s: s.name
+            )
+
+    def claim(self, path: Union[str, Path]) -> Optional[Signal]:
+        """Take a pending signal so that no other consumer receives it.
+
+        Returns:
+            The claimed signal, or None if it is not pending
+        """
+        with self._condition:
+            signal = self._pending.pop(Path(path), None)
+            if signal is not None:
+                self._claimed[signal.path] = signal
+            return signal
+
+    def ack(self, signal: Signal) -> None:
+        """Mark a claimed signal as processed and delete its file."""
+        with self._condition:
+            self._claimed.pop(signal.path, None)
+            # The consumer may have published a new signal at the same path
+            if signal.path in self._pending:
+                return
+        signal.path.unlink(missing_ok=True)
+
+    def release(self, signal: Signal) -> None:
+        """Return a claimed signal to the queue after its consumer failed."""
+        with self._condition:
+            if self._claimed.pop(signal.path, None) is not None and signal.path.exists():
+                self._pending.setdefault(signal.path, signal)
+                self._condition.notify_all()
+
+    def wait(self, ready: Callable[[], bool], timeout: Optional[float] = None) -> bool:
+        """Block until ``ready`` holds or the timeout expires.
+
+        ``ready`` is evaluated whenever a signal is published or released.
+
+        Args:
+            ready: Predicate over the bus state
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Returns:
+            The final value of ``ready``
+        """
+        with self._condition:
+            return self._condition.wait_for(ready, timeout)
+
+_bus: Optional[SignalBus] = None
+_bus_lock = threading.Lock()
+
+def configure_signal_bus(signals_dir: Union[str, Path] = "signals",
+                         work_dir: Union[str, Path] = "work_items") -> SignalBus:
+    """Create the process-wide signal bus for a pipeline run."""
+    global _bus
+    with _bus_lock:
+        _bus = SignalBus(signals_dir, work_dir)
+        return _bus
+
+def get_signal_bus() -> SignalBus:
+    """Return the process-wide signal bus, creating a default one on first use."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = SignalBus()
+        return _bus
@@ -1,8 +1,18 @@
 import json
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, asdict
 from .error_handler import ErrorHandler
+from .metrics import get_metrics
+from .workspace import Workspace
+
+STATE_WRITE_SECONDS = get_metrics().histogram(
+    "pyfactory_state_write_seconds", "Time to journal a state update or write a snapshot",
+    ("operation",)
+)
 
 @dataclass
 class ProjectState:
@@ -13,53 +23,170 @@ class ProjectState:
     metadata: Dict[str, Any] = None
 
 class StateManager:
-    """Manages persistent project state across executions."""
-    
-    def __init__(self, state_file: str = "project_state.json"):
-        self.state_file = Path(state_file)
-        self.error_handler = ErrorHandler()
+    """Manages persistent project state across executions.
+
+    The state file holds a snapshot; every update since the snapshot is
+    appended as one JSON line to a write-ahead journal next to it, so an
+    update costs the size of the change rather than of the whole state.
+    Journal writes are fsynced in groups at most ``fsync_interval`` apart.
+    After ``compact_every`` records the state is compacted into a new
+    snapshot, written to a temporary file and atomically renamed, and the
+    journal is truncated. load_state() replays the journal over the
+    snapshot, ignoring a record torn by a crash.
+    """
+
+    def __init__(self, state_file: Optional[str] = None,
+                 fsync_interval: float = 0.05, compact_every: int = 500,
+                 workspace: Optional[Workspace] = None):
+        """Initialize the manager.
+
+        Args:
+            state_file: Location of the state snapshot, defaults to the
+                workspace's project_state.json
+            fsync_interval: Seconds journal writes may wait for a shared
+                fsync, 0 to fsync every write
+            compact_every: Journal records written before compacting
+            workspace: Project whose state is managed, defaults to the
+                current directory
+        """
+        workspace = workspace or Workspace()
+        self.state_file = Path(state_file) if state_file else workspace.state_file
+        self.journal_file = self.state_file.with_name(self.state_file.name + ".journal")
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.error_handler = ErrorHandler(str(workspace.error_log))
         self.state = ProjectState()
         self.state.completed_tasks = {}
         self.state.metadata = {}
-        
+        self._journal = None
+        self._records = 0
+        self._sync_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
     def load_state(self) -> ProjectState:
-        """Load the current project state from file."""
+        """Load the current project state from the snapshot and journal."""
         try:
             if self.state_file.exists():
                 with open(self.state_file) as f:
                     state_data = json.load(f)
                     self.state = ProjectState(**state_data)
+            self.state.completed_tasks = self.state.completed_tasks or {}
+            self.state.metadata = self.state.metadata or {}
+            self._replay_journal()
             return self.state
         except Exception as e:
             self.error_handler.log_error(f"Failed to load state: {str(e)}")
             return self.state
-            
+
+    def _replay_journal(self) -> None:
+        """Apply journaled updates made after the snapshot was written."""
+        if not self.journal_file.exists():
+            return
+        valid_bytes = 0
+        self._records = 0
+        with open(self.journal_file, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final record from a crash; drop it and what follows
+                    break
+                self._apply(record["path"], record["value"])
+                valid_bytes += len(line)
+                self._records += 1
+        if valid_bytes < self.journal_file.stat().st_size:
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _apply(self, path: List[str], value: Any) -> None:
+        if len(path) == 1:
+            setattr(self.state, path[0], value)
+        else:
+            getattr(self.state, path[0])[path[1]] = value
+
     def save_state(self) -> None:
-        """Persist the current project state to file."""
-        try:
-            self.state_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.state_file, "w") as f:
-                json.dump(asdict(self.state), f, indent=2)
-        except Exception as e:
-            self.error_handler.log_error(f"Failed to save state: {str(e)}")
-            raise
-            
+        """Persist the current project state to a snapshot and truncate the journal."""
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                self.state_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.state_file.with_name(f".{self.state_file.name}.tmp")
+                with open(temp_file, "w") as f:
+                    json.dump(asdict(self.state), f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.state_file)
+
+                # The snapshot now covers every journaled update
+                self._close_journal()
+                if self.journal_file.exists():
+                    self.journal_file.unlink()
+                self._records = 0
+            except Exception as e:
+                self.error_handler.log_error(f"Failed to save state: {str(e)}")
+                raise
+            STATE_WRITE_SECONDS.observe(time.perf_counter() - start, operation="snapshot")
+
+    def _journal_update(self, path: List[str], value: Any) -> None:
+        """Apply an update and append it to the journal."""
+        with self._lock:
+            start = time.perf_counter()
+            self._apply(path, value)
+            try:
+                if self._journal is None:
+                    self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+                    self._journal = open(self.journal_file, "a")
+                self._journal.write(json.dumps({"path": path, "value": value}) + "\n")
+                self._journal.flush()
+                self._records += 1
+            except Exception as e:
+                self.error_handler.log_error(f"Failed to journal state: {str(e)}")
+                raise
+            STATE_WRITE_SECONDS.observe(time.perf_counter() - start, operation="journal")
+
+            if self._records >= self.compact_every:
+                self.save_state()
+            elif self.fsync_interval <= 0:
+                os.fsync(self._journal.fileno())
+            elif self._sync_timer is None:
+                # Later updates within the interval share this fsync
+                self._sync_timer = threading.Timer(self.fsync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+
+    def sync(self) -> None:
+        """Flush journaled updates to disk."""
+        with self._lock:
+            self._sync_timer = None
+            if self._journal is not None:
+                os.fsync(self._journal.fileno())
+
+    def _close_journal(self) -> None:
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self) -> None:
+        """Sync and close the journal."""
+        with self._lock:
+            self.sync()
+            self._close_journal()
+
     def mark_task_complete(self, task_id: str) -> None:
         """Mark a task as completed in the state."""
-        self.state.completed_tasks[task_id] = True
-        self.save_state()
-        
+        self._journal_update(["completed_tasks", task_id], True)
+
     def set_current_phase(self, phase: str) -> None:
         """Update the current workflow phase."""
-        self.state.current_phase = phase
-        self.save_state()
-        
+        self._journal_update(["current_phase"], phase)
+
     def record_error(self, error: str) -> None:
         """Record an error that occurred during execution."""
-        self.state.last_error = error
-        self.save_state()
-        
+        self._journal_update(["last_error"], error)
+
     def add_metadata(self, key: str, value: Any) -> None:
         """Add metadata to the project state."""
-        self.state.metadata[key] = value
-        self.save_state()
\ No newline at end of file
+        self._journal_update(["metadata", key], value)
@@ -0,0 +1,85 @@
+import json
+import re
+from typing import Any, Dict, List
+
+FILES_ARRAY_PATTERN = re.compile(r'"files"\s*:\s*\[')
+
+class FileStreamParser:
+    """Incrementally extract file objects from a streamed ``{"files": [...]}`` payload.
+
+    Text is fed in arbitrary chunks as it arrives from the provider. Each
+    object in the ``files`` array is returned as soon as its closing brace
+    has been received, and consumed text is discarded so memory stays
+    bounded by the largest single file rather than the whole response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._scan_pos = 0
+        self._in_array = False
+        self._depth = 0
+        self._object_start = -1
+        self._in_string = False
+        self._escape = False
+        self.complete = False
+        self.files_emitted = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk of response text.
+
+        Args:
+            chunk: The next piece of the streamed response
+
+        Returns:
+            File objects completed by this chunk, in order
+
+        Raises:
+            json.JSONDecodeError: If a completed file object is not valid JSON
+        """
+        if self.complete:
+            return []
+        self._buffer += chunk
+
+        if not self._in_array:
+            match = FILES_ARRAY_PATTERN.search(self._buffer)
+            if not match:
+                return []
+            self._in_array = True
+            self._buffer = self._buffer[match.end():]
+            self._scan_pos = 0
+
+        files = []
+        buffer = self._buffer
+        pos = self._scan_pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the files array itself
+                    self.complete = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and char == "}":
+                    files.append(json.loads(buffer[self._object_start:pos + 1]))
+                    self.files_emitted += 1
+                    buffer = buffer[pos + 1:]
+                    pos = -1
+                    self._object_start = -1
+            pos += 1
+
+        self._buffer = "" if self.complete else buffer
+        self._scan_pos = pos
+        return files
@@ -0,0 +1,168 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from .cassette import CassetteTransport
+
+Responder = Callable[[Dict[str, Any]], str]
+
+def _canned_responder(content: str) -> Responder:
+    return lambda payload: content
+
+class StubLLMServer:
+    """Minimal local OpenAI-compatible chat-completions server.
+
+    Serves ``POST /v1/chat/completions`` (plain and ``stream``) so the
+    pipeline can be exercised and benchmarked over real HTTP without a
+    network. Responses come from a cassette when one is given, otherwise
+    from a responder callable.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 responder: Optional[Responder] = None,
+                 cassette: Optional[str] = None,
+                 latency: float = 0.0):
+        """Create the server without starting it.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind, 0 to pick a free one
+            responder: Callable mapping a request payload to response content
+            cassette: Cassette file to answer recorded requests from
+            latency: Seconds to wait before answering each request
+        """
+        self.responder = responder or _canned_responder('{"files": []}')
+        self.cassette = CassetteTransport(cassette, mode="replay") if cassette else None
+        self.latency = latency
+        self.requests: List[Dict[str, Any]] = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to use as ``http.base_url`` in the configuration."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.cassette is not None:
+            return self.cassette.post_json("chat/completions", payload)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", ""),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.responder(payload)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
+
+    def _stream_lines(self, payload: Dict[str, Any]) -> List[str]:
+        if self.cassette is not None:
+            return list(self.cassette.post_stream("chat/completions", payload))
+        content = self.responder(payload)
+        lines = []
+        for start in range(0, len(content), 32):
+            chunk = {"choices": [{"index": 0, "delta": {"content": content[start:start + 32]}}]}
+            lines.append(f"data: {json.dumps(chunk)}")
+        lines.append("data: [DONE]")
+        return lines
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_HEAD(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self) -> None:
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                server.requests.append(payload)
+                if server.latency:
+                    time.sleep(server.latency)
+
+                try:
+                    if payload.get("stream"):
+                        body = "".join(
+                            f"{line}\n\n" for line in server._stream_lines(payload) if line
+                        ).encode("utf-8")
+                        content_type = "text/event-stream"
+                    else:
+                        body = json.dumps(server._completion(payload)).encode("utf-8")
+                        content_type = "application/json"
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+def main() -> None:
+    """Run the stub server from the command line until interrupted."""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--cassette", help="Cassette file to replay responses from")
+    parser.add_argument("--content", default='{"files": []}',
+                        help="Canned response content when no cassette is given")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds to wait before each response")
+    args = parser.parse_args()
+
+    stub = StubLLMServer(
+        args.host, args.port,
+        responder=_canned_responder(args.content),
+        cassette=args.cassette,
+        latency=args.latency
+    )
+    print(f"Serving stub LLM API at {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+
+if __name__ == "__main__":
+    main()
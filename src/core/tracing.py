@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+@dataclass
+class Span:
+    """One timed operation, possibly nested inside another."""
+    name: str
+    category: str
+    span_id: int
+    parent_id: Optional[int]
+    lane: str
+    start: float
+    duration: float = 0.0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes, e.g. sizes known only once the operation ran."""
+        self.attributes.update(attributes)
+
+class _NullSpan:
+    """Span handed out while tracing is disabled; ignores attributes."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+NULL_SPAN = _NullSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+def _lane() -> str:
+    """Name of the timeline a span is drawn on: its thread, and asyncio task if any."""
+    lane = threading.current_thread().name
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return f"{lane}/{task.get_name()}" if task is not None else lane
+
+class Tracer:
+    """Collects nested spans of a run for a timeline and a summary table.
+
+    Spans nest through a context variable, so each asyncio task and thread
+    has its own stack. Spans from concurrently running work items are drawn
+    on separate lanes, one per thread and task.
+    """
+
+    def __init__(self, enabled: bool = True, max_spans: int = 100000):
+        """Initialize the tracer.
+
+        Args:
+            enabled: Record spans; a disabled tracer costs one check per span
+            max_spans: Spans kept before further spans are dropped
+        """
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", activate: bool = True,
+             **attributes: Any) -> Iterator[Any]:
+        """Time the enclosed block as a span.
+
+        Args:
+            name: Operation name, e.g. ``llm_call``
+            category: Group of the operation, e.g. ``llm`` or ``io``
+            activate: Make the span the parent of spans opened inside the
+                block; generators that yield inside the block must pass
+                False, as their consumer runs in between
+            **attributes: Initial attributes such as the model or item id
+
+        Yields:
+            The span, for setting attributes while it runs
+        """
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        parent = _current_span.get()
+        span = Span(name, category, next(self._ids), parent.span_id if parent else None,
+                    _lane(), time.perf_counter() - self._origin, attributes=attributes)
+        token = _current_span.set(span) if activate else None
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.duration = time.perf_counter() - self._origin - span.start
+            if token is not None:
+                _current_span.reset(token)
+            with self._lock:
+                if len(self.spans) < self.max_spans:
+                    self.spans.append(span)
+                else:
+                    self.dropped += 1
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Return the spans in Chrome trace event format, readable by Perfetto."""
+        pid = os.getpid()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        lanes: Dict[str, int] = {}
+        events = []
+        for span in spans:
+            tid = lanes.setdefault(span.lane, len(lanes) + 1)
+            events.append({
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": round(span.start * 1e6, 3),
+                "dur": round(span.duration * 1e6, 3),
+                "pid": pid,
+                "tid": tid,
+                "args": dict(span.attributes, span_id=span.span_id, parent_id=span.parent_id)
+            })
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": lane}}
+            for lane, tid in lanes.items()
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: Path) -> None:
+        """Write the Chrome trace JSON to ``path``."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Aggregate spans by name, slowest total first.
+
+        Self time excludes the time of child spans, so the rows show where
+        wall-clock time was actually spent rather than counting it once
+        per nesting level.
+
+        Returns:
+            One row per span name with calls, total, self, mean and max
+            seconds
+        """
+        with self._lock:
+            spans = list(self.spans)
+        child_time: Dict[int, float] = {}
+        for span in spans:
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0.0) + span.duration
+
+        rows: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            row = rows.setdefault(span.name, {
+                "name": span.name, "category": span.category, "calls": 0,
+                "total": 0.0, "self": 0.0, "max": 0.0
+            })
+            row["calls"] += 1
+            row["total"] += span.duration
+            # Concurrent children can add up to more than their parent
+            row["self"] += max(0.0, span.duration - child_time.get(span.span_id, 0.0))
+            row["max"] = max(row["max"], span.duration)
+        for row in rows.values():
+            row["mean"] = row["total"] / row["calls"]
+        return sorted(rows.values(), key=lambda row: row["total"], reverse=True)
+
+    def format_summary(self) -> str:
+        """Render :meth:`summary` as a fixed-width text table."""
+        lines = [f"{'span':<24} {'category':<10} {'calls':>7} {'total s':>10} "
+                 f"{'self s':>10} {'mean ms':>10} {'max ms':>10}"]
+        for row in self.summary():
+            lines.append(
+                f"{row['name']:<24} {row['category']:<10} {row['calls']:>7} "
+                f"{row['total']:>10.3f} {row['self']:>10.3f} "
+                f"{row['mean'] * 1000:>10.1f} {row['max'] * 1000:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Discard recorded spans and restart the timeline."""
+        with self._lock:
+            self.spans = []
+            self.dropped = 0
+            self._origin = time.perf_counter()
+
+def bind_context(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a callable to run in a copy of the current context.
+
+    Executors do not carry context variables into their threads; spans
+    opened by the wrapped callable then nest under the caller's span.
+    """
+    return functools.partial(contextvars.copy_context().run, function)
+
+_tracer = Tracer(enabled=False)
+
+def configure_tracing(settings: Optional[Dict[str, Any]] = None) -> Tracer:
+    """Create the process-wide tracer from the ``tracing`` config section.
+
+    Args:
+        settings: Optional mapping with enabled and max_spans
+
+    Returns:
+        The shared tracer
+    """
+    global _tracer
+    settings = settings or {}
+    _tracer = Tracer(
+        enabled=settings.get("enabled", False),
+        max_spans=settings.get("max_spans", 100000)
+    )
+    return _tracer
+
+def get_tracer() -> Tracer:
+    """Return the shared tracer; it records nothing until tracing is enabled."""
+    return _tracer
@@ -0,0 +1,240 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .error_handler import ConfigurationError
+from .workspace import Workspace
+
+@dataclass
+class Lease:
+    """A queued job handed to one worker until the lease expires."""
+    job_id: str
+    payload: Dict[str, Any]
+    worker_id: str
+    token: str
+    expires_at: float
+    attempts: int
+
+class WorkQueue(ABC):
+    """Shared queue of jobs leased to workers.
+
+    A leased job is invisible to other workers until its lease expires;
+    workers extend the lease with heartbeats while they work on it. Jobs
+    whose lease expired are delivered again, up to ``max_attempts`` times.
+    Only the current lease holder can report a result, so a job's result
+    is accepted once even if it was delivered twice.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """Add a job, replacing any earlier job with the same id."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Lease]:
+        """Take the oldest available job, or return None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        """Extend a lease; False means it expired and was handed to another worker."""
+
+    @abstractmethod
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        """Report a job's result; False if the lease is no longer held."""
+
+    @abstractmethod
+    def fail(self, lease: Lease, error: str) -> None:
+        """Report a failed attempt; the job is queued again while attempts remain."""
+
+    @abstractmethod
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"status", "result", "error"}`` once a job is done or failed."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release the queue's resources."""
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue in a SQLite database shared by the orchestrator and its workers.
+
+    Suitable for workers on one host or on a shared filesystem with working
+    file locks.
+    """
+
+    def __init__(self, path: str = "work_queue.sqlite", max_attempts: int = 3):
+        """Open (or create) the queue database.
+
+        Args:
+            path: Location of the SQLite database file
+            max_attempts: Deliveries of a job before it is marked failed
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        # Autocommit; leases use explicit BEGIN IMMEDIATE transactions
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                token TEXT,
+                expires_at REAL NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                enqueued_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, expires_at, enqueued_at)"
+        )
+
+    def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO jobs (job_id, payload, status, enqueued_at)
+                   VALUES (?, ?, 'queued', ?)""",
+                (job_id, json.dumps(payload), time.time())
+            )
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Lease]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose lease ran out without a result are redelivered
+                row = self._conn.execute(
+                    """SELECT job_id, payload, attempts FROM jobs
+                       WHERE status = 'queued' OR (status = 'leased' AND expires_at < ?)
+                       ORDER BY enqueued_at LIMIT 1""",
+                    (now,)
+                ).fetchone()
+                while row is not None and row[2] >= self.max_attempts:
+                    self._conn.execute(
+                        """UPDATE jobs SET status = 'failed', error = 'Lease expired too often'
+                           WHERE job_id = ?""",
+                        (row[0],)
+                    )
+                    row = self._conn.execute(
+                        """SELECT job_id, payload, attempts FROM jobs
+                           WHERE status = 'queued' OR (status = 'leased' AND expires_at < ?)
+                           ORDER BY enqueued_at LIMIT 1""",
+                        (now,)
+                    ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+
+                token = uuid.uuid4().hex
+                expires_at = now + lease_seconds
+                self._conn.execute(
+                    """UPDATE jobs SET status = 'leased', worker_id = ?, token = ?,
+                       expires_at = ?, attempts = attempts + 1 WHERE job_id = ?""",
+                    (worker_id, token, expires_at, row[0])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Lease(row[0], json.loads(row[1]), worker_id, token, expires_at, row[2] + 1)
+
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        expires_at = time.time() + lease_seconds
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET expires_at = ?
+                   WHERE job_id = ? AND token = ? AND status = 'leased'""",
+                (expires_at, lease.job_id, lease.token)
+            )
+        if cursor.rowcount:
+            lease.expires_at = expires_at
+        return bool(cursor.rowcount)
+
+    def complete(self, lease: Lease, result: Dict[str, Any]) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET status = 'done', result = ?, token = NULL
+                   WHERE job_id = ? AND token = ? AND status = 'leased'""",
+                (json.dumps(result), lease.job_id, lease.token)
+            )
+        return bool(cursor.rowcount)
+
+    def fail(self, lease: Lease, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                """UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                   error = ?, token = NULL
+                   WHERE job_id = ? AND token = ? AND status = 'leased'""",
+                (self.max_attempts, error, lease.job_id, lease.token)
+            )
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            # Without a live worker nothing calls lease(), so a job whose last
+            # allowed lease ran out is failed here as well
+            self._conn.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Lease expired too often'
+                   WHERE job_id = ? AND status = 'leased' AND expires_at < ? AND attempts >= ?""",
+                (job_id, time.time(), self.max_attempts)
+            )
+            row = self._conn.execute(
+                "SELECT status, result, error FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None or row[0] not in ("done", "failed"):
+            return None
+        return {"status": row[0], "result": json.loads(row[1]) if row[1] else None, "error": row[2]}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+QUEUE_BACKENDS = {"sqlite": SQLiteWorkQueue}
+
+_queue: Optional[WorkQueue] = None
+
+def open_work_queue(settings: Dict[str, Any], workspace: Optional[Workspace] = None) -> WorkQueue:
+    """Open the queue backend named by the ``work_queue`` config section.
+
+    Raises:
+        ConfigurationError: If the backend is unknown
+    """
+    backend = settings.get("backend", "sqlite")
+    if backend not in QUEUE_BACKENDS:
+        raise ConfigurationError(f"Unknown work queue backend: {backend}", "work_queue.backend")
+    path = (workspace or Workspace()).path(settings.get("path", "work_queue.sqlite"))
+    return QUEUE_BACKENDS[backend](str(path), max_attempts=settings.get("max_attempts", 3))
+
+def configure_work_queue(settings: Optional[Dict[str, Any]] = None,
+                         workspace: Optional[Workspace] = None) -> Optional[WorkQueue]:
+    """Create the process-wide work queue from the ``work_queue`` config section.
+
+    Args:
+        settings: Optional mapping with enabled, backend, path and max_attempts
+        workspace: Workspace that a relative path is resolved against
+
+    Returns:
+        The shared queue, or None if distributed work is disabled
+    """
+    global _queue
+    settings = settings or {}
+    if _queue is not None:
+        _queue.close()
+        _queue = None
+    if settings.get("enabled", False):
+        _queue = open_work_queue(settings, workspace)
+    return _queue
+
+def get_work_queue() -> Optional[WorkQueue]:
+    """Return the shared work queue, or None if work items are implemented locally."""
+    return _queue
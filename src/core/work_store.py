@@ -0,0 +1,322 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from .models import AuditResult, WorkItem, WorkItemStatus
+from .workspace import Workspace
+
+def _status(item: WorkItem) -> str:
+    return WorkItemStatus(item.status).value
+
+class WorkStore:
+    """Indexed SQLite store of work items and audit results.
+
+    The store is the source of truth for the plan: agents query and update
+    items by id or status instead of re-parsing signal files, and the
+    markdown signals are rendered from it as views.
+    """
+
+    def __init__(self, path: str = "project_work.sqlite"):
+        """Open (or create) the store database.
+
+        Args:
+            path: Location of the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS work_items (
+                item_id TEXT PRIMARY KEY,
+                task_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                description TEXT NOT NULL,
+                status TEXT NOT NULL,
+                depends_on TEXT NOT NULL DEFAULT '[]',
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                error_log TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items(status, position)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS audit_results (
+                audit_id TEXT PRIMARY KEY,
+                passed INTEGER NOT NULL,
+                discrepancies TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_results_timestamp ON audit_results(timestamp)"
+        )
+        # Last successful build of each work item, keyed by description so
+        # that it survives re-planning
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS builds (
+                description TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                outputs TEXT NOT NULL,
+                built_at REAL NOT NULL
+            )"""
+        )
+        # Work items whose build the auditor rejected; their cached LLM
+        # responses must not be replayed when they are implemented again
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS rejections (
+                description TEXT PRIMARY KEY,
+                rejected_at REAL NOT NULL
+            )"""
+        )
+        # Auditor verdicts checkpointed per requirement, code and rules
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                verdict INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _row(item: WorkItem, position: int) -> tuple:
+        return (
+            item.item_id, str(item.task_id), position, item.description, _status(item),
+            json.dumps(list(item.depends_on)), item.retry_count, item.error_log, time.time()
+        )
+
+    @staticmethod
+    def _item(row: tuple) -> WorkItem:
+        return WorkItem.from_dict({
+            "item_id": row[0],
+            "task_id": row[1],
+            "description": row[3],
+            "status": row[4],
+            "depends_on": json.loads(row[5]),
+            "retry_count": row[6],
+            "error_log": row[7]
+        })
+
+    def replace_plan(self, items: Iterable[WorkItem]) -> None:
+        """Replace all work items with a new plan, kept in the given order."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM work_items")
+                self._conn.executemany(
+                    "INSERT INTO work_items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._row(item, position) for position, item in enumerate(items)]
+                )
+
+    def save_item(self, item: WorkItem) -> None:
+        """Persist the status, retry count and error log of one work item."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """UPDATE work_items SET status = ?, retry_count = ?, error_log = ?,
+                       updated_at = ? WHERE item_id = ?""",
+                    (_status(item), item.retry_count, item.error_log, time.time(), item.item_id)
+                )
+
+    def save_items(self, items: Iterable[WorkItem]) -> None:
+        """Persist several work items in one transaction."""
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    """UPDATE work_items SET status = ?, retry_count = ?, error_log = ?,
+                       updated_at = ? WHERE item_id = ?""",
+                    [(_status(i), i.retry_count, i.error_log, now, i.item_id) for i in items]
+                )
+
+    def get_item(self, item_id: str) -> Optional[WorkItem]:
+        """Return one work item by id, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM work_items WHERE item_id = ?", (item_id,)
+            ).fetchone()
+        return self._item(row) if row else None
+
+    def get_items(self, status: Optional[str] = None) -> List[WorkItem]:
+        """Return work items in plan order, optionally only those with a status."""
+        with self._lock:
+            if status is None:
+                rows = self._conn.execute("SELECT * FROM work_items ORDER BY position").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM work_items WHERE status = ? ORDER BY position", (status,)
+                ).fetchall()
+        return [self._item(row) for row in rows]
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Return the number of work items per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM work_items GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def reset_failed(self) -> int:
+        """Make failed and skipped items pending again for another attempt.
+
+        Returns:
+            Number of items reset
+        """
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    """UPDATE work_items SET status = 'pending', updated_at = ?
+                       WHERE status IN ('failed', 'skipped')""",
+                    (time.time(),)
+                )
+        return cursor.rowcount
+
+    def save_audit(self, result: AuditResult) -> None:
+        """Persist an audit result."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO audit_results VALUES (?, ?, ?, ?)",
+                    (str(result.audit_id), int(result.passed),
+                     json.dumps(result.discrepancies, default=str), result.timestamp.isoformat())
+                )
+
+    def latest_audit(self) -> Optional[AuditResult]:
+        """Return the most recent audit result, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM audit_results ORDER BY timestamp DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return AuditResult.from_dict({
+            "audit_id": row[0],
+            "passed": bool(row[1]),
+            "discrepancies": json.loads(row[2]),
+            "timestamp": datetime.fromisoformat(row[3])
+        })
+
+    def get_build(self, description: str) -> Optional[Dict[str, Any]]:
+        """Return the recorded fingerprint and output file hashes of a work item."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, outputs FROM builds WHERE description = ?", (description,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "outputs": json.loads(row[1])}
+
+    def record_build(self, description: str, fingerprint: str, outputs: Dict[str, str]) -> None:
+        """Record the fingerprint of a work item and the hashes of the files it produced."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?)",
+                    (description, fingerprint, json.dumps(outputs), time.time())
+                )
+                self._conn.execute("DELETE FROM rejections WHERE description = ?", (description,))
+
+    def invalidate_builds(self, descriptions: Iterable[str]) -> None:
+        """Forget the builds of rejected work items so that they are implemented again.
+
+        The items stay marked as rejected until their next build is
+        recorded, see :meth:`is_rejected`.
+        """
+        now = time.time()
+        descriptions = list(descriptions)
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM builds WHERE description = ?",
+                    [(description,) for description in descriptions]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rejections VALUES (?, ?)",
+                    [(description, now) for description in descriptions]
+                )
+
+    def is_rejected(self, description: str) -> bool:
+        """Whether a work item was rejected and has not been built again since."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM rejections WHERE description = ?", (description,)
+            ).fetchone()
+        return row is not None
+
+    def get_verdict(self, key: str) -> Optional[bool]:
+        """Return a checkpointed audit verdict, or None if there is none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+        return bool(row[0]) if row else None
+
+    def forget_verdicts(self, keys: Iterable[str]) -> None:
+        """Drop checkpointed verdicts so that they are requested again."""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM verdicts WHERE key = ?", [(key,) for key in keys]
+                )
+
+    def record_verdict(self, key: str, verdict: bool) -> None:
+        """Checkpoint an audit verdict as soon as it is known."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?)",
+                    (key, int(verdict), time.time())
+                )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+def render_work_items(items: Iterable[WorkItem]) -> str:
+    """Render work items as the plan lines of a markdown signal."""
+    return "".join(
+        f"- [{_status(item)}] {item.description} "
+        f"<!-- id: {item.item_id}; depends_on: {', '.join(item.depends_on)} -->\n"
+        for item in items
+    )
+
+_store: Optional[WorkStore] = None
+
+def configure_work_store(settings: Optional[Dict[str, Any]] = None,
+                         workspace: Optional[Workspace] = None) -> Optional[WorkStore]:
+    """Create the process-wide work store from the ``work_store`` config section.
+
+    Args:
+        settings: Optional mapping with enabled and path
+        workspace: Workspace that a relative path is resolved against
+
+    Returns:
+        The shared store, or None if it is disabled
+    """
+    global _store
+    settings = settings or {}
+    if _store is not None:
+        _store.close()
+        _store = None
+
+    if settings.get("enabled", True):
+        _store = WorkStore(str((workspace or Workspace()).path(
+            settings.get("path", "project_work.sqlite")
+        )))
+    return _store
+
+def get_work_store() -> Optional[WorkStore]:
+    """Return the shared work store, or None if none is configured.
+
+    Without a store agents read and write work items in the markdown
+    signals only.
+    """
+    return _store
@@ -0,0 +1,115 @@
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+from .agents.developer_agent import DeveloperAgent
+from .logger import logger
+from .work_queue import Lease, WorkQueue
+from .workspace import Workspace
+
+class QueueWorker:
+    """Implements work items leased from a shared work queue.
+
+    The orchestrator's developer builds each item's prompt and enqueues it;
+    a worker, possibly on another machine, leases the job, runs the LLM
+    request under its own transport, cache and rate limits, and reports the
+    validated response back. The orchestrator writes the files, so workers
+    need no access to the project's output directory.
+
+    While a request is running a background thread renews the lease every
+    third of ``lease_seconds``; if the worker dies the lease expires and the
+    job is delivered to another worker.
+    """
+
+    def __init__(self, queue: WorkQueue, config: Dict[str, Any], rules: Dict[str, Any],
+                 workspace: Optional[Workspace] = None, worker_id: Optional[str] = None,
+                 lease_seconds: float = 60.0, poll_interval: float = 1.0):
+        """Initialize the worker.
+
+        Args:
+            queue: Queue shared with the orchestrator
+            config: System configuration dictionary
+            rules: System rules dictionary
+            workspace: Directory for this worker's logs
+            worker_id: Name recorded on leases, defaults to host and pid
+            lease_seconds: How long a lease lasts without a heartbeat
+            poll_interval: Seconds to wait when the queue is empty
+        """
+        self.queue = queue
+        self.agent = DeveloperAgent(config, rules, workspace)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def run(self, max_jobs: Optional[int] = None,
+            idle_timeout: Optional[float] = None) -> int:
+        """Lease and process jobs until stopped.
+
+        Args:
+            max_jobs: Stop after this many jobs, None for no limit
+            idle_timeout: Stop after the queue has been empty this long,
+                None to wait forever
+
+        Returns:
+            Number of jobs processed
+        """
+        processed = 0
+        idle_since = time.monotonic()
+        logger.info("Worker started", worker=self.worker_id)
+        while max_jobs is None or processed < max_jobs:
+            lease = self.queue.lease(self.worker_id, self.lease_seconds)
+            if lease is None:
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.process(lease)
+            processed += 1
+            idle_since = time.monotonic()
+        logger.info("Worker stopped", worker=self.worker_id, jobs=processed)
+        return processed
+
+    def process(self, lease: Lease) -> None:
+        """Run one leased job and report its result to the queue."""
+        payload = lease.payload
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease, stop), daemon=True)
+        heartbeat.start()
+        llm_client = None
+        try:
+            llm_client = self.agent.get_llm_client()
+            if payload.get("refresh"):
+                # The auditor rejected the code this prompt's cached response produced
+                llm_client.invalidate(payload["system_message"], payload["user_prompt"])
+            response = llm_client.prompt(
+                system_message=payload["system_message"],
+                user_prompt=payload["user_prompt"],
+                validate=self.agent._is_valid_implementation
+            )
+            # The router returns the last route's response even if it is invalid
+            if not self.agent._is_valid_implementation(response):
+                raise ValueError("Response does not list the files to write")
+        except Exception as e:
+            # Unparseable responses must not be replayed from the cache on retry
+            if isinstance(e, ValueError) and llm_client is not None:
+                llm_client.invalidate(payload["system_message"], payload["user_prompt"])
+            logger.error("Work item failed", worker=self.worker_id,
+                         job=lease.job_id, attempt=lease.attempts, error=str(e))
+            self.queue.fail(lease, str(e))
+            return
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if self.queue.complete(lease, {"response": response, "worker_id": self.worker_id}):
+            logger.info("Work item completed", worker=self.worker_id, job=lease.job_id)
+        else:
+            logger.warning("Lease lost before completion, result discarded",
+                           worker=self.worker_id, job=lease.job_id)
+
+    def _heartbeat(self, lease: Lease, stop: threading.Event) -> None:
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(lease, self.lease_seconds):
+                logger.warning("Lease expired during work", worker=self.worker_id, job=lease.job_id)
+                return
@@ -0,0 +1,85 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Union
+
+@dataclass(frozen=True)
+class Workspace:
+    """Directory layout of one project run by the pipeline.
+
+    Every path the pipeline reads or writes is resolved against the
+    workspace root, so several projects can run side by side on one host.
+    The default workspace is the current directory, which keeps the
+    historical layout.
+    """
+    root: Path = field(default_factory=Path)
+    output_dir_name: str = "generated_project"
+
+    def __post_init__(self):
+        object.__setattr__(self, "root", Path(self.root))
+
+    def path(self, *parts: Union[str, Path]) -> Path:
+        """Resolve a path relative to the workspace root."""
+        return self.root.joinpath(*parts)
+
+    @property
+    def signals_dir(self) -> Path:
+        return self.path("signals")
+
+    @property
+    def work_items_dir(self) -> Path:
+        return self.path("work_items")
+
+    @property
+    def rules_dir(self) -> Path:
+        return self.path("rules")
+
+    @property
+    def logs_dir(self) -> Path:
+        return self.path("logs")
+
+    @property
+    def log_file(self) -> Path:
+        return self.logs_dir / "app.log"
+
+    @property
+    def error_log(self) -> Path:
+        return self.logs_dir / "errors.log"
+
+    @property
+    def trace_file(self) -> Path:
+        """Chrome trace of the last run, viewable in Perfetto."""
+        return self.logs_dir / "trace.json"
+
+    @property
+    def trace_summary_file(self) -> Path:
+        return self.logs_dir / "trace_summary.txt"
+
+    @property
+    def metrics_file(self) -> Path:
+        """Metrics of the last run in Prometheus text format."""
+        return self.logs_dir / "metrics.prom"
+
+    @property
+    def state_file(self) -> Path:
+        return self.path("project_state.json")
+
+    @property
+    def output_dir(self) -> Path:
+        """Directory the developer writes generated code to."""
+        return self.path(self.output_dir_name)
+
+    @property
+    def output_zip(self) -> Path:
+        return self.path("output", "project.zip")
+
+    def output_archive(self, extension: str) -> Path:
+        """Path of the packaged project for an archive extension, e.g. ``.tar.gz``."""
+        return self.path("output", f"project{extension}")
+
+    def signal(self, name: str) -> Path:
+        """Path of a signal file."""
+        return self.signals_dir / name
+
+    def work_item(self, name: str) -> Path:
+        """Path of a work item file."""
+        return self.work_items_dir / name
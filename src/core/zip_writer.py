@@ -0,0 +1,191 @@
+import hashlib
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, List, Optional, Tuple
+
+# Formats that are already compressed; deflating them again costs time
+# and saves next to nothing
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".mp3", ".mp4", ".webm",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar", ".whl", ".jar",
+    ".egg", ".woff", ".woff2", ".pdf"
+}
+
+# 1980-01-01, the earliest time a ZIP can hold; used by reproducible archives
+# unless SOURCE_DATE_EPOCH says otherwise
+DEFAULT_EPOCH = 315532800
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+_ZIP64_LIMIT = 0xFFFFFFFF
+_UTF8_FLAG = 0x800
+
+@dataclass
+class ZipEntry:
+    """A file member of an archive, with its data already compressed."""
+    arcname: str
+    method: int
+    crc: int
+    compressed_size: int
+    file_size: int
+    date_time: Tuple[int, int, int, int, int, int]
+    mode: int
+    data: Optional[bytes]
+    # SHA-256 of the uncompressed content
+    sha256: str = ""
+
+def _dos_date_time(date_time: Tuple[int, int, int, int, int, int]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    year = min(max(year, 1980), 2107)
+    return ((year - 1980) << 9 | month << 5 | day,
+            hour << 11 | minute << 5 | second // 2)
+
+def compress_file(path: Path, arcname: str, level: int = 6,
+                  data: Optional[bytes] = None,
+                  stat: Optional[os.stat_result] = None) -> ZipEntry:
+    """Compress one file into a raw deflate stream.
+
+    Files with an already-compressed extension, and files that deflate
+    would not shrink, are stored instead. zlib releases the GIL while
+    compressing, so this can run in a thread pool.
+
+    Args:
+        path: File to compress
+        arcname: Name of the member in the archive
+        level: zlib compression level, 0 to store every file
+        data: Content of the file if it was already read
+        stat: Result of stat() on the file if it was already taken
+    """
+    stat = stat or path.stat()
+    data = path.read_bytes() if data is None else data
+    crc = zlib.crc32(data)
+    method = ZIP_STORED
+    payload = data
+    if level > 0 and path.suffix.lower() not in STORED_EXTENSIONS:
+        # Negative window bits: raw deflate without a zlib header, as ZIP expects
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        if len(compressed) < len(data):
+            method, payload = ZIP_DEFLATED, compressed
+    return ZipEntry(
+        arcname=arcname,
+        method=method,
+        crc=crc,
+        compressed_size=len(payload),
+        file_size=len(data),
+        date_time=time.localtime(stat.st_mtime)[:6],
+        mode=stat.st_mode & 0xFFFF,
+        data=payload,
+        sha256=hashlib.sha256(data).hexdigest()
+    )
+
+def reproducible_epoch() -> int:
+    """Timestamp given to every member of a reproducible archive."""
+    return int(os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_EPOCH))
+
+def make_reproducible(entry: ZipEntry) -> ZipEntry:
+    """Drop the host-specific metadata of an entry: fixed timestamp and permissions."""
+    # DOS dates start in 1980, so earlier epochs are clamped to it
+    entry.date_time = time.gmtime(max(reproducible_epoch(), DEFAULT_EPOCH))[:6]
+    entry.mode = 0o100755 if entry.mode & 0o111 else 0o100644
+    return entry
+
+class ZipAssembler:
+    """Writes a ZIP archive from members compressed elsewhere.
+
+    Members are appended in the order they are added; the central
+    directory is written by :meth:`close`. ZIP64 records are used for
+    members or archives too large for the classic format.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        """Start an archive on a writable binary stream."""
+        self.stream = stream
+        self._offset = 0
+        self._central: List[Tuple[ZipEntry, int]] = []
+
+    def add(self, entry: ZipEntry, source: Optional[BinaryIO] = None) -> int:
+        """Append one member's local header and compressed data.
+
+        Args:
+            entry: Member to append
+            source: Stream positioned at the member's compressed data, e.g.
+                in a previous archive, copied when ``entry.data`` is None
+
+        Returns:
+            Offset of the compressed data in the archive
+        """
+        offset = self._offset
+        zip64 = entry.file_size >= _ZIP64_LIMIT or entry.compressed_size >= _ZIP64_LIMIT
+        extra = struct.pack("<HHQQ", 1, 16, entry.file_size, entry.compressed_size) if zip64 else b""
+        name = entry.arcname.encode("utf-8")
+        date, time_of_day = _dos_date_time(entry.date_time)
+        header = _LOCAL_HEADER.pack(
+            0x04034B50, 45 if zip64 else 20, _UTF8_FLAG, entry.method, time_of_day, date,
+            entry.crc,
+            _ZIP64_LIMIT if zip64 else entry.compressed_size,
+            _ZIP64_LIMIT if zip64 else entry.file_size,
+            len(name), len(extra)
+        )
+        self._write(header + name + extra)
+        data_offset = self._offset
+        if entry.data is not None:
+            self._write(entry.data)
+        else:
+            remaining = entry.compressed_size
+            while remaining:
+                chunk = source.read(min(remaining, 1 << 20))
+                if not chunk:
+                    raise ValueError(f"Source ended before the data of {entry.arcname}")
+                self._write(chunk)
+                remaining -= len(chunk)
+        self._central.append((entry, offset))
+        return data_offset
+
+    def close(self) -> None:
+        """Write the central directory and end records."""
+        start = self._offset
+        for entry, offset in self._central:
+            zip64 = (entry.file_size >= _ZIP64_LIMIT or entry.compressed_size >= _ZIP64_LIMIT
+                     or offset >= _ZIP64_LIMIT)
+            extra = (struct.pack("<HHQQQ", 1, 24, entry.file_size, entry.compressed_size, offset)
+                     if zip64 else b"")
+            name = entry.arcname.encode("utf-8")
+            date, time_of_day = _dos_date_time(entry.date_time)
+            header = _CENTRAL_HEADER.pack(
+                0x02014B50, 3 << 8 | 45, 45 if zip64 else 20, _UTF8_FLAG, entry.method,
+                time_of_day, date, entry.crc,
+                _ZIP64_LIMIT if zip64 else entry.compressed_size,
+                _ZIP64_LIMIT if zip64 else entry.file_size,
+                len(name), len(extra), 0, 0, 0, entry.mode << 16,
+                _ZIP64_LIMIT if zip64 else offset
+            )
+            self._write(header + name + extra)
+
+        size = self._offset - start
+        count = len(self._central)
+        if count >= 0xFFFF or size >= _ZIP64_LIMIT or start >= _ZIP64_LIMIT:
+            end64 = self._offset
+            self._write(_ZIP64_END_OF_CENTRAL_DIR.pack(
+                0x06064B50, 44, 3 << 8 | 45, 45, 0, 0, count, count, size, start
+            ))
+            self._write(_ZIP64_LOCATOR.pack(0x07064B50, 0, end64, 1))
+        self._write(_END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(size, _ZIP64_LIMIT), min(start, _ZIP64_LIMIT), 0
+        ))
+        self.stream.flush()
+
+    def _write(self, data: bytes) -> None:
+        self.stream.write(data)
+        self._offset += len(data)
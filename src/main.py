@@ -1,10 +1,16 @@
 import sys
+import json
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any
-from .cli.parser import parse_app_description
+from typing import Optional, Dict, Any, List
+from .cli.parser import parse_app_description, parse_logs_args, parse_worker_args
 from .core.orchestrator import run_pipeline
-from .core.rule_manager import load_agent_rules
+from .core.rule_manager import AGENT_TYPES, load_agent_rules
+from .core.runner import configure_runtime, run_projects
+from .core.log_index import LogIndex
+from .core.work_queue import open_work_queue
+from .core.worker import QueueWorker
+from .core.workspace import Workspace
 
 def load_config() -> Dict[str, Any]:
     """Load and return the application configuration."""
@@ -13,9 +19,83 @@ def load_config() -> Dict[str, Any]:
         return yaml.safe_load(f)
 
 def load_rules() -> Dict[str, str]:
-    """Load rules for all agent types."""
-    agent_types = ["planner", "developer", "auditor", "dispatcher"]
-    return {agent: load_agent_rules(agent) for agent in agent_types}
+    """Load the shared rules for all agent types from the current directory.
+    
+    Each project's pipeline overrides them with the rules in its own
+    rules/ directory, if it has one.
+    """
+    return {agent: load_agent_rules(agent) for agent in AGENT_TYPES}
+
+def apply_packaging_args(config: Dict[str, Any], args: Dict[str, Any]) -> None:
+    """Override the ``packaging`` section with archive options from the CLI."""
+    packaging = dict(config.get("packaging") or {})
+    if args.get("archive_format"):
+        packaging["format"] = args["archive_format"]
+    if args.get("archive_output"):
+        packaging["output"] = args["archive_output"]
+    if args.get("reproducible"):
+        packaging["reproducible"] = True
+    config["packaging"] = packaging
+
+def run_worker(argv: List[str]) -> int:
+    """Entry point of ``pyfactory worker``: serve the shared work queue.
+    
+    Returns:
+        Exit code (0 for success, 1 for failure)
+    """
+    try:
+        args = parse_worker_args(argv)
+        config = load_config()
+        configure_runtime(config)
+        
+        settings = dict(config.get("work_queue") or {})
+        if args["queue"]:
+            settings["path"] = args["queue"]
+        workspace = Workspace(args["project"] or Path(), config.get("output_dir", "generated_project"))
+        queue = open_work_queue(settings, workspace)
+        try:
+            worker = QueueWorker(
+                queue, config, load_rules(), workspace,
+                worker_id=args["worker_id"],
+                lease_seconds=settings.get("lease_seconds", 60),
+                poll_interval=settings.get("poll_interval", 0.5)
+            )
+            worker.run(max_jobs=args["max_jobs"], idle_timeout=args["idle_timeout"])
+        finally:
+            queue.close()
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+def run_logs(argv: List[str]) -> int:
+    """Entry point of ``pyfactory logs``: print log entries matching filters.
+    
+    Returns:
+        Exit code (0 for success, 1 for failure)
+    """
+    try:
+        args = parse_logs_args(argv)
+        index = LogIndex(args["log_file"])
+        try:
+            for entry in index.query(
+                since=args["since"], until=args["until"], level=args["level"],
+                context=args["context"], has=args["has"], text=args["text"],
+                limit=args["limit"]
+            ):
+                if args["output_format"] == "json":
+                    print(json.dumps(entry))
+                else:
+                    context = " ".join(f"{key}={value}" for key, value in entry["context"].items())
+                    print(f"{entry['timestamp']} {entry['level']:<8} {entry['message']} {context}".rstrip())
+        finally:
+            index.close()
+        return 0
+        
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
 
 def main() -> int:
     """Main application entry point.
@@ -23,16 +103,37 @@ def main() -> int:
     Returns:
         Exit code (0 for success, 1 for failure)
     """
+    if sys.argv[1:2] == ["worker"]:
+        return run_worker(sys.argv[2:])
+    if sys.argv[1:2] == ["logs"]:
+        return run_logs(sys.argv[2:])
+    
     try:
         # Parse application description
-        parse_app_description()
+        args = parse_app_description()
         
         # Load configuration and rules
         config = load_config()
         rules = load_rules()
+        apply_packaging_args(config, args)
+        
+        # Several projects run concurrently, each in its own process
+        projects = args["projects"]
+        if len(projects) > 1:
+            results = run_projects(config, rules, projects, max_workers=args["jobs"])
+            for project, error in results.items():
+                if error:
+                    print(f"Error in {project}: {error}", file=sys.stderr)
+            return 1 if any(results.values()) else 0
+        
+        # Warm up the shared LLM transport before the first agent runs
+        configure_runtime(config)
         
         # Run the main pipeline with config and rules
-        run_pipeline(config, rules)
+        workspace = None
+        if projects:
+            workspace = Workspace(projects[0], config.get("output_dir", "generated_project"))
+        run_pipeline(config, rules, workspace)
         
         return 0
         
@@ -0,0 +1,382 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from pathlib import Path
+
+from src.core.agents.developer_agent import DeveloperAgent
+from src.core.agents.auditor_agent import AuditorAgent
+from src.core.agents.planner_agent import PlannerAgent
+from src.core.error_handler import SecurityError
+from src.core.models import WorkItem
+from src.core.model_router import RoutedClient
+from src.core.work_store import WorkStore
+from src.core.work_queue import SQLiteWorkQueue
+from src.core.worker import QueueWorker
+
+def _write_plan(tmp_path, count):
+    plan = tmp_path / "signals/PLANNING_COMPLETE.md"
+    plan.parent.mkdir(exist_ok=True)
+    plan.write_text("## Work Items:\n" + "".join(
+        f"- [pending] Implement module {i}\n" for i in range(count)
+    ))
+
+def _developer(max_concurrency, delay=0.05):
+    agent = DeveloperAgent({"agents": {"developer": {"max_concurrency": max_concurrency}}}, {})
+    
+    async def aprompt(system_message, user_prompt, validate=None):
+        await asyncio.sleep(delay)
+        index = user_prompt.split("Implement module ")[1].split()[0]
+        return f'{{"files": [{{"path": "mod_{index}.py", "content": "x = {index}"}}]}}'
+    
+    agent._llm_client = Mock(spec=RoutedClient)
+    agent._llm_client.aprompt.side_effect = aprompt
+    return agent
+
+class TestDeveloperAgent:
+    """Test suite for DeveloperAgent execution modes."""
+    
+    def test_concurrent_execution_is_bounded_and_complete(self, tmp_path, monkeypatch):
+        """Test concurrent mode writes every file and overlaps LLM calls."""
+        monkeypatch.chdir(tmp_path)
+        _write_plan(tmp_path, 8)
+        agent = _developer(max_concurrency=4)
+        
+        start = time.perf_counter()
+        agent.execute()
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 8 * 0.05
+        assert (tmp_path / "signals/IMPLEMENTATION_COMPLETE.md").exists()
+        for i in range(8):
+            assert (tmp_path / f"generated_project/mod_{i}.py").read_text() == f"x = {i}"
+    
+    def test_concurrent_failure_stops_new_items(self, tmp_path, monkeypatch):
+        """Test a failing item stops further items from starting."""
+        monkeypatch.chdir(tmp_path)
+        _write_plan(tmp_path, 6)
+        agent = _developer(max_concurrency=2)
+        agent._llm_client.aprompt.side_effect = RuntimeError("provider down")
+        
+        with pytest.raises(RuntimeError):
+            agent.execute()
+        
+        assert agent._llm_client.aprompt.call_count <= 2
+        assert not (tmp_path / "signals/IMPLEMENTATION_COMPLETE.md").exists()
+    
+    def test_dependencies_are_implemented_first(self, tmp_path, monkeypatch):
+        """Test annotated plan items only start after the items they depend on."""
+        monkeypatch.chdir(tmp_path)
+        plan = tmp_path / "signals/PLANNING_COMPLETE.md"
+        plan.parent.mkdir()
+        plan.write_text(
+            "- [pending] Implement module 0 <!-- id: app; depends_on: lib, cfg -->\n"
+            "- [pending] Implement module 1 <!-- id: lib; depends_on:  -->\n"
+            "- [pending] Implement module 2 <!-- id: cfg; depends_on: lib -->\n"
+        )
+        agent = _developer(max_concurrency=4)
+        
+        agent.execute()
+        
+        prompts = [call.kwargs["user_prompt"] for call in agent._llm_client.aprompt.call_args_list]
+        assert [p.split("Implement module ")[1][0] for p in prompts] == ["1", "2", "0"]
+    
+    def test_work_item_status_is_stored(self, tmp_path, monkeypatch):
+        """Test a configured work store receives the plan and final statuses."""
+        monkeypatch.chdir(tmp_path)
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        monkeypatch.setattr("src.core.work_store._store", store)
+        _write_plan(tmp_path, 3)
+        agent = _developer(max_concurrency=2)
+        
+        agent.execute()
+        
+        assert store.count_by_status() == {"completed": 3}
+        assert [item.item_id for item in store.get_items()] == ["item-001", "item-002", "item-003"]
+    
+    def test_unchanged_items_are_not_rebuilt(self, tmp_path, monkeypatch):
+        """Test a re-plan only re-implements items whose build is stale or rejected."""
+        monkeypatch.chdir(tmp_path)
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        monkeypatch.setattr("src.core.work_store._store", store)
+        _write_plan(tmp_path, 3)
+        agent = _developer(max_concurrency=2)
+        
+        agent.execute()
+        (tmp_path / "generated_project/mod_0.py").write_text("edited")
+        store.invalidate_builds(["Implement module 2"])
+        store.replace_plan(agent._parse_work_items((tmp_path / "signals/PLANNING_COMPLETE.md").read_text()))
+        agent.execute()
+        
+        prompts = [call.kwargs["user_prompt"] for call in agent._llm_client.aprompt.call_args_list[3:]]
+        assert sorted(p.split("Implement module ")[1][0] for p in prompts) == ["0", "2"]
+        assert (tmp_path / "generated_project/mod_0.py").read_text() == "x = 0"
+    
+    def test_rejected_item_is_regenerated_instead_of_replayed(self, tmp_path, monkeypatch):
+        """Test an item the auditor rejects is rebuilt from a fresh LLM response."""
+        monkeypatch.chdir(tmp_path)
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        monkeypatch.setattr("src.core.work_store._store", store)
+        _write_plan(tmp_path, 2)
+        agent = _developer(max_concurrency=2)
+        cache, versions = {}, {}
+        
+        async def aprompt(system_message, user_prompt, validate=None):
+            # Answers from the cache like the real client does
+            index = user_prompt.split("Implement module ")[1].split()[0]
+            if user_prompt not in cache:
+                versions[index] = versions.get(index, 0) + 1
+                cache[user_prompt] = (f'{{"files": [{{"path": "mod_{index}.py", '
+                                      f'"content": "v{versions[index]}"}}]}}')
+            return cache[user_prompt]
+        
+        agent._llm_client.aprompt.side_effect = aprompt
+        agent._llm_client.invalidate.side_effect = lambda system, user: cache.pop(user, None)
+        auditor = AuditorAgent({}, {})
+        auditor._llm_client = Mock(spec=RoutedClient)
+        auditor._llm_client.prompt.side_effect = (
+            lambda system_message, user_prompt, validate=None:
+            "NO" if "module 0" in user_prompt else "YES"
+        )
+        verification = {"coverage": "95%", "tests": "passed"}
+        
+        agent.execute()
+        assert not auditor._perform_audit(auditor._load_work_items(""), verification)
+        store.replace_plan(agent._parse_work_items((tmp_path / "signals/PLANNING_COMPLETE.md").read_text()))
+        agent.execute()
+        
+        assert (tmp_path / "generated_project/mod_0.py").read_text() == "v2"
+        assert versions == {"0": 2, "1": 1}
+        assert not store.is_rejected("Implement module 0")
+        # The rebuilt item is audited again rather than failed from the checkpoint
+        auditor._perform_audit(auditor._load_work_items(""), verification)
+        assert auditor._llm_client.prompt.call_count == 3
+    
+    def test_retry_resumes_at_unfinished_items(self, tmp_path, monkeypatch):
+        """Test items checkpointed before a failure are not implemented again."""
+        monkeypatch.chdir(tmp_path)
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        monkeypatch.setattr("src.core.work_store._store", store)
+        _write_plan(tmp_path, 4)
+        agent = _developer(max_concurrency=2)
+        implement = agent._llm_client.aprompt.side_effect
+        failures = iter([RuntimeError("provider down")])
+        
+        async def flaky(system_message, user_prompt, validate=None):
+            if "module 3" in user_prompt:
+                error = next(failures, None)
+                if error:
+                    raise error
+            return await implement(system_message, user_prompt, validate)
+        
+        agent._llm_client.aprompt.side_effect = flaky
+        with pytest.raises(RuntimeError):
+            agent.execute()
+        calls = agent._llm_client.aprompt.call_count
+        unfinished = 4 - store.count_by_status().get("completed", 0)
+        agent.execute()
+        
+        assert 0 < unfinished < 4
+        assert agent._llm_client.aprompt.call_count - calls == unfinished
+        assert store.count_by_status() == {"completed": 4}
+        assert store.get_item("item-004").retry_count == 1
+    
+    def test_work_items_are_implemented_by_queue_workers(self, tmp_path, monkeypatch):
+        """Test distributed mode enqueues items and applies the workers' responses."""
+        monkeypatch.chdir(tmp_path)
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"))
+        monkeypatch.setattr("src.core.work_queue._queue", queue)
+        _write_plan(tmp_path, 4)
+        agent = _developer(max_concurrency=1)
+        agent.config["work_queue"] = {"poll_interval": 0.01}
+        
+        def prompt(system_message, user_prompt, validate=None):
+            index = user_prompt.split("Implement module ")[1].split()[0]
+            return f'{{"files": [{{"path": "mod_{index}.py", "content": "x = {index}"}}]}}'
+        
+        workers = []
+        for name in ("w1", "w2"):
+            worker = QueueWorker(queue, {}, {}, worker_id=name, poll_interval=0.01)
+            worker.agent._llm_client = Mock(spec=RoutedClient)
+            worker.agent._llm_client.prompt.side_effect = prompt
+            workers.append(worker)
+        threads = [threading.Thread(target=w.run, kwargs={"idle_timeout": 0.5}) for w in workers]
+        for thread in threads:
+            thread.start()
+        
+        agent.execute()
+        for thread in threads:
+            thread.join()
+        
+        agent._llm_client.aprompt.assert_not_called()
+        assert sum(w.agent._llm_client.prompt.call_count for w in workers) == 4
+        for i in range(4):
+            assert (tmp_path / f"generated_project/mod_{i}.py").read_text() == f"x = {i}"
+    
+    def test_invalid_worker_response_fails_job_and_item(self, tmp_path, monkeypatch):
+        """Test an unparseable response fails the job, then the item, like local failures."""
+        monkeypatch.chdir(tmp_path)
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=1)
+        monkeypatch.setattr("src.core.work_queue._queue", queue)
+        _write_plan(tmp_path, 1)
+        agent = _developer(max_concurrency=1)
+        agent.config["work_queue"] = {"poll_interval": 0.01}
+        worker = QueueWorker(queue, {}, {}, worker_id="w1", poll_interval=0.01)
+        worker.agent._llm_client = Mock(spec=RoutedClient)
+        worker.agent._llm_client.prompt.return_value = "not json"
+        thread = threading.Thread(target=worker.run, kwargs={"idle_timeout": 0.3})
+        thread.start()
+        
+        with patch.object(agent.error_handler, "log_error") as log_error:
+            with pytest.raises(RuntimeError):
+                agent.execute()
+        thread.join()
+        
+        worker.agent._llm_client.invalidate.assert_called_once()
+        log_error.assert_called_once()
+    
+    def test_worker_fails_job_when_client_cannot_be_built(self, tmp_path, monkeypatch):
+        """Test a client construction error fails the job and stops its heartbeat."""
+        monkeypatch.chdir(tmp_path)
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=1)
+        queue.enqueue("job-1", {"system_message": "s", "user_prompt": "u"})
+        worker = QueueWorker(queue, {}, {}, worker_id="w1", lease_seconds=0.03)
+        worker.agent.get_llm_client = Mock(side_effect=RuntimeError("no API key"))
+        
+        threads = threading.active_count()
+        
+        worker.process(queue.lease("w1", 0.03))
+        
+        assert queue.result("job-1") == {"status": "failed", "result": None, "error": "no API key"}
+        assert threading.active_count() == threads
+    
+    def test_remote_item_fails_when_no_worker_reports(self, tmp_path, monkeypatch):
+        """Test the wait for a worker is bounded by work_queue.result_timeout."""
+        monkeypatch.chdir(tmp_path)
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        monkeypatch.setattr("src.core.work_store._store", store)
+        monkeypatch.setattr("src.core.work_queue._queue", SQLiteWorkQueue(str(tmp_path / "queue.sqlite")))
+        _write_plan(tmp_path, 1)
+        agent = _developer(max_concurrency=1)
+        agent.config["work_queue"] = {"poll_interval": 0.01, "result_timeout": 0.05}
+        
+        with pytest.raises(RuntimeError):
+            agent.execute()
+        
+        item = store.get_item("item-001")
+        assert item.status == "failed" and item.retry_count == 1
+        assert "No worker reported" in item.error_log
+    
+    def test_streaming_writes_files_before_stream_ends(self, tmp_path, monkeypatch):
+        """Test streaming mode materializes each file as soon as it is complete."""
+        monkeypatch.chdir(tmp_path)
+        _write_plan(tmp_path, 1)
+        agent = DeveloperAgent({"agents": {"developer": {"streaming": True}}}, {})
+        seen_before_end = []
+        
+        def stream(system_message, user_prompt):
+            yield '{"files": [{"path": "first.py", "content": "a = 1"},'
+            seen_before_end.append((tmp_path / "generated_project/first.py").exists())
+            yield ' {"path": "second.py", "content": "b = 2"}]}'
+        
+        agent._llm_client = Mock(spec=RoutedClient)
+        agent._llm_client.stream.side_effect = stream
+        
+        agent.execute()
+        
+        assert seen_before_end == [True]
+        assert (tmp_path / "generated_project/second.py").read_text() == "b = 2"
+    
+    def test_files_outside_the_project_are_rejected(self, tmp_path, monkeypatch):
+        """Test generated paths may not escape the project directory."""
+        monkeypatch.chdir(tmp_path)
+        agent = DeveloperAgent({"agents": {"developer": {}}}, {})
+        (tmp_path / "generated_project").mkdir()
+        (tmp_path / "generated_project/link").symlink_to(tmp_path)
+        
+        assert agent._write_file({"path": "pkg/mod.py", "content": "x = 1"}).exists()
+        for path in ("../escape.py", str(tmp_path / "abs.py"), "~/home.py",
+                     "link/escape.py", "run.sh"):
+            with pytest.raises(SecurityError):
+                agent._write_file({"path": path, "content": ""})
+        assert not (tmp_path / "escape.py").exists()
+    
+    def test_prompt_prefix_is_stable_and_agent_specific(self):
+        """Test only the developer's rules are sent, in an identical system message."""
+        rules = {"developer": "DEV RULES", "auditor": "AUDIT RULES"}
+        agent = DeveloperAgent({}, rules)
+        first = WorkItem()
+        first.description = "Implement module 1"
+        second = WorkItem()
+        second.description = "Implement module 2"
+        
+        system_one, user_one = agent._build_implementation_prompt(first)
+        system_two, user_two = agent._build_implementation_prompt(second)
+        
+        assert system_one == system_two
+        assert "DEV RULES" in system_one and "AUDIT RULES" not in system_one
+        assert "Implement module 1" in user_one and "Implement module 2" in user_two
+
+class TestPlannerAgent:
+    """Test suite for PlannerAgent plan validation."""
+    
+    def test_inconsistent_plans_are_rejected(self):
+        """Test duplicate ids and unknown dependencies fail validation and the plan."""
+        agent = PlannerAgent({}, {})
+        agent._llm_client = Mock(spec=RoutedClient)
+        valid = '{"work_items": [{"id": "a", "description": "A"}, {"id": "b", "description": "B", "depends_on": ["a"]}]}'
+        duplicate = '{"work_items": [{"id": "a", "description": "A"}, {"id": "a", "description": "B"}]}'
+        unknown = '{"work_items": [{"id": "a", "description": "A", "depends_on": ["z"]}]}'
+        agent._llm_client.prompt.return_value = valid
+        
+        items = agent._parse_spec_to_work_items("spec")
+        assert [(item.item_id, item.depends_on) for item in items] == [("a", []), ("b", ["a"])]
+        validate = agent._llm_client.prompt.call_args.kwargs["validate"]
+        assert not RoutedClient._is_valid(validate, duplicate)
+        assert not RoutedClient._is_valid(validate, unknown)
+        
+        agent._llm_client.prompt.return_value = duplicate
+        with patch.object(agent.error_handler, "log_error"):
+            with pytest.raises(RuntimeError):
+                agent._parse_spec_to_work_items("spec")
+        agent._llm_client.invalidate.assert_called_once()
+
+class TestAuditorAgent:
+    """Test suite for AuditorAgent verification."""
+    
+    def test_batched_verification_with_individual_fallback(self):
+        """Test verdicts come from batched prompts and missing ones are retried alone."""
+        agent = AuditorAgent({"agents": {"auditor": {"batch_token_budget": 10000}}}, {})
+        items = [{"description": f"Item {i}", "status": "completed"} for i in range(4)]
+        agent._llm_client = Mock(spec=RoutedClient)
+        agent._llm_client.prompt.side_effect = [
+            '{"verdicts": [{"id": 1, "verdict": "YES"}, {"id": 2, "verdict": "no"}, {"id": 4, "verdict": "YES"}]}',
+            "YES"
+        ]
+        
+        assert agent._verify_work_items_batched(items) == [True, False, True, True]
+        assert agent._llm_client.prompt.call_count == 2
+        
+    def test_checkpointed_verdicts_are_not_requested_again(self, tmp_path, monkeypatch):
+        """Test a repeated audit reuses verdicts stored by the first attempt."""
+        monkeypatch.setattr("src.core.work_store._store", WorkStore(str(tmp_path / "work.sqlite")))
+        agent = AuditorAgent({}, {})
+        items = [{"description": f"Item {i}", "status": "completed"} for i in range(3)]
+        agent._llm_client = Mock(spec=RoutedClient)
+        agent._llm_client.prompt.side_effect = ["YES", "NO", "YES", "NO"]
+        verification = {"coverage": "95%", "tests": "passed"}
+        
+        assert not agent._perform_audit(items, verification)
+        assert not agent._perform_audit(items, verification)
+        # Only the rejected item is asked again; its build was invalidated
+        assert agent._llm_client.prompt.call_count == 4
+        
+    def test_batches_respect_token_budget(self):
+        """Test items are split across prompts when they exceed the budget."""
+        agent = AuditorAgent({"agents": {"auditor": {"batch_token_budget": 400}}}, {})
+        items = [{"description": "x" * 400, "status": "completed"} for _ in range(6)]
+        
+        batches = agent._pack_verification_batches(items, "system")
+        
+        assert [len(batch) for batch in batches] == [3, 3]
@@ -1,10 +1,44 @@
 import pytest
+import json
+import time
+import asyncio
+import threading
+import requests
 from unittest.mock import Mock, patch
 from pathlib import Path
 
 from src.core.state_manager import StateManager, ProjectState
 from src.core.llm_client import LLMClient, LLMConfig
-from src.core.error_handler import ErrorHandler
+from src.core.http_transport import HTTPTransport
+from src.core.llm_cache import LLMCache
+from src.core.stream_parser import FileStreamParser
+from src.core.cassette import CassetteTransport
+from src.core.stub_server import StubLLMServer
+from src.core.model_router import ModelRouter
+from src.core.error_handler import (
+    ErrorHandler, PromptBudgetError, RateLimitError, CassetteError, ConfigurationError,
+    ValidationError,
+    backoff_delay, parse_retry_after, retry_after_of
+)
+from src.core.prompt_budget import PromptAccountant, estimate_tokens
+from src.core.rate_limiter import RateLimiter, TokenBucket
+from src.core.repo import TaskRunner
+from src.core.dispatcher import Dispatcher
+from src.core.signal_bus import SignalBus
+from src.core.scheduler import WorkItemScheduler
+from src.core.models import WorkItem, AuditResult
+from src.core.work_store import WorkStore, render_work_items
+from src.core.work_queue import SQLiteWorkQueue
+from src.core.tracing import Tracer
+from src.core.metrics import MetricsRegistry, MetricsServer
+from src.core.logger import StructuredLogger, LogLevel
+from src.core.log_index import LogIndex, entry_meta
+from src.core.output_generator import create_archive, create_zip_archive
+from src.core.archive_backends import TarZstBackend
+from src.core.zip_writer import DEFAULT_EPOCH
+from src.core.workspace import Workspace
+from src.core.runner import run_projects
+from src.core.latency import HedgeBudget, HedgePolicy, LatencyTracker
 
 class TestStateManager:
     """Test suite for StateManager functionality."""
@@ -31,32 +65,895 @@ class TestStateManager:
             data = json.load(f)
             assert data["current_phase"] == "testing"
 
+    def test_updates_are_journaled_and_replayed(self, tmp_path):
+        """Test updates append to the journal and survive a torn final record."""
+        state_file = tmp_path / "state.json"
+        manager = StateManager(str(state_file), fsync_interval=0)
+        manager.set_current_phase("executing_developer")
+        manager.mark_task_complete("planner")
+        manager.add_metadata("runs", 2)
+        manager.close()
+        
+        journal = tmp_path / "state.json.journal"
+        assert not state_file.exists()
+        with open(journal, "a") as f:
+            f.write('{"path": ["current_phase"], "val')
+        
+        state = StateManager(str(state_file)).load_state()
+        assert state.current_phase == "executing_developer"
+        assert state.completed_tasks == {"planner": True}
+        assert state.metadata == {"runs": 2}
+        assert journal.read_text().endswith("2}\n")
+        
+    def test_journal_is_compacted_into_snapshot(self, tmp_path):
+        """Test the journal is folded into the snapshot after enough records."""
+        state_file = tmp_path / "state.json"
+        manager = StateManager(str(state_file), compact_every=3)
+        for task in ("a", "b", "c", "d"):
+            manager.mark_task_complete(task)
+        manager.close()
+        
+        assert json.loads(state_file.read_text())["completed_tasks"] == {"a": True, "b": True, "c": True}
+        assert StateManager(str(state_file)).load_state().completed_tasks == {
+            "a": True, "b": True, "c": True, "d": True
+        }
+
 class TestLLMClient:
     """Test suite for LLMClient functionality."""
     
-    @patch('requests.post')
-    def test_prompt_success(self, mock_post):
+    def test_prompt_success(self, tmp_path):
         """Test successful LLM prompt."""
-        mock_response = Mock()
-        mock_response.json.return_value = {
+        transport = Mock(spec=HTTPTransport)
+        transport.post_json.return_value = {
             "choices": [{"message": {"content": "test response"}}]
         }
-        mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
         
-        client = LLMClient(LLMConfig(provider="test", model="test"))
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"), transport,
+                           error_log=tmp_path / "errors.log")
         response = client.prompt("system", "user")
         
         assert response == "test response"
+        transport.post_json.assert_called_once()
         
-    @patch('requests.post')
-    def test_prompt_failure(self, mock_post):
+    def test_prompt_failure(self, tmp_path):
         """Test failed LLM prompt raises exception."""
-        mock_post.side_effect = Exception("API error")
+        transport = Mock(spec=HTTPTransport)
+        transport.post_json.side_effect = Exception("API error")
         
-        client = LLMClient(LLMConfig(provider="test", model="test"))
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"), transport,
+                           error_log=tmp_path / "errors.log")
         with pytest.raises(RuntimeError):
             client.prompt("system", "user")
+        assert "API error" in (tmp_path / "errors.log").read_text()
+
+    def test_stream_parses_sse_deltas(self, tmp_path):
+        """Test streamed completions yield content deltas until [DONE]."""
+        transport = Mock(spec=HTTPTransport)
+        transport.post_stream.return_value = iter([
+            ": keep-alive",
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            "",
+            'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+            'data: {"choices": [{"delta": {"content": "lo"}}]}',
+            "data: [DONE]"
+        ])
+        
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"), transport,
+                           error_log=tmp_path / "errors.log")
+        
+        assert list(client.stream("system", "user")) == ["Hel", "lo"]
+        assert transport.post_stream.call_args[0][1]["stream"] is True
+
+    def test_stream_uses_and_feeds_adaptive_timeouts(self, tmp_path, monkeypatch):
+        """Test streams get the model's adaptive timeout and record their latency."""
+        tracker = LatencyTracker(adaptive_timeouts=True, min_samples=1, min_timeout=1)
+        monkeypatch.setattr("src.core.llm_client.get_latency_tracker", lambda: tracker)
+        tracker.record("test", 2.0)
+        transport = Mock(spec=HTTPTransport)
+        transport.post_stream.return_value = iter([
+            'data: {"choices": [{"delta": {"content": "Hi"}}]}', "data: [DONE]"
+        ])
+        
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"), transport,
+                           error_log=tmp_path / "errors.log")
+        assert list(client.stream("system", "user")) == ["Hi"]
+        
+        assert transport.post_stream.call_args.kwargs["timeout"] == tracker.timeout_for("test", 30)
+        assert tracker.histogram("test").count == 2
+
+class TestFileStreamParser:
+    """Test suite for the incremental files payload parser."""
+    
+    def test_files_emitted_as_soon_as_complete(self):
+        """Test each file object is returned once its closing brace arrives."""
+        payload = json.dumps({"files": [
+            {"path": "a.py", "content": "print('{not a brace}')\n"},
+            {"path": "b.py", "content": "s = \"[\\\"]\""}
+        ]})
+        parser = FileStreamParser()
+        emitted = []
+        first_at = None
+        text = "```json\n" + payload + "\n```"
+        for index, char in enumerate(text):
+            files = parser.feed(char)
+            if files and first_at is None:
+                first_at = index
+            emitted.extend(files)
+        
+        assert [f["path"] for f in emitted] == ["a.py", "b.py"]
+        assert emitted == json.loads(payload)["files"]
+        assert parser.complete
+        assert first_at < text.index("b.py")
+
+    def test_stream_charges_reported_or_estimated_usage(self, tmp_path):
+        """Test streams charge the usage chunk, or an estimate when reading stops early."""
+        transport = Mock(spec=HTTPTransport)
+        transport.post_stream.side_effect = lambda *args, **kwargs: iter([
+            'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+            'data: {"choices": [], "usage": {"total_tokens": 50}}',
+            "data: [DONE]"
+        ])
+        limiter = Mock(spec=RateLimiter)
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"), transport,
+                           rate_limiter=limiter, error_log=tmp_path / "errors.log")
+        prompt_tokens = estimate_tokens("system") + estimate_tokens("user")
+        
+        assert list(client.stream("system", "user")) == ["Hello"]
+        assert transport.post_stream.call_args[0][1]["stream_options"] == {"include_usage": True}
+        limiter.record_usage.assert_called_once_with(50 - prompt_tokens)
+        
+        limiter.reset_mock()
+        stream = client.stream("system", "user")
+        next(stream)
+        stream.close()
+        limiter.record_usage.assert_called_once_with(estimate_tokens("Hello"))
+
+    def test_throttled_request_honours_retry_after(self, tmp_path):
+        """Test HTTP 429 responses are retried after the Retry-After delay."""
+        throttled = requests.HTTPError(response=Mock(status_code=429, headers={"Retry-After": "0.05"}))
+        transport = Mock(spec=HTTPTransport)
+        transport.post_json.side_effect = [
+            throttled,
+            {"choices": [{"message": {"content": "ok"}}]}
+        ]
+        limiter = RateLimiter(requests_per_second=100)
+        
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"),
+                           transport, rate_limiter=limiter, error_log=tmp_path / "errors.log")
+        start = time.monotonic()
+        
+        assert client.prompt("system", "user") == "ok"
+        assert time.monotonic() - start >= 0.05
+        assert limiter.throttled == 1
+        
+    def test_persistent_throttling_raises_rate_limit_error(self, tmp_path):
+        """Test the client gives up with RateLimitError after max attempts."""
+        throttled = requests.HTTPError(response=Mock(status_code=429, headers={"Retry-After": "0"}))
+        transport = Mock(spec=HTTPTransport)
+        transport.post_json.side_effect = throttled
+        
+        client = LLMClient(LLMConfig(provider="test", model="test", api_key="key"),
+                           transport, max_attempts=2, error_log=tmp_path / "errors.log")
+        with patch("src.core.llm_client.time.sleep"), pytest.raises(RuntimeError) as info:
+            client.prompt("system", "user")
+        
+        assert isinstance(info.value.__cause__, RateLimitError)
+        assert transport.post_json.call_count == 2
+
+class TestRateLimiting:
+    """Test suite for rate limiting and backoff helpers."""
+    
+    def test_token_bucket_paces_requests(self):
+        """Test reservations beyond the burst wait for refill."""
+        bucket = TokenBucket(rate=10, capacity=2)
+        
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        
+    def test_retry_after_parsing_and_backoff(self):
+        """Test Retry-After forms are parsed and respected by the backoff."""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after(None) is None
+        
+        for attempt in range(1, 6):
+            assert 0 <= backoff_delay(attempt, 1.0, 8.0) <= min(8.0, 2 ** (attempt - 1))
+        assert backoff_delay(1, 1.0, retry_after=5) >= 5
+        
+        try:
+            raise RuntimeError("failed") from RateLimitError("throttled", retry_after=2.0)
+        except RuntimeError as e:
+            assert retry_after_of(e) == 2.0
+        assert retry_after_of(ValueError("plain")) is None
+    
+    def test_model_override_inherits_provider_limits(self, monkeypatch):
+        """Test a model override keeps the provider limits it does not name."""
+        from src.core import rate_limiter
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+        monkeypatch.setattr(rate_limiter, "_limit_settings", {"p": {
+            "requests_per_second": 2, "tokens_per_minute": 600,
+            "models": {"slow": {"requests_per_second": 0.5, "burst": 1}}
+        }})
+        
+        limiter = rate_limiter.get_rate_limiter("p", "slow")
+        assert limiter.requests.rate == 0.5 and limiter.tokens.rate == 10
+        assert rate_limiter.get_rate_limiter("p", "other") is not limiter
+        
+    def test_task_runner_honours_retry_after_in_cause_chain(self):
+        """Test TaskRunner waits as long as a wrapped RateLimitError asks."""
+        error = RuntimeError("wrapped")
+        error.__cause__ = RateLimitError("429", retry_after=7)
+        task = Mock(side_effect=[error, "done"])
+        
+        with patch("src.core.repo.time.sleep") as sleep:
+            assert TaskRunner(max_retries=2, retry_delay=0).execute(task) == "done"
+        assert sleep.call_args.args[0] >= 7
+
+class TestHTTPTransport:
+    """Test suite for the shared pooled HTTP transport."""
+    
+    def test_session_is_pooled_and_reused(self):
+        """Test requests go through one pooled keep-alive session."""
+        transport = HTTPTransport(base_url="https://example.test/v1", pool_size=4)
+        adapter = transport.session.get_adapter("https://example.test/v1")
+        
+        assert adapter._pool_maxsize == 4
+        assert transport.session.headers["Connection"] == "keep-alive"
+        assert "gzip" in transport.session.headers["Accept-Encoding"]
+        
+        with patch.object(transport.session, "post") as mock_post:
+            mock_post.return_value.json.return_value = {"ok": True}
+            transport.post_json("chat/completions", {})
+            transport.post_json("chat/completions", {})
+        
+        assert mock_post.call_count == 2
+        assert mock_post.call_args[0][0] == "https://example.test/v1/chat/completions"
+
+class TestModelRouter:
+    """Test suite for config-driven model routing."""
+    
+    def test_routes_read_from_config(self):
+        """Test single routes and cascades come from the agents config."""
+        router = ModelRouter({
+            "planner": {"provider": "openrouter", "model": "big", "timeout": 90},
+            "developer": {"provider": "openrouter", "model": "big", "cascade": [
+                {"provider": "openrouter", "model": "cheap", "timeout": 10},
+                {"provider": "openrouter", "model": "big"}
+            ]}
+        })
+        
+        assert [(r.model, r.timeout) for r in router.routes_for("planner")] == [("big", 90)]
+        assert [(r.model, r.timeout) for r in router.routes_for("developer")] == [("cheap", 10), ("big", 30)]
+        with pytest.raises(ConfigurationError):
+            router.routes_for("auditor")
+            
+    def test_cascade_escalates_on_invalid_output_and_errors(self, monkeypatch):
+        """Test prompts move to the next route on validation failure or provider error."""
+        monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+        routes = [{"provider": "p", "model": m} for m in ("cheap", "flaky", "strong")]
+        router = ModelRouter({"developer": {"provider": "p", "model": "strong", "cascade": routes}})
+        client = router.client_for("developer")
+        responses = {"cheap": "not json", "flaky": RuntimeError("down"), "strong": '{"ok": 1}'}
+        
+        for route_client in client.clients:
+            route_client.prompt = Mock(side_effect=[responses[route_client.config.model]])
+        
+        assert client.prompt("s", "u", validate=lambda text: json.loads(text)["ok"]) == '{"ok": 1}'
+        assert all(c.prompt.call_count == 1 for c in client.clients)
+
+class TestLatency:
+    """Test suite for latency tracking, adaptive timeouts and hedging."""
+    
+    def test_adaptive_timeout_follows_p99(self):
+        """Test timeouts use the configured value until enough samples exist."""
+        tracker = LatencyTracker(adaptive_timeouts=True, timeout_multiplier=3,
+                                 min_samples=10, min_timeout=1, max_timeout=60)
+        assert tracker.timeout_for("m", 30) == 30
+        for _ in range(10):
+            tracker.record("m", 2.0)
+        
+        p99 = tracker.percentile("m", 0.99)
+        assert 2.0 <= p99 < 2.5
+        assert tracker.timeout_for("m", 30) == p99 * 3
+        
+    def test_hedge_budget_caps_duplicates(self):
+        """Test hedges are limited to a fraction of requests plus a burst."""
+        budget = HedgeBudget(ratio=0.1, burst=1)
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        for _ in range(10):
+            budget.record_request()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+        
+    def test_slow_request_is_hedged_to_fallback(self, monkeypatch):
+        """Test a request past the model's p95 is duplicated and the first answer wins."""
+        monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+        router = ModelRouter({"developer": {"provider": "p", "model": "strong", "cascade": [
+            {"provider": "p", "model": "cheap"}, {"provider": "p", "model": "strong"}
+        ]}})
+        client = router.client_for("developer")
+        client.tracker = LatencyTracker(min_samples=1)
+        client.tracker.record("cheap", 0.05)
+        client.hedge_policy = HedgePolicy(target="fallback", budget=HedgeBudget(burst=1))
+        client.clients[0].prompt = Mock(side_effect=lambda s, u: time.sleep(1) or "slow")
+        client.clients[1].prompt = Mock(return_value="fast")
+        
+        start = time.perf_counter()
+        assert client.prompt("s", "u") == "fast"
+        assert time.perf_counter() - start < 0.5
+        assert client.hedge_policy.budget.hedges == 1
+        
+    def test_failed_hedge_attempt_waits_for_the_other(self, monkeypatch):
+        """Test an attempt failing with any error leaves the in-flight duplicate to answer."""
+        monkeypatch.setenv("OPENROUTER_API_KEY", "key")
+        router = ModelRouter({"developer": {"provider": "p", "model": "strong", "cascade": [
+            {"provider": "p", "model": "cheap"}, {"provider": "p", "model": "strong"}
+        ]}})
+        client = router.client_for("developer")
+        client.tracker = LatencyTracker(min_samples=1)
+        client.tracker.record("cheap", 0.05)
+        client.hedge_policy = HedgePolicy(target="fallback", budget=HedgeBudget(burst=1))
+        def over_budget(system_message, user_prompt):
+            time.sleep(0.2)
+            raise PromptBudgetError("too long", "developer")
+        client.clients[0].prompt = Mock(side_effect=over_budget)
+        client.clients[1].prompt = Mock(side_effect=lambda s, u: time.sleep(0.4) or "late")
+        
+        assert client.prompt("s", "u") == "late"
+
+class TestDispatcher:
+    """Test suite for signal bus handoffs."""
+    
+    def test_signals_are_consumed_exactly_once(self, tmp_path):
+        """Test a signal is handed out once and deleted after the agent succeeds."""
+        bus = SignalBus(tmp_path / "signals", tmp_path / "work_items")
+        dispatcher = Dispatcher(bus)
+        signal = bus.publish(tmp_path / "signals/PLANNING_COMPLETE.md", "plan")
+        
+        assert dispatcher.get_next_agent() == "developer"
+        assert dispatcher.get_next_agent() is None
+        dispatcher.complete()
+        assert not signal.path.exists()
+        assert dispatcher.handoff_summary()["count"] == 1
+        
+    def test_failed_agent_releases_signal_and_work_items_come_first(self, tmp_path):
+        """Test released signals are redelivered and recovered work items take precedence."""
+        (tmp_path / "work_items").mkdir()
+        (tmp_path / "work_items/item-001.md").write_text("fix")
+        bus = SignalBus(tmp_path / "signals", tmp_path / "work_items")
+        dispatcher = Dispatcher(bus)
+        bus.publish(tmp_path / "signals/IMPLEMENTATION_COMPLETE.md", "done")
+        
+        assert dispatcher.get_next_agent() == "planner"
+        dispatcher.complete(succeeded=False)
+        assert dispatcher.get_next_agent() == "planner"
+        dispatcher.complete()
+        assert dispatcher.get_next_agent() == "auditor"
+        
+    def test_audit_result_ends_pipeline_or_returns_to_planner(self, tmp_path):
+        """Test a passed audit completes the run and a failed one goes to the planner."""
+        bus = SignalBus(tmp_path / "signals", tmp_path / "work_items")
+        dispatcher = Dispatcher(bus)
+        bus.publish(tmp_path / "work_items/audit-1.md", "fix")
+        failed = bus.publish(tmp_path / "signals/PROJECT_AUDIT_FAILED.md", "failed")
+        
+        assert dispatcher.get_next_agent() == "planner"
+        dispatcher.complete()
+        assert not failed.path.exists()
+        assert dispatcher.get_next_agent() is None
+        
+        bus.publish(tmp_path / "signals/PROJECT_AUDIT_PASSED.md", "passed")
+        bus.publish(tmp_path / "work_items/stale.md", "fix")
+        assert dispatcher.get_next_agent() == Dispatcher.COMPLETE
+        
+    def test_waiting_dispatcher_wakes_on_publish(self, tmp_path):
+        """Test a blocking wait returns as soon as a signal is published."""
+        bus = SignalBus(tmp_path / "signals", tmp_path / "work_items")
+        dispatcher = Dispatcher(bus)
+        timer = threading.Timer(0.05, bus.publish, [tmp_path / "signals/PLANNING_COMPLETE.md", "plan"])
+        timer.start()
+        
+        start = time.perf_counter()
+        assert dispatcher.get_next_agent(timeout=5) == "developer"
+        assert time.perf_counter() - start < 1
+
+def _items(edges):
+    return [
+        WorkItem.from_dict({"item_id": item_id, "description": item_id, "depends_on": deps,
+                            "status": "pending"})
+        for item_id, deps in edges.items()
+    ]
+
+class TestWorkItemScheduler:
+    """Test suite for dependency-aware work item scheduling."""
+    
+    def test_critical_path_runs_first_and_dependencies_are_respected(self):
+        """Test ready items start longest chain first and wait for their dependencies."""
+        items = _items({"a": [], "b": ["a"], "c": ["b"], "d": []})
+        scheduler = WorkItemScheduler(items, max_concurrency=1)
+        order = []
+        
+        async def worker(item):
+            order.append(item.item_id)
+            item.status = "completed"
+        
+        asyncio.run(scheduler.run(worker))
+        assert scheduler.critical_path_length() == 3
+        assert order == ["a", "b", "c", "d"]
+        
+    def test_failed_dependency_skips_dependents_only(self):
+        """Test without fail_fast independent items still run after a failure."""
+        items = _items({"a": [], "b": ["a"], "c": ["b"], "d": []})
+        scheduler = WorkItemScheduler(items, max_concurrency=2, fail_fast=False)
+        
+        async def worker(item):
+            if item.item_id == "a":
+                raise RuntimeError("boom")
+            item.status = "completed"
+        
+        with pytest.raises(RuntimeError):
+            asyncio.run(scheduler.run(worker))
+        assert [item.status for item in items] == ["failed", "skipped", "skipped", "completed"]
+        
+    def test_cycles_and_unknown_dependencies_are_rejected(self):
+        """Test invalid dependency graphs raise ValidationError."""
+        with pytest.raises(ValidationError):
+            WorkItemScheduler(_items({"a": ["b"], "b": ["a"]}))
+        with pytest.raises(ValidationError):
+            WorkItemScheduler(_items({"a": ["missing"]}))
+
+class TestWorkStore:
+    """Test suite for the SQLite work item and audit result store."""
+    
+    def test_items_are_queried_and_updated_by_status(self, tmp_path):
+        """Test plan order, status queries, failure bookkeeping and retries."""
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        store.replace_plan(_items({"a": [], "b": ["a"], "c": []}))
+        
+        item = store.get_item("b")
+        item.status = "failed"
+        item.retry_count += 1
+        item.error_log = "boom"
+        store.save_item(item)
+        
+        assert [i.item_id for i in store.get_items("pending")] == ["a", "c"]
+        assert store.count_by_status() == {"pending": 2, "failed": 1}
+        assert store.get_item("b").depends_on == ["a"] and store.get_item("b").error_log == "boom"
+        assert store.reset_failed() == 1
+        assert store.get_item("b").retry_count == 1
+        assert "- [pending] b <!-- id: b; depends_on: a -->" in render_work_items(store.get_items())
+        
+    def test_latest_audit_result(self, tmp_path):
+        """Test audit results round-trip and the newest one is returned."""
+        store = WorkStore(str(tmp_path / "work.sqlite"))
+        first, second = AuditResult(), AuditResult()
+        second.discrepancies = {"tests": "Some tests failed"}
+        store.save_audit(first)
+        store.save_audit(second)
+        
+        latest = store.latest_audit()
+        assert str(latest.audit_id) == str(second.audit_id)
+        assert latest.discrepancies == {"tests": "Some tests failed"} and not latest.passed
+
+class TestWorkQueue:
+    """Test suite for the leased SQLite work queue."""
+    
+    def test_expired_lease_is_redelivered_and_stale_result_rejected(self, tmp_path):
+        """Test a job whose worker stopped heartbeating goes to another worker."""
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"))
+        queue.enqueue("job-1", {"n": 1})
+        
+        first = queue.lease("w1", lease_seconds=0.05)
+        assert first.payload == {"n": 1} and queue.lease("w2", 0.05) is None
+        assert queue.heartbeat(first, 0.05)
+        time.sleep(0.1)
+        
+        second = queue.lease("w2", lease_seconds=10)
+        assert second.job_id == "job-1" and second.attempts == 2
+        assert not queue.heartbeat(first, 10)
+        assert not queue.complete(first, {"by": "w1"})
+        assert queue.complete(second, {"by": "w2"})
+        assert queue.result("job-1") == {"status": "done", "result": {"by": "w2"}, "error": None}
+    
+    def test_failed_job_is_retried_until_max_attempts(self, tmp_path):
+        """Test failures requeue a job and the last attempt marks it failed."""
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=2)
+        queue.enqueue("job-1", {})
+        
+        queue.fail(queue.lease("w1", 10), "boom")
+        assert queue.result("job-1") is None
+        queue.fail(queue.lease("w1", 10), "boom again")
+        
+        assert queue.lease("w1", 10) is None
+        assert queue.result("job-1") == {"status": "failed", "result": None, "error": "boom again"}
+    
+    def test_last_expired_lease_fails_job_without_workers(self, tmp_path):
+        """Test result() fails a job whose final lease ran out with no worker left."""
+        queue = SQLiteWorkQueue(str(tmp_path / "queue.sqlite"), max_attempts=1)
+        queue.enqueue("job-1", {})
+        queue.lease("w1", lease_seconds=0.05)
+        assert queue.result("job-1") is None
+        time.sleep(0.1)
+        
+        assert queue.result("job-1") == {
+            "status": "failed", "result": None, "error": "Lease expired too often"
+        }
+
+class TestTracing:
+    """Test suite for span tracing and its exports."""
+    
+    def test_nested_spans_export_chrome_trace_and_summary(self, tmp_path):
+        """Test spans nest, carry attributes and add up to self time."""
+        tracer = Tracer()
+        with tracer.span("pipeline"):
+            with tracer.span("llm_call", "llm", model="m") as span:
+                time.sleep(0.02)
+                span.set(tokens=7)
+            with tracer.span("file_write", "io"):
+                pass
+        
+        tracer.export_chrome_trace(tmp_path / "trace.json")
+        events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert spans["llm_call"]["args"]["parent_id"] == spans["pipeline"]["args"]["span_id"]
+        assert spans["llm_call"]["args"]["tokens"] == 7 and spans["llm_call"]["dur"] >= 20000
+        
+        rows = {row["name"]: row for row in tracer.summary()}
+        assert rows["pipeline"]["self"] < rows["pipeline"]["total"] - 0.015
+        assert "llm_call" in tracer.format_summary()
+    
+    def test_concurrent_tasks_get_their_own_lanes(self):
+        """Test spans of concurrent asyncio tasks nest under the right parent."""
+        tracer = Tracer()
+        
+        async def item(name):
+            with tracer.span("work_item", item=name):
+                await asyncio.sleep(0.01)
+                with tracer.span("llm_call", item=name):
+                    await asyncio.sleep(0.01)
+        
+        async def main():
+            with tracer.span("pipeline"):
+                await asyncio.gather(item("a"), item("b"))
+        
+        asyncio.run(main())
+        by_id = {span.span_id: span for span in tracer.spans}
+        calls = [span for span in tracer.spans if span.name == "llm_call"]
+        assert all(by_id[c.parent_id].attributes["item"] == c.attributes["item"] for c in calls)
+        assert len({c.lane for c in calls}) == 2
+
+class TestMetrics:
+    """Test suite for the Prometheus metrics registry."""
+    
+    def test_text_exposition_format(self, tmp_path):
+        """Test counters, gauges and cumulative histogram buckets are rendered."""
+        registry = MetricsRegistry()
+        registry.counter("llm_retries_total", "Retries", ("model",)).inc(model="m")
+        registry.counter("llm_retries_total", "Retries", ("model",)).inc(2, model="m")
+        registry.gauge("cache_hit_ratio", "Hit ratio").set(0.25)
+        latency = registry.histogram("latency_seconds", "Latency", ("model",), buckets=[0.1, 1.0])
+        for seconds in (0.05, 0.5, 5.0):
+            latency.observe(seconds, model="m")
+        
+        text = registry.render()
+        assert 'llm_retries_total{model="m"} 3' in text
+        assert "# TYPE cache_hit_ratio gauge\ncache_hit_ratio 0.25" in text
+        assert 'latency_seconds_bucket{model="m",le="1"} 2' in text
+        assert 'latency_seconds_bucket{model="m",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{model="m"} 3' in text
+        with pytest.raises(ValueError):
+            registry.gauge("llm_retries_total", "Retries", ("model",))
+        
+        registry.write(tmp_path / "metrics.prom")
+        assert (tmp_path / "metrics.prom").read_text() == text
+    
+    def test_metrics_served_over_http(self):
+        """Test the optional endpoint serves the registry at /metrics."""
+        registry = MetricsRegistry()
+        registry.counter("runs_total", "Runs").inc()
+        server = MetricsServer(registry, port=0)
+        try:
+            response = requests.get(f"http://127.0.0.1:{server.port}/metrics", timeout=5)
+        finally:
+            server.close()
+        assert response.status_code == 200 and "runs_total 1" in response.text
+
+class TestStructuredLogger:
+    """Test suite for the buffered structured log writer."""
+    
+    def test_entries_are_filtered_batched_and_flushed_in_order(self, tmp_path):
+        """Test entries below the level are dropped and the rest reach each file in order."""
+        log = StructuredLogger(str(tmp_path / "first.log"), level=LogLevel.INFO,
+                               flush_interval=10)
+        log.debug("dropped")
+        for i in range(100):
+            log.info("entry", index=i)
+        log.set_log_file(tmp_path / "second.log")
+        log.error("after switch", agent="developer")
+        log.close()
+        
+        first = [json.loads(line) for line in (tmp_path / "first.log").read_text().splitlines()]
+        assert [entry["context"]["index"] for entry in first] == list(range(100))
+        second = [json.loads(line) for line in (tmp_path / "second.log").read_text().splitlines()]
+        assert second[0]["level"] == "ERROR" and second[0]["context"] == {"agent": "developer"}
+    
+    def test_log_file_rotates_by_size(self, tmp_path):
+        """Test the file is rotated past max_bytes and only backup_count files are kept."""
+        log = StructuredLogger(str(tmp_path / "app.log"), max_bytes=1000, backup_count=2,
+                               buffer_bytes=1)
+        for i in range(60):
+            log.info("x" * 50, index=i)
+        log.close()
+        
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["app.log", "app.log.1", "app.log.2"]
+        assert (tmp_path / "app.log.1").stat().st_size >= 1000
+        last = (tmp_path / "app.log").read_text().splitlines()[-1]
+        assert json.loads(last)["context"]["index"] == 59
+
+class TestLogIndex:
+    """Test suite for the sidecar index of structured logs."""
+    
+    def test_writer_indexes_blocks_and_queries_seek_to_them(self, tmp_path):
+        """Test queries read only the blocks that can match."""
+        log = StructuredLogger(str(tmp_path / "app.log"), buffer_bytes=1, index=True)
+        for i in range(50):
+            log.info("step", agent="planner" if i < 49 else "developer", item=f"item-{i}")
+        log.error("Implementation failed", agent="developer", error="boom")
+        log.close()
+        
+        index = LogIndex(tmp_path / "app.log")
+        reads = []
+        with patch("builtins.open", side_effect=lambda *a, **k: _recording_open(reads, *a, **k)):
+            entries = list(index.query(level="ERROR", context={"agent": "developer"}))
+        assert [e["context"]["error"] for e in entries] == ["boom"]
+        assert sum(reads) < 400
+        
+        assert [e["context"]["item"] for e in index.query(context={"item": "item-7"})] == ["item-7"]
+        assert len(list(index.query(has=["error"]))) == 1
+        assert len(list(index.query(text="step", limit=5))) == 5
+    
+    def test_block_indexed_by_a_query_is_not_added_twice(self, tmp_path):
+        """Test add_block() after update() already covered the batch keeps entries unique."""
+        log_file = tmp_path / "app.log"
+        lines = [json.dumps({"timestamp": f"2025-01-01T00:00:0{i}", "level": "INFO",
+                             "message": "m", "context": {"item": f"item-{i}"}}) + "\n"
+                 for i in range(3)]
+        data = "".join(lines).encode()
+        log_file.write_bytes(data)
+        index = LogIndex(log_file)
+        
+        assert len(list(index.query())) == 3
+        index.add_block(0, len(data), [entry_meta(json.loads(line)) for line in lines])
+        with open(log_file, "ab") as f:
+            f.write(lines[0].encode())
+        index.add_block(len(data), len(lines[0]), [entry_meta(json.loads(lines[0]))])
+        
+        assert [e["context"]["item"] for e in index.query()] == ["item-0", "item-1", "item-2", "item-0"]
+        index.close()
+    
+    def test_update_indexes_unindexed_tail(self, tmp_path):
+        """Test logs written without the index are indexed on first query."""
+        log_file = tmp_path / "app.log"
+        log = StructuredLogger(str(log_file))
+        log.warning("slow handoff", agent="auditor")
+        log.info("done")
+        log.close()
+        with open(log_file, "a") as f:
+            f.write('{"timestamp": "2')
+        
+        index = LogIndex(log_file)
+        assert [e["message"] for e in index.query(level="WARNING")] == ["slow handoff"]
+        assert index.indexed_bytes < log_file.stat().st_size
+
+_real_open = open
+
+def _recording_open(reads, *args, **kwargs):
+    f = _real_open(*args, **kwargs)
+    read = f.read
+    
+    def recording_read(size=-1):
+        data = read(size)
+        reads.append(len(data))
+        return data
+    
+    f.read = recording_read
+    return f
+
+class TestZipArchive:
+    """Test suite for parallel packaging of the generated project."""
+    
+    def test_parallel_archive_is_valid_and_stores_compressed_formats(self, tmp_path):
+        """Test the assembled archive round-trips through zipfile."""
+        import zipfile
+        source = tmp_path / "project"
+        (source / "pkg/__pycache__").mkdir(parents=True)
+        (source / "pkg/__pycache__/mod.pyc").write_bytes(b"junk")
+        files = {f"pkg/mod_{i}.py": f"x = {i}\n" * 500 for i in range(20)}
+        files["assets/logo.png"] = "not really a png" * 100
+        files["empty.txt"] = ""
+        for name, content in files.items():
+            (source / name).parent.mkdir(parents=True, exist_ok=True)
+            (source / name).write_text(content)
+        
+        create_zip_archive(source, tmp_path / "out/project.zip", max_workers=4)
+        
+        with zipfile.ZipFile(tmp_path / "out/project.zip") as archive:
+            assert archive.testzip() is None
+            assert sorted(archive.namelist()) == sorted(files)
+            assert all(archive.read(name).decode() == content for name, content in files.items())
+            assert archive.getinfo("assets/logo.png").compress_type == zipfile.ZIP_STORED
+            assert archive.getinfo("pkg/mod_3.py").compress_type == zipfile.ZIP_DEFLATED
+        
+        create_zip_archive(source, tmp_path / "stored.zip", compression_level=0, max_workers=1)
+        with zipfile.ZipFile(tmp_path / "stored.zip") as archive:
+            assert {i.compress_type for i in archive.infolist()} == {zipfile.ZIP_STORED}
+
+    def test_incremental_archive_recompresses_only_changed_files(self, tmp_path):
+        """Test unchanged entries are copied from the previous archive."""
+        import os
+        import zipfile
+        from src.core import output_generator
+        source = tmp_path / "project"
+        source.mkdir()
+        for i in range(10):
+            (source / f"mod_{i}.py").write_text(f"x = {i}\n" * 200)
+        archive_path = tmp_path / "project.zip"
+        create_zip_archive(source, archive_path, max_workers=2, incremental=True)
+        
+        (source / "mod_1.py").write_text("changed\n")
+        os.utime(source / "mod_2.py", ns=(0, 0))
+        (source / "mod_3.py").unlink()
+        (source / "new.py").write_text("new\n")
+        with patch.object(output_generator, "compress_file",
+                          wraps=output_generator.compress_file) as compress:
+            create_zip_archive(source, archive_path, max_workers=2, incremental=True)
+        
+        assert sorted(call.args[1] for call in compress.call_args_list) == ["mod_1.py", "new.py"]
+        with zipfile.ZipFile(archive_path) as archive:
+            assert archive.testzip() is None
+            assert "mod_3.py" not in archive.namelist()
+            assert archive.read("mod_1.py") == b"changed\n"
+            assert archive.read("mod_9.py") == b"x = 9\n" * 200
+        
+        # A full rebuild drops the manifest; the next incremental run starts over
+        create_zip_archive(source, archive_path)
+        assert not output_generator.manifest_path(archive_path).exists()
+
+    def test_tar_backends_stream_to_a_file_object(self, tmp_path):
+        """Test tar.gz round-trips when written to a non-seekable stream."""
+        import io
+        import tarfile
+        source = tmp_path / "project"
+        (source / "pkg").mkdir(parents=True)
+        (source / "pkg/app.py").write_text("print('hi')\n" * 100)
+        (source / "README.md").write_text("# demo\n")
+        
+        class Pipe(io.RawIOBase):
+            """Write-only stream that refuses to seek, like stdout."""
+            def __init__(self):
+                self.chunks = []
+            def writable(self):
+                return True
+            def write(self, data):
+                self.chunks.append(bytes(data))
+                return len(data)
+        
+        pipe = Pipe()
+        create_archive(source, pipe, "tar.gz", reproducible=True)
+        with tarfile.open(fileobj=io.BytesIO(b"".join(pipe.chunks)), mode="r:gz") as tar:
+            assert tar.getnames() == ["README.md", "pkg/app.py"]
+            assert tar.extractfile("pkg/app.py").read() == b"print('hi')\n" * 100
+            assert {member.mtime for member in tar.getmembers()} == {DEFAULT_EPOCH}
+        
+        if not TarZstBackend.available():
+            with pytest.raises(ConfigurationError):
+                create_archive(source, tmp_path / "project.tar.zst", "tar.zst")
+        with pytest.raises(ConfigurationError):
+            create_archive(source, tmp_path / "project.rar", "rar")
+
+    def test_reproducible_archives_ignore_timestamps(self, tmp_path):
+        """Test the same files give byte-identical archives in every format."""
+        import os
+        source = tmp_path / "project"
+        source.mkdir()
+        for i in range(5):
+            (source / f"mod_{i}.py").write_text(f"x = {i}\n" * 50)
+        
+        for archive_format in ("zip", "tar.gz"):
+            first, second = tmp_path / f"a.{archive_format}", tmp_path / f"b.{archive_format}"
+            create_archive(source, first, archive_format, reproducible=True, max_workers=2)
+            for path in source.iterdir():
+                os.utime(path, (1_700_000_000, 1_700_000_000))
+            create_archive(source, second, archive_format, reproducible=True, max_workers=2)
+            assert first.read_bytes() == second.read_bytes()
+            
+    def test_reproducible_timestamps_follow_source_date_epoch(self, tmp_path, monkeypatch):
+        """Test zip and tar members share SOURCE_DATE_EPOCH, clamped to 1980 for zip."""
+        import tarfile
+        import zipfile
+        source = tmp_path / "project"
+        source.mkdir()
+        (source / "app.py").write_text("x = 1\n")
+        
+        for epoch, zip_time in ((1_700_000_000, (2023, 11, 14, 22, 13, 20)),
+                                (0, (1980, 1, 1, 0, 0, 0))):
+            monkeypatch.setenv("SOURCE_DATE_EPOCH", str(epoch))
+            create_archive(source, tmp_path / "p.zip", "zip", reproducible=True)
+            create_archive(source, tmp_path / "p.tar.gz", "tar.gz", reproducible=True)
+            with zipfile.ZipFile(tmp_path / "p.zip") as archive:
+                assert archive.getinfo("app.py").date_time == zip_time
+            with tarfile.open(tmp_path / "p.tar.gz") as tar:
+                assert tar.getmember("app.py").mtime == epoch
+
+class TestWorkspace:
+    """Test suite for running projects in separate workspaces."""
+    
+    def test_projects_run_concurrently_in_their_own_workspaces(self, tmp_path):
+        """Test each project gets its own state, logs and output archive."""
+        roots = [tmp_path / name for name in ("one", "two")]
+        for root in roots:
+            (root / "generated_project").mkdir(parents=True)
+            (root / "generated_project/app.py").write_text(root.name)
+        
+        results = run_projects({"projects": {"max_workers": 2}}, {}, roots)
+        
+        assert results == {str(root): None for root in roots}
+        for root in roots:
+            workspace = Workspace(root)
+            assert workspace.output_zip.exists() and workspace.state_file.exists()
+            assert workspace.log_file.exists()
+
+    def test_llm_errors_are_logged_in_the_workspace(self, tmp_path, monkeypatch):
+        """Test an agent's LLM clients write to its workspace's error log."""
+        from src.core.agents.developer_agent import DeveloperAgent
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+        workspace = Workspace(tmp_path / "one")
+        agent = DeveloperAgent(
+            {"agents": {"developer": {"provider": "openrouter", "model": "m"}}}, {}, workspace
+        )
+        
+        client = agent.get_llm_client()
+        assert client.error_handler.log_file == workspace.error_log
+        assert all(c.error_handler.log_file == workspace.error_log for c in client.clients)
+        
+    def test_project_rules_override_shared_rules(self, tmp_path):
+        """Test only the rules files a project has are loaded from its workspace."""
+        from src.core.rule_manager import load_project_rules
+        workspace = Workspace(tmp_path / "one")
+        workspace.rules_dir.mkdir(parents=True)
+        (workspace.rules_dir / "rules-developer.md").write_text("project rules")
+        
+        assert load_project_rules(workspace) == {"developer": "project rules"}
+        assert load_project_rules(Workspace(tmp_path / "two")) == {}
+
+class TestCassetteTransport:
+    """Test suite for record/replay of LLM exchanges."""
+    
+    def test_record_then_replay_offline(self, tmp_path):
+        """Test exchanges recorded against the stub server replay without it."""
+        cassette = tmp_path / "cassette.jsonl"
+        config = LLMConfig(provider="test", model="test", api_key="key")
+        
+        with StubLLMServer(responder=lambda payload: "recorded answer") as stub:
+            recorder = CassetteTransport(
+                str(cassette), mode="record", inner=HTTPTransport(base_url=stub.base_url)
+            )
+            client = LLMClient(config, recorder, error_log=tmp_path / "errors.log")
+            assert client.prompt("system", "user") == "recorded answer"
+            assert "".join(client.stream("system", "stream")) == "recorded answer"
+            assert len(stub.requests) == 2
+        
+        replayer = CassetteTransport(str(cassette), mode="replay", simulate_latency="recorded")
+        client = LLMClient(LLMConfig(provider="test", model="test"), replayer,
+                           error_log=tmp_path / "errors.log")
+        
+        assert client.prompt("system", "user") == "recorded answer"
+        assert "".join(client.stream("system", "stream")) == "recorded answer"
+        with pytest.raises(RuntimeError) as info:
+            client.prompt("system", "never recorded")
+        assert isinstance(info.value.__cause__, CassetteError)
 
 class TestErrorHandler:
     """Test suite for ErrorHandler functionality."""
@@ -69,4 +966,71 @@ class TestErrorHandler:
         
         assert log_file.exists()
         with open(log_file) as f:
-            assert "test error" in f.read()
\ No newline at end of file
+            assert "test error" in f.read()
+class TestLLMCache:
+    """Test suite for the persistent LLM response cache."""
+    
+    def test_hit_miss_and_stats(self, tmp_path):
+        """Test cached responses are returned and counted."""
+        cache = LLMCache(str(tmp_path / "cache.sqlite"))
+        key = LLMCache.make_key("openrouter", "model:free", "system", "user")
+        
+        assert cache.get(key) is None
+        cache.put(key, "response", latency=1.5, tokens=10)
+        assert cache.get(key) == "response"
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["saved_seconds"] == 1.5 and stats["saved_tokens"] == 10
+        
+    def test_lru_eviction_and_ttl(self, tmp_path):
+        """Test the size cap evicts least-recently-used entries and TTL expires them."""
+        cache = LLMCache(str(tmp_path / "cache.sqlite"), max_bytes=10)
+        cache.put("a", "12345")
+        cache.put("b", "12345")
+        cache.get("a")
+        cache.put("c", "12345")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "12345"
+        
+        cache.ttl_seconds = 0
+        cache.put("d", "1")
+        time.sleep(0.01)
+        assert cache.get("d") is None
+        
+    def test_client_cache_modes(self, tmp_path):
+        """Test the client reads, refreshes or bypasses the cache per mode."""
+        cache = LLMCache(str(tmp_path / "cache.sqlite"))
+        transport = Mock(spec=HTTPTransport)
+        transport.post_json.return_value = {
+            "choices": [{"message": {"content": "fresh"}}]
+        }
+        config = LLMConfig(provider="test", model="test", api_key="key")
+        error_log = tmp_path / "errors.log"
+        
+        LLMClient(config, transport, cache, error_log=error_log).prompt("system", "user")
+        LLMClient(config, transport, cache, error_log=error_log).prompt("system", "user")
+        assert transport.post_json.call_count == 1
+        
+        LLMClient(config, transport, cache, cache_mode="refresh",
+                  error_log=error_log).prompt("system", "user")
+        LLMClient(config, transport, cache, cache_mode="bypass",
+                  error_log=error_log).prompt("system", "user")
+        assert transport.post_json.call_count == 3
+
+class TestPromptAccountant:
+    """Test suite for prompt size accounting."""
+    
+    def test_records_and_enforces_ceiling(self):
+        """Test prompts are counted per agent and oversized ones rejected."""
+        accountant = PromptAccountant(max_tokens=10, agent_limits={"planner": 100})
+        
+        assert accountant.check("developer", "m", "a" * 8, "b" * 8) == 4
+        accountant.check("planner", "m", "a" * 200, "")
+        with pytest.raises(PromptBudgetError):
+            accountant.check("developer", "m", "a" * 80, "")
+        
+        summary = accountant.summary()
+        assert summary["developer"] == {"calls": 2, "tokens": 24, "max_tokens": 20, "rejected": 1}
+        assert summary["planner"]["rejected"] == 0